@@ -0,0 +1,264 @@
+"""
+Vectorised trend and anomaly analytics over patient vitals
+
+load() fetches one metric for one patient or a whole cohort in a single
+projected query on the vitals collection (api.vitals) and holds it as
+parallel NumPy arrays sorted by (patient, time). Every statistic below works
+on all patients at once with grouped reductions (bincount, reduceat,
+searchsorted over cumulative sums), never a Python loop per sample:
+
+    daily         per patient and UTC day: count, min, max, mean
+    rolling       time-aware rolling mean over the last `window` days
+    slope         least-squares trend, units per day
+    z-scores      deviation from the patient's own mean, in standard deviations
+    breaches      samples outside the metric's adult reference range
+"""
+from datetime import datetime, timezone as dt_timezone
+import numpy as np
+from api.vitals import vitals_collection
+
+DAY = 86400.0
+
+# Adult resting reference ranges used for breach flags; None = no range
+NORMAL_RANGES = {
+    'heart_rate': (50.0, 100.0),
+    'systolic_bp': (90.0, 140.0),
+    'diastolic_bp': (60.0, 90.0),
+    'respiratory_rate': (12.0, 20.0),
+    'spo2': (95.0, 100.0),
+    'temperature': (36.1, 37.8),
+    'glucose': (70.0, 180.0),
+    'weight': None,
+}
+
+# Day keys of different patients never fall within one window of each other
+_PATIENT_STRIDE = 1 << 32
+
+
+class Series:
+    """One metric for one or more patients, as arrays sorted by (patient, time)"""
+
+    __slots__ = ('patient_ids', 'patient', 'times', 'values')
+
+    def __init__(self, patient_ids, times, values):
+        """patient_ids: per-sample ids; times: epoch seconds; values: floats"""
+        ids = np.asarray(patient_ids, dtype=str)
+        times = np.asarray(times, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if (ids[1:] >= ids[:-1]).all():
+            # Already grouped by patient (load() sorts server side): number
+            # the runs instead of sorting strings
+            new_patient = np.r_[True, ids[1:] != ids[:-1]] if len(ids) else np.zeros(0, dtype=bool)
+            patient = np.cumsum(new_patient) - 1
+            self.patient_ids = ids[new_patient]
+        else:
+            self.patient_ids, patient = np.unique(ids, return_inverse=True)
+            patient = patient.reshape(-1)
+        if not ((patient[1:] > patient[:-1]) | (times[1:] >= times[:-1])).all():
+            order = np.lexsort((times, patient))
+            patient, times, values = patient[order], times[order], values[order]
+        self.patient = patient
+        self.times = times
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def patients(self):
+        return len(self.patient_ids)
+
+
+def load(patient_ids, metric, start, end):
+    """
+    Series of `metric` in [start, end] for patient_ids, in one query sorted
+    by the (patient, metric, time) index so Series skips its own sort
+    """
+    rows = vitals_collection().find(
+        {
+            'meta.patient_id': {'$in': list(patient_ids)},
+            'meta.metric': metric,
+            'recorded_at': {'$gte': start, '$lte': end},
+        },
+        {'_id': 0, 'meta.patient_id': 1, 'recorded_at': 1, 'value': 1},
+        sort=[('meta.patient_id', 1), ('recorded_at', 1)],
+        batch_size=10000,
+    )
+    ids, times, values = [], [], []
+    for row in rows:
+        ids.append(row['meta']['patient_id'])
+        times.append(row['recorded_at'].timestamp())
+        values.append(row['value'])
+    return Series(ids, times, values)
+
+
+def _per_patient(series, weights):
+    return np.bincount(series.patient, weights=weights, minlength=series.patients)
+
+
+def moments(series):
+    """(count, mean, std) per patient; NaN where a patient has no samples"""
+    count = _per_patient(series, None)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = _per_patient(series, series.values) / count
+        deviation = series.values - mean[series.patient]
+        std = np.sqrt(_per_patient(series, deviation * deviation) / count)
+    return count, mean, std
+
+
+def zscores(series, mean, std):
+    """Per-sample deviation from its patient's mean in standard deviations (0 when flat)"""
+    spread = std[series.patient]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (series.values - mean[series.patient]) / spread
+    return np.where(spread > 0, z, 0.0)
+
+
+def slopes(series):
+    """Least-squares slope per patient in units per day; NaN with < 2 distinct times"""
+    if not len(series):
+        return np.full(series.patients, np.nan)
+    x = (series.times - series.times.min()) / DAY
+    y = series.values
+    n = _per_patient(series, None)
+    sx, sy = _per_patient(series, x), _per_patient(series, y)
+    sxx, sxy = _per_patient(series, x * x), _per_patient(series, x * y)
+    denominator = n * sxx - sx * sx
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = (n * sxy - sx * sy) / denominator
+    return np.where(np.abs(denominator) > 1e-9, slope, np.nan)
+
+
+def daily(series, window):
+    """
+    Per (patient, UTC day) rows as a dict of arrays: patient, day (days since
+    the epoch), count, min, max, mean and rolling (mean of every sample in
+    the `window` days ending that day, for the same patient)
+    """
+    day = np.floor(series.times / DAY).astype(np.int64)
+    if not len(series):
+        empty = np.array([], dtype=np.float64)
+        return {key: empty for key in ('patient', 'day', 'count', 'min', 'max', 'mean', 'rolling')}
+
+    key = series.patient.astype(np.int64) * _PATIENT_STRIDE + day
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    count = np.diff(np.r_[starts, len(series)])
+    total = np.add.reduceat(series.values, starts)
+
+    # Rolling window over days, not rows: index of the first day row still
+    # inside [day - window + 1, day] for the same patient
+    day_key = key[starts]
+    first = np.searchsorted(day_key, day_key - (window - 1), side='left')
+    cumulative_total = np.r_[0.0, np.cumsum(total)]
+    cumulative_count = np.r_[0, np.cumsum(count)]
+    last = np.arange(1, len(starts) + 1)
+    rolling = (
+        (cumulative_total[last] - cumulative_total[first])
+        / (cumulative_count[last] - cumulative_count[first])
+    )
+
+    return {
+        'patient': series.patient[starts],
+        'day': day[starts],
+        'count': count,
+        'min': np.minimum.reduceat(series.values, starts),
+        'max': np.maximum.reduceat(series.values, starts),
+        'mean': total / count,
+        'rolling': rolling,
+    }
+
+
+def breaches(series, metric):
+    """(below, above) boolean masks for the metric's reference range"""
+    normal = NORMAL_RANGES.get(metric)
+    if normal is None:
+        none = np.zeros(len(series), dtype=bool)
+        return none, none
+    return series.values < normal[0], series.values > normal[1]
+
+
+def _number(value, digits=2):
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(float(seconds), dt_timezone.utc).isoformat()
+
+
+def patient_trends(series, metric, window=7, z_threshold=3.0, limit=50):
+    """Response body for one patient's trends (series from load([patient_id], ...))"""
+    count, mean, std = moments(series)
+    z = zscores(series, mean, std)
+    below, above = breaches(series, metric)
+    days = daily(series, window)
+    slope = slopes(series)
+
+    anomalies = np.flatnonzero(np.abs(z) > z_threshold)[-limit:]
+    breached = np.flatnonzero(below | above)[-limit:]
+    return {
+        'samples': int(len(series)),
+        'mean': _number(mean[0]) if len(series) else None,
+        'std': _number(std[0]) if len(series) else None,
+        'min': _number(series.values.min()) if len(series) else None,
+        'max': _number(series.values.max()) if len(series) else None,
+        'slope_per_day': _number(slope[0], 4) if len(series) else None,
+        'window_days': window,
+        'daily': [
+            {
+                'date': datetime.fromtimestamp(int(d) * DAY, dt_timezone.utc).date().isoformat(),
+                'count': int(n),
+                'min': _number(low),
+                'max': _number(high),
+                'avg': _number(avg),
+                'rolling_avg': _number(rolling),
+            }
+            for d, n, low, high, avg, rolling in zip(
+                days['day'], days['count'], days['min'], days['max'], days['mean'], days['rolling']
+            )
+        ],
+        'anomalies': {
+            'z_threshold': z_threshold,
+            'count': int(np.count_nonzero(np.abs(z) > z_threshold)),
+            'recent': [
+                {'t': _timestamp(series.times[i]), 'value': _number(series.values[i]), 'z': _number(z[i])}
+                for i in anomalies
+            ],
+        },
+        'breaches': {
+            'range': list(NORMAL_RANGES[metric]) if NORMAL_RANGES.get(metric) else None,
+            'below': int(below.sum()),
+            'above': int(above.sum()),
+            'recent': [
+                {'t': _timestamp(series.times[i]), 'value': _number(series.values[i])}
+                for i in breached
+            ],
+        },
+    }
+
+
+def cohort_summary(series, metric, window=7, z_threshold=3.0):
+    """
+    Per-patient arrays for a cohort: samples, mean, std, slope_per_day,
+    latest rolling mean, anomaly count and breach counts
+    """
+    count, mean, std = moments(series)
+    z = zscores(series, mean, std)
+    below, above = breaches(series, metric)
+    days = daily(series, window)
+
+    latest_rolling = np.full(series.patients, np.nan)
+    if len(days['patient']):
+        # Rows are sorted by (patient, day); take each patient's last one
+        last = np.flatnonzero(np.r_[days['patient'][1:] != days['patient'][:-1], True])
+        latest_rolling[days['patient'][last]] = days['rolling'][last]
+    return {
+        'patient_ids': series.patient_ids,
+        'samples': count,
+        'mean': mean,
+        'std': std,
+        'slope_per_day': slopes(series),
+        'rolling': latest_rolling,
+        'anomalies': _per_patient(series, (np.abs(z) > z_threshold).astype(np.float64)),
+        'below': _per_patient(series, below.astype(np.float64)),
+        'above': _per_patient(series, above.astype(np.float64)),
+    }
@@ -0,0 +1,29 @@
+"""
+API app configuration
+"""
+import logging
+from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ApiConfig(AppConfig):
+    name = 'api'
+
+    def ready(self):
+        """Register the MongoEngine connection once the app registry is loaded"""
+        import mongoengine as me
+        from middleware.db_instrumentation import event_listeners
+        try:
+            me.connect(
+                db=settings.DATABASE_NAME,
+                host=settings.MONGO_URI,
+                connect=False,  # Lazy connection
+                serverSelectionTimeoutMS=5000,
+                tz_aware=True,
+                event_listeners=event_listeners,
+            )
+        except Exception as e:
+            # Continue anyway, connection will be attempted on first use
+            logger.warning(f'MongoDB connection warning: {str(e)}')
@@ -0,0 +1,33 @@
+"""
+Async MongoDB access (Motor) for the ASGI request path
+
+The client is created lazily, once per process, with its own connection
+pool so async views never block the event loop on MongoEngine calls.
+"""
+from django.conf import settings
+
+_client = None
+
+
+def get_async_client():
+    global _client
+    if _client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from middleware.db_instrumentation import event_listeners
+        _client = AsyncIOMotorClient(
+            settings.MONGO_URI,
+            maxPoolSize=settings.ASYNC_MONGO_MAX_POOL_SIZE,
+            serverSelectionTimeoutMS=5000,
+            tz_aware=True,
+            event_listeners=event_listeners,
+        )
+    return _client
+
+
+def get_async_db():
+    return get_async_client()[settings.DATABASE_NAME]
+
+
+def get_async_collection(document_cls):
+    """Motor collection backing a MongoEngine Document class"""
+    return get_async_db()[document_cls._get_collection_name()]
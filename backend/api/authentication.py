@@ -3,67 +3,170 @@ JWT Authentication for Django REST Framework
 """
 import jwt
 import logging
+from bson import ObjectId
 from django.conf import settings
+from django.utils import timezone
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
+from api.models import User
+from api.principal import Principal, user_state_cache
 
 logger = logging.getLogger(__name__)
 
 
+def _state_from_doc(doc):
+    return {
+        'email': doc.get('email'),
+        'role': doc.get('role', 'patient'),
+        'is_active': doc.get('is_active', True),
+    }
+
+
+def get_user_state(user_id):
+    """
+    Return cached {'email', 'role', 'is_active'} for a user, loading it on miss.
+
+    Returns None when the user does not exist. Misses fetch only the needed
+    fields as a raw dict, and results are kept for AUTH_USER_CACHE_TTL seconds.
+    """
+    state = user_state_cache.get(user_id)
+    if state is not None:
+        return state
+    
+    doc = User.objects(id=user_id).only('email', 'role', 'is_active').as_pymongo().first()
+    if not doc:
+        return None
+    
+    state = _state_from_doc(doc)
+    user_state_cache.set(user_id, state)
+    return state
+
+
+async def get_user_state_async(user_id):
+    """get_user_state for the ASGI path, loading misses through Motor"""
+    state = user_state_cache.get(user_id)
+    if state is not None:
+        return state
+    
+    from api.async_db import get_async_collection
+    doc = await get_async_collection(User).find_one(
+        {'_id': ObjectId(user_id)},
+        {'email': 1, 'role': 1, 'is_active': 1}
+    )
+    if not doc:
+        return None
+    
+    state = _state_from_doc(doc)
+    user_state_cache.set(user_id, state)
+    return state
+
+
+def get_bearer_token(request, keyword='Bearer'):
+    """Return the bearer token from the Authorization header, or None"""
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    
+    if not auth_header:
+        return None
+    
+    try:
+        auth_type, token = auth_header.split()
+    except ValueError:
+        raise AuthenticationFailed('Invalid token header. Token string should not contain spaces.')
+    
+    if auth_type.lower() != keyword.lower():
+        return None
+    return token
+
+
+def decode_token(token):
+    """Decode a JWT into its (user_id, email, role) claims"""
+    try:
+        payload = jwt.decode(
+            token,
+            settings.JWT_SECRET,
+            algorithms=[settings.JWT_ALGORITHM]
+        )
+    except jwt.ExpiredSignatureError:
+        raise AuthenticationFailed('Token has expired')
+    except jwt.InvalidTokenError as e:
+        logger.error(f'Invalid token: {str(e)}')
+        raise AuthenticationFailed('Invalid token')
+    
+    user_id = payload.get('user_id')
+    if not user_id:
+        raise AuthenticationFailed('Invalid token')
+    return user_id, payload.get('email'), payload.get('role')
+
+
+def build_principal(user_id, email, role, state):
+    """Combine token claims with cached account state, rejecting inactive users"""
+    if state is None:
+        raise AuthenticationFailed('User not found')
+    if not state['is_active']:
+        raise AuthenticationFailed('User account is inactive')
+    
+    return Principal(
+        user_id,
+        state.get('email', email),
+        state.get('role', role),
+        is_active=True,
+    )
+
+
 class JWTAuthentication(BaseAuthentication):
     """
     Custom JWT Authentication class
+
+    Authenticates to an api.principal.Principal built from the token claims
+    and cached account state, so views need not re-fetch the User.
     """
     keyword = 'Bearer'
     
     def authenticate(self, request):
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        
-        if not auth_header:
+        token = get_bearer_token(request, self.keyword)
+        if token is None:
             return None
         
         try:
-            auth_type, token = auth_header.split()
-        except ValueError:
-            raise AuthenticationFailed('Invalid token header. Token string should not contain spaces.')
-        
-        if auth_type.lower() != self.keyword.lower():
-            return None
-        
-        try:
-            payload = jwt.decode(
-                token,
-                settings.JWT_SECRET,
-                algorithms=[settings.JWT_ALGORITHM]
-            )
-            user_id = payload.get('user_id')
-            email = payload.get('email')
-            role = payload.get('role')
-            
-            if not user_id:
-                raise AuthenticationFailed('Invalid token')
-            
-            # Create a simple user object for the request
-            class User:
-                def __init__(self, user_id, email, role):
-                    self.id = user_id
-                    self.email = email
-                    self.role = role
-                    self.is_authenticated = True
-            
-            user = User(user_id, email, role)
+            user_id, email, role = decode_token(token)
+            user = build_principal(user_id, email, role, get_user_state(user_id))
             return (user, token)
         
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token has expired')
-        except jwt.InvalidTokenError as e:
-            logger.error(f'Invalid token: {str(e)}')
-            raise AuthenticationFailed('Invalid token')
+        except AuthenticationFailed:
+            raise
         except Exception as e:
             logger.error(f'Authentication error: {str(e)}')
             raise AuthenticationFailed('Authentication failed')
 
 
+async def authenticate_async(request, ticket_param=None):
+    """
+    JWTAuthentication.authenticate for async views.
+
+    Returns a Principal, or None when no bearer token was sent. ticket_param
+    also accepts a single-use stream ticket (api.stream_tickets) from that
+    query parameter, for clients such as EventSource that cannot set headers.
+    """
+    token = get_bearer_token(request, JWTAuthentication.keyword)
+    if token is None and ticket_param and request.GET.get(ticket_param):
+        from api.stream_tickets import redeem_async
+        user_id = await redeem_async(request.GET[ticket_param], timezone.now())
+        if user_id is None:
+            raise AuthenticationFailed('Invalid or expired ticket')
+        return build_principal(user_id, None, None, await get_user_state_async(user_id))
+    if token is None:
+        return None
+    
+    try:
+        user_id, email, role = decode_token(token)
+        return build_principal(user_id, email, role, await get_user_state_async(user_id))
+    except AuthenticationFailed:
+        raise
+    except Exception as e:
+        logger.error(f'Authentication error: {str(e)}')
+        raise AuthenticationFailed('Authentication failed')
+
+
 def generate_token(user_id: str, email: str, role: str) -> str:
     """
     Generate JWT token
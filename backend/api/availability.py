@@ -0,0 +1,112 @@
+"""
+Provider slot availability engine
+
+Expands ProviderProfile.available_hours into fixed-length slots and subtracts
+booked appointments using a sorted index of booking start times.
+
+available_hours maps weekday names to one or more comma separated ranges,
+e.g. {'Monday': '09:00-17:00', 'Saturday': '10:00-12:00,13:00-14:00'}.
+Times are interpreted in the project TIME_ZONE (UTC).
+"""
+from bisect import bisect_right
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from django.conf import settings
+from api.models import ACTIVE_APPOINTMENT_STATUSES, Appointment
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def _parse_clock(value: str) -> time:
+    hours, minutes = value.strip().split(':')
+    return time(int(hours), int(minutes))
+
+
+def parse_available_hours(available_hours):
+    """
+    Parse available_hours into {weekday index: [(start time, end time), ...]}.
+
+    Malformed entries are skipped rather than failing the whole schedule.
+    """
+    schedule = {}
+    for day, ranges in (available_hours or {}).items():
+        try:
+            weekday = WEEKDAYS.index(str(day).strip().lower())
+        except ValueError:
+            continue
+        if not isinstance(ranges, str):
+            continue
+        for part in ranges.split(','):
+            try:
+                start, end = (_parse_clock(p) for p in part.split('-'))
+            except ValueError:
+                continue
+            if start < end:
+                schedule.setdefault(weekday, []).append((start, end))
+    for intervals in schedule.values():
+        intervals.sort()
+    return schedule
+
+
+def expand_slots(schedule, range_start: datetime, range_end: datetime, slot_minutes: int):
+    """Yield (slot_start, slot_end) for every working slot inside [range_start, range_end)"""
+    slot = timedelta(minutes=slot_minutes)
+    day = range_start.astimezone(dt_timezone.utc).date()
+    last_day = range_end.astimezone(dt_timezone.utc).date()
+    while day <= last_day:
+        for start, end in schedule.get(day.weekday(), ()):
+            cursor = datetime.combine(day, start, tzinfo=dt_timezone.utc)
+            day_end = datetime.combine(day, end, tzinfo=dt_timezone.utc)
+            while cursor + slot <= day_end:
+                if cursor >= range_start and cursor + slot <= range_end:
+                    yield cursor, cursor + slot
+                cursor += slot
+        day += timedelta(days=1)
+
+
+def free_slots(schedule, booked_starts, range_start, range_end, slot_minutes):
+    """
+    Return free (start, end) slots in range.
+
+    booked_starts must be sorted ascending. A booking occupies
+    [start, start + slot) and blocks every slot it overlaps, so each slot
+    check is a single bisect over the index.
+    """
+    slot = timedelta(minutes=slot_minutes)
+    result = []
+    for start, end in expand_slots(schedule, range_start, range_end, slot_minutes):
+        i = bisect_right(booked_starts, start - slot)
+        if i < len(booked_starts) and booked_starts[i] < end:
+            continue
+        result.append((start, end))
+    return result
+
+
+def booked_starts(provider_id: str, range_start: datetime, range_end: datetime, slot_minutes: int):
+    """
+    Sorted start times of active bookings that can overlap the range.
+
+    Uses the (provider_id, status, appointment_date) index and projects only
+    appointment_date, so no Documents are built.
+    """
+    rows = (
+        Appointment.objects(
+            provider_id=provider_id,
+            status__in=ACTIVE_APPOINTMENT_STATUSES,
+            appointment_date__gt=range_start - timedelta(minutes=slot_minutes),
+            appointment_date__lt=range_end,
+        )
+        .only('appointment_date')
+        .order_by('+appointment_date')
+        .as_pymongo()
+    )
+    return [row['appointment_date'] for row in rows]
+
+
+def provider_availability(provider_id, available_hours, range_start, range_end, slot_minutes=None):
+    """Free slots for one provider between range_start and range_end"""
+    slot_minutes = slot_minutes or settings.APPOINTMENT_SLOT_MINUTES
+    schedule = parse_available_hours(available_hours)
+    if not schedule:
+        return []
+    booked = booked_starts(provider_id, range_start, range_end, slot_minutes)
+    return free_slots(schedule, booked, range_start, range_end, slot_minutes)
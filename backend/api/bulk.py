@@ -0,0 +1,142 @@
+"""
+Bulk appointment status changes (providers)
+
+All updates go to the server as one unordered bulk_write of per-appointment
+updates. Each filter includes the provider, so other providers' appointments
+are never touched, and one failing update does not stop the rest. Each
+appointment gets one of these results:
+
+    updated     status (and notes) changed
+    unchanged   it already had the target status
+    not_found   no such appointment for this provider
+    conflict    its slot was booked again after it was cancelled, or another
+                request changed it at the same time
+
+One read before the write fetches each appointment's status and date; that
+alone finds not_found and unchanged. Every update is conditional on the
+status it read, so the provider's daily rollups (api.rollups) move by exactly
+the transitions made. Only when an update misses because a concurrent request
+changed the appointment in between is it read again. Any other write error
+is raised, but only after the rollups for the updates that did apply are
+recorded.
+"""
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from api import rollups
+from api.models import ACTIVE_APPOINTMENT_STATUSES, Appointment
+
+DUPLICATE_KEY = 11000
+
+
+def parse_ids(ids):
+    """[(id, ObjectId or None)] in request order without duplicates"""
+    targets = []
+    for appointment_id in dict.fromkeys(ids):
+        try:
+            targets.append((appointment_id, ObjectId(appointment_id)))
+        except (InvalidId, TypeError):
+            targets.append((appointment_id, None))
+    return targets
+
+
+def select_range(provider_id, new_status, date_from, date_to, limit):
+    """
+    [(id, ObjectId)] of the provider's pending and confirmed appointments in
+    [date_from, date_to] that do not already have new_status, by date.
+    Returns at most `limit` of them.
+    """
+    query = {
+        'provider_id': provider_id,
+        'status': {'$in': [s for s in ACTIVE_APPOINTMENT_STATUSES if s != new_status]},
+        'appointment_date': {'$gte': date_from, '$lte': date_to},
+    }
+    cursor = (
+        Appointment._get_collection()
+        .find(query, {'_id': 1})
+        .sort([('appointment_date', 1), ('_id', 1)])
+        .limit(limit)
+    )
+    return [(str(doc['_id']), doc['_id']) for doc in cursor]
+
+
+def set_status(provider_id, targets, new_status, notes, now):
+    """
+    Set new_status (and notes, unless None) on targets from parse_ids or
+    select_range. Returns [{'id', 'result'}] in the order of targets.
+    """
+    collection = Appointment._get_collection()
+    # Stored with millisecond precision; truncate so reads compare equal
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    fields = {'status': new_status, 'updated_at': now}
+    if notes is not None:
+        fields['notes'] = notes
+
+    oids = list(dict.fromkeys(oid for _, oid in targets if oid is not None))
+    current = {
+        doc['_id']: doc
+        for doc in collection.find(
+            {'_id': {'$in': oids}, 'provider_id': provider_id},
+            {'status': 1, 'appointment_date': 1},
+        )
+    } if oids else {}
+    outcome = {oid: 'unchanged' for oid, doc in current.items() if doc['status'] == new_status}
+    pending = [oid for oid in oids if oid in current and oid not in outcome]
+
+    conflicts = set()
+    failed = set()
+    error = None
+    matched = 0
+    if pending:
+        requests = [
+            UpdateOne(
+                {'_id': oid, 'provider_id': provider_id, 'status': current[oid]['status']},
+                {'$set': fields},
+            )
+            for oid in pending
+        ]
+        try:
+            matched = collection.bulk_write(requests, ordered=False).matched_count
+        except BulkWriteError as e:
+            matched = e.details['nMatched']
+            for write_error in e.details['writeErrors']:
+                if write_error['code'] == DUPLICATE_KEY:
+                    conflicts.add(pending[write_error['index']])
+                else:
+                    failed.add(pending[write_error['index']])
+            if failed or e.details.get('writeConcernErrors'):
+                # The other updates were still applied; raised once their
+                # rollups are recorded
+                error = e
+
+    outcome.update((oid, 'conflict') for oid in conflicts)
+    if matched + len(conflicts) + len(failed) == len(pending):
+        outcome.update((oid, 'updated') for oid in pending if oid not in conflicts and oid not in failed)
+    else:
+        unresolved = [oid for oid in pending if oid not in conflicts and oid not in failed]
+        for doc in collection.find({'_id': {'$in': unresolved}}, {'status': 1, 'updated_at': 1}):
+            if doc['status'] != new_status:
+                # Changed again by a concurrent request
+                outcome[doc['_id']] = 'conflict'
+            elif doc['updated_at'].replace(tzinfo=None) == now.replace(tzinfo=None):
+                outcome[doc['_id']] = 'updated'
+            else:
+                outcome[doc['_id']] = 'unchanged'
+
+    rollups.record(
+        provider_id,
+        [
+            (current[oid]['appointment_date'], current[oid]['status'], new_status)
+            for oid, result in outcome.items()
+            if result == 'updated'
+        ],
+        now,
+    )
+    if error is not None:
+        raise error
+
+    return [
+        {'id': appointment_id, 'result': outcome.get(oid, 'not_found')}
+        for appointment_id, oid in targets
+    ]
@@ -0,0 +1,67 @@
+"""
+Conditional GET helpers (ETag / If-None-Match)
+
+Validators are computed before any response body is built, so a matching
+If-None-Match returns 304 without loading or serializing documents. List
+validators come from a count plus the newest updated_at, both answered from
+the (owner, updated_at) indexes without touching documents.
+"""
+import hashlib
+from django.http import HttpResponseNotModified
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts):
+    """Weak ETag over the given validator parts"""
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def _opaque(tag):
+    tag = tag.strip()
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+def etag_matches(request, etag):
+    """Weak comparison of etag against the request's If-None-Match header"""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(',')}
+
+
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    response['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def with_etag(response, etag):
+    """Attach the validator to a 200 response so clients can revalidate"""
+    response['ETag'] = etag
+    response['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def collection_validator(queryset, field='updated_at'):
+    """(count, newest field value) for a queryset, from index-only queries"""
+    count = queryset.count()
+    latest = (
+        queryset.order_by(f'-{field}')
+        .only(field)
+        .exclude('id')
+        .as_pymongo()
+        .first()
+    )
+    return count, latest.get(field) if latest else None
+
+
+async def collection_validator_async(collection, query, field='updated_at'):
+    """Motor counterpart of collection_validator"""
+    count = await collection.count_documents(query)
+    latest = await collection.find_one(query, {field: 1, '_id': 0}, sort=[(field, -1)])
+    return count, latest.get(field) if latest else None
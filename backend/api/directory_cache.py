@@ -0,0 +1,140 @@
+"""
+Versioned cache for the provider directory (list and detail responses)
+
+Entries live in the 'directory' cache alias and are keyed by a directory
+version that ProviderCreateView and ProviderUpdateView bump on every write,
+so a write makes every cached entry unreachable at once. Concurrent misses
+for the same key are coalesced: one caller rebuilds the entry while the
+others wait for it, instead of every request hitting Mongo.
+
+The list and detail views build their ETags from the same version, so a
+cache hit is a memory lookup with no Mongo round trip.
+
+With the default local-memory backend each worker process keeps its own
+copy and version counter. The counter then expires with the entries
+(PROVIDER_DIRECTORY_CACHE_TTL) and restarts from the clock, so a worker
+that did not see a write moves to a new version, and new ETags, within the
+TTL instead of answering 304 with stale data until it restarts. Point the
+alias at a shared backend (DIRECTORY_CACHE_LOCATION) to make invalidation
+immediate everywhere; the counter then never expires.
+"""
+import threading
+import time
+import zlib
+from django.conf import settings
+from django.core.cache import caches
+from api.models import ProviderProfile
+from api.queries import PROVIDER_PROFILE_MAPPER, fetch_records
+
+VERSION_KEY = 'providers:version'
+LIST_KEY = 'providers:list'
+DETAIL_KEY = 'providers:detail:{}'
+
+# How long a rebuild may hold the cross-process build lock, and how long
+# other processes wait for it before rebuilding themselves
+BUILD_LOCK_TIMEOUT = 10
+BUILD_WAIT = 2.0
+BUILD_POLL_INTERVAL = 0.01
+
+# Striped in-process locks; keys hash onto a fixed set so the table never grows
+_local_locks = [threading.Lock() for _ in range(64)]
+
+
+def _cache():
+    return caches['directory']
+
+
+def _local_lock(key):
+    return _local_locks[zlib.crc32(key.encode('utf-8')) % len(_local_locks)]
+
+
+def _version_timeout():
+    # Per-process counters must expire so workers converge (see above)
+    return None if settings.DIRECTORY_CACHE_LOCATION else settings.PROVIDER_DIRECTORY_CACHE_TTL
+
+
+def _new_version():
+    # Never repeats an earlier value, so a restarted counter never revives
+    # old ETags or entries
+    return int(time.time() * 1000)
+
+
+def directory_version():
+    """Current directory version, started from the clock on first use"""
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_version(), timeout=_version_timeout())
+        version = cache.get(VERSION_KEY) or _new_version()
+    return version
+
+
+def bump_directory_version():
+    """Invalidate every cached directory entry; call after any provider write"""
+    cache = _cache()
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        # Key evicted or never set; any value other than the old one will do
+        version = _new_version()
+        cache.set(VERSION_KEY, version, timeout=_version_timeout())
+        return version
+
+
+def get_or_build(key, build, version=None):
+    """
+    Return the cached value for key at `version` (default: the current
+    directory version), building it with build() on a miss.
+
+    Only one thread per process rebuilds a given key, and with a shared
+    backend only one process holds the build lock at a time. None results
+    are returned but not cached.
+    """
+    cache = _cache()
+    version = version or directory_version()
+    value = cache.get(key, version=version)
+    if value is not None:
+        return value
+
+    with _local_lock(key):
+        value = cache.get(key, version=version)
+        if value is not None:
+            return value
+
+        lock_key = f'{key}:building'
+        locked = cache.add(lock_key, 1, timeout=BUILD_LOCK_TIMEOUT, version=version)
+        if not locked:
+            # Another process is rebuilding; wait briefly for its result
+            deadline = time.monotonic() + BUILD_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(BUILD_POLL_INTERVAL)
+                value = cache.get(key, version=version)
+                if value is not None:
+                    return value
+
+        try:
+            value = build()
+            if value is not None:
+                cache.set(key, value, timeout=settings.PROVIDER_DIRECTORY_CACHE_TTL, version=version)
+        finally:
+            if locked:
+                cache.delete(lock_key, version=version)
+    return value
+
+
+def provider_directory(version=None):
+    """All provider profiles as response dicts, at `version` (see get_or_build)"""
+    return get_or_build(
+        LIST_KEY,
+        lambda: fetch_records(ProviderProfile.objects(), PROVIDER_PROFILE_MAPPER),
+        version
+    )
+
+
+def provider_entry(provider_id, version=None):
+    """One provider profile as a response dict, or None if it does not exist"""
+    def build():
+        rows = fetch_records(ProviderProfile.objects(user_id=provider_id).limit(1), PROVIDER_PROFILE_MAPPER)
+        return rows[0] if rows else None
+
+    return get_or_build(DETAIL_KEY.format(provider_id), build, version)
@@ -0,0 +1,132 @@
+"""
+Appointment change events for Server-Sent Events subscribers
+
+One MongoDB change stream per process watches the appointments collection
+and fans each change out, through an in-memory topic map keyed by user id,
+to the patient's and provider's open streams. Event ids are change tokens
+(see api.pagination.changes_since), so a reconnecting client's Last-Event-ID
+is replayed from the collection before live events resume.
+
+Change streams need a replica set; a single-node one is enough locally.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+from collections import defaultdict
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from api.async_db import get_async_collection
+from api.models import Appointment
+from api.pagination import encode_cursor
+from api.queries import APPOINTMENT_MAPPER
+
+logger = logging.getLogger(__name__)
+
+_PIPELINE = [{'$match': {'operationType': {'$in': ['insert', 'update', 'replace']}}}]
+
+
+def format_event(event_id, event_type, data):
+    """Serialize one SSE message"""
+    return f'id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+def record_event(record, created=False):
+    """SSE message for a mapped appointment record (see APPOINTMENT_MAPPER)"""
+    event_id = encode_cursor(parse_datetime(record['updated_at']), record['id'])
+    if record['status'] == 'cancelled':
+        return format_event(event_id, 'cancelled', {'id': record['id'], 'updated_at': record['updated_at']})
+    return format_event(event_id, 'created' if created else 'updated', {'appointment': record})
+
+
+class Subscription:
+    """Bounded queue of formatted events for one open stream"""
+
+    def __init__(self, topic, queue_size):
+        self.topic = topic
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def push(self, message):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow consumer: end its stream; it reconnects with Last-Event-ID
+            # and the missed events are replayed from the collection
+            logger.warning(f'Dropping slow event subscriber for {self.topic}')
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class AppointmentEventHub:
+    """
+    Shared change stream and topic map for this process.
+
+    The stream starts with the first subscriber and stops with the last. If
+    it fails, every subscriber is closed so clients reconnect and replay.
+    """
+
+    def __init__(self):
+        self._topics = defaultdict(set)
+        self._task = None
+
+    def subscribe(self, topic):
+        subscription = Subscription(topic, settings.SSE_QUEUE_SIZE)
+        self._topics[topic].add(subscription)
+        if self._task is None or self._task.done():
+            # Started from whichever request subscribes first, but serves
+            # them all: an empty context keeps that request's contextvars
+            # (e.g. its RequestDBStats) from collecting the stream's commands
+            self._task = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscriptions = self._topics.get(subscription.topic)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._topics[subscription.topic]
+        subscription.close()
+        if not self._topics and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def publish(self, change):
+        doc = change.get('fullDocument')
+        if not doc:
+            return
+        topics = {doc.get('patient_id'), doc.get('provider_id')}
+        targets = [s for topic in topics for s in self._topics.get(topic, ())]
+        if not targets:
+            return
+        message = record_event(APPOINTMENT_MAPPER(doc), created=change['operationType'] == 'insert')
+        for subscription in targets:
+            subscription.push(message)
+
+    async def _run(self):
+        try:
+            async with get_async_collection(Appointment).watch(
+                _PIPELINE, full_document='updateLookup'
+            ) as stream:
+                async for change in stream:
+                    self.publish(change)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f'Appointment change stream error: {str(e)}')
+        for subscriptions in list(self._topics.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+        self._topics.clear()
+
+
+appointment_events = AppointmentEventHub()
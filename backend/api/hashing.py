@@ -0,0 +1,80 @@
+"""
+Password hashing on a bounded bcrypt worker pool
+
+bcrypt releases the GIL, so running it on a small dedicated pool caps how
+much CPU a burst of logins can take from other requests in the same worker.
+When every pool slot and queue slot is taken, callers fail fast with
+PasswordHasherBusy instead of piling up behind the queue.
+"""
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from django.conf import settings
+
+_BCRYPT_COST_RE = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool and its queue are full"""
+
+
+class BcryptPool:
+    """ThreadPoolExecutor with a hard cap on running + queued jobs"""
+
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy('Password hashing pool is saturated')
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = settings.BCRYPT_POOL_WORKERS or os.cpu_count() or 1
+                _pool = BcryptPool(workers, settings.BCRYPT_POOL_QUEUE_SIZE)
+    return _pool
+
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def hash_password(password: str, rounds: int = None) -> str:
+    """Hash a password on the pool with the configured (or given) work factor"""
+    rounds = rounds or settings.BCRYPT_ROUNDS
+    return get_pool().run(_hashpw, password.encode('utf-8'), rounds).decode('utf-8')
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """Check a password against a bcrypt hash on the pool"""
+    return get_pool().run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def hash_cost(password_hash: str):
+    """Work factor encoded in a bcrypt hash, or None if unrecognised"""
+    match = _BCRYPT_COST_RE.match(password_hash or '')
+    return int(match.group(1)) if match else None
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True when the stored hash was made with a different work factor"""
+    return hash_cost(password_hash) != settings.BCRYPT_ROUNDS
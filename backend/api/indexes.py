@@ -0,0 +1,190 @@
+"""
+Declared vs actual MongoDB indexes
+
+Declared indexes are MongoEngine's index specs for each Document
+(meta['indexes'] plus unique fields); actual ones come from the server's
+index_information(). IndexPlan lists what is missing, what exists without
+being declared, and declared indexes that only repeat the prefix of another
+declared index. Used by `manage.py indexes`.
+"""
+import json
+from pymongo.errors import OperationFailure
+
+DUPLICATE_KEY = 11000
+
+# Options that change what an index is; anything else (v, ns, background)
+# is build metadata and ignored when comparing
+_OPTIONS = ('unique', 'sparse', 'partialFilterExpression', 'expireAfterSeconds')
+
+
+def _direction(value):
+    return int(value) if isinstance(value, (int, float)) else value
+
+
+class IndexBuildError(RuntimeError):
+    """Raised when existing documents violate a declared unique index"""
+
+
+class IndexSpec:
+    """One index: ordered keys, identity options and (if known) its name"""
+
+    __slots__ = ('keys', 'options', 'name')
+
+    def __init__(self, keys, options, name=None):
+        self.keys = tuple((field, _direction(direction)) for field, direction in keys)
+        self.options = {key: options[key] for key in _OPTIONS if options.get(key)}
+        self.name = name
+
+    @classmethod
+    def declared(cls, spec):
+        return cls(spec['fields'], spec, spec.get('name'))
+
+    @classmethod
+    def actual(cls, name, info):
+        return cls(info['key'], info, name)
+
+    @property
+    def signature(self):
+        return (self.keys, json.dumps(self.options, sort_keys=True, default=str))
+
+    def is_prefix_of(self, other):
+        """True when other can serve every query this index serves"""
+        return (
+            not self.options
+            and not other.options.get('partialFilterExpression')
+            and not other.options.get('sparse')
+            and len(self.keys) < len(other.keys)
+            and other.keys[:len(self.keys)] == self.keys
+        )
+
+    def create_kwargs(self):
+        kwargs = dict(self.options, background=True)
+        if self.name:
+            kwargs['name'] = self.name
+        return kwargs
+
+    def __str__(self):
+        keys = ', '.join(field if direction == 1 else f'{field}:{direction}' for field, direction in self.keys)
+        options = ' '.join(sorted(self.options))
+        label = f'({keys})' + (f' {options}' if options else '')
+        return f'{self.name} {label}' if self.name else label
+
+
+class IndexPlan:
+    """Differences between one Document's declared and actual indexes"""
+
+    def __init__(self, document):
+        self.document = document
+        self.collection = document._get_collection_name()
+        self.declared = [IndexSpec.declared(spec) for spec in document._meta.get('index_specs', [])]
+        self.actual = []
+        self.usage = {}
+
+    def load(self, db):
+        """Read the collection's indexes and, where permitted, their usage counters"""
+        collection = db[self.collection]
+        self.actual = [
+            IndexSpec.actual(name, info)
+            for name, info in collection.index_information().items()
+            if name != '_id_'
+        ]
+        try:
+            self.usage = {
+                row['name']: row['accesses']['ops']
+                for row in collection.aggregate([{'$indexStats': {}}])
+            }
+        except Exception:
+            self.usage = {}
+        return self
+
+    def ops(self, spec):
+        """Operations the existing index matching spec served since the server started"""
+        for actual in self.actual:
+            if actual.signature == spec.signature:
+                return self.usage.get(actual.name)
+        return None
+
+    @property
+    def missing(self):
+        present = {spec.signature for spec in self.actual}
+        return [spec for spec in self.declared if spec.signature not in present]
+
+    @property
+    def extra(self):
+        declared = {spec.signature for spec in self.declared}
+        return [spec for spec in self.actual if spec.signature not in declared]
+
+    @property
+    def redundant(self):
+        """Declared indexes covered by a longer declared index"""
+        return [
+            spec for spec in self.declared
+            if any(spec.is_prefix_of(other) for other in self.declared)
+        ]
+
+    @property
+    def superseded(self):
+        """Undeclared indexes a declared index covers, e.g. single-field indexes replaced by compound ones"""
+        return [
+            spec for spec in self.extra
+            if any(spec.is_prefix_of(other) for other in self.declared)
+        ]
+
+    def apply(self, db, log=print, drop_extra=False):
+        """
+        Build missing indexes in the background and drop superseded ones.
+        Other undeclared indexes (added by hand, or used by another service)
+        are only dropped with drop_extra.
+        """
+        collection = db[self.collection]
+        missing, extra = self.missing, self.extra
+        # An index whose keys or name a missing one reuses (changed options)
+        # has to go first; the rest are dropped once replacements exist
+        taken = {spec.keys for spec in missing} | {spec.name for spec in missing if spec.name}
+        conflicting = [spec for spec in extra if spec.keys in taken or spec.name in taken]
+        for spec in conflicting:
+            log(f'  drop {self.collection}.{spec}')
+            collection.drop_index(spec.name)
+        for spec in missing:
+            log(f'  create {self.collection}.{spec}')
+            collection.create_index(list(spec.keys), **spec.create_kwargs())
+        droppable = extra if drop_extra else self.superseded
+        for spec in droppable:
+            if spec not in conflicting:
+                log(f'  drop {self.collection}.{spec}')
+                collection.drop_index(spec.name)
+
+
+def document_classes():
+    """Every concrete Document registered with MongoEngine"""
+    from mongoengine.base.common import _document_registry
+    return sorted(
+        (document for document in _document_registry.values() if not document._meta.get('abstract')),
+        key=lambda document: document._get_collection_name(),
+    )
+
+
+def ensure_all():
+    """
+    Build every declared index now. A unique index the data violates raises
+    IndexBuildError instead of leaving the collection silently unprotected:
+    MongoEngine's automatic build only fails the first request that binds the
+    collection, then serves later requests without the index.
+    """
+    for document in document_classes():
+        try:
+            document.ensure_indexes()
+        except OperationFailure as e:
+            if e.code != DUPLICATE_KEY:
+                raise
+            # Unbind so the next use retries the build rather than skipping it
+            document._collection = None
+            hint = (
+                ' Run `manage.py resolve_slot_conflicts --resolve`.'
+                if document._get_collection_name() == 'appointments' else ''
+            )
+            reason = (e.details or {}).get('errmsg', str(e))
+            raise IndexBuildError(
+                f'Cannot build a unique index on {document._get_collection_name()}: '
+                f'existing documents violate it ({reason}).{hint}'
+            )
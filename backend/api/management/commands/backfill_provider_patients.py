@@ -0,0 +1,48 @@
+"""
+Copy legacy ProviderProfile.patients arrays into the provider_patients collection
+"""
+from datetime import datetime
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+from api.models import ProviderPatient, ProviderProfile
+
+
+class Command(BaseCommand):
+    help = 'Backfill provider_patients from ProviderProfile.patients arrays'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--drop-legacy',
+            action='store_true',
+            help='Unset ProviderProfile.patients once copied',
+        )
+
+    def handle(self, *args, **options):
+        ProviderPatient.ensure_indexes()
+        links = ProviderPatient._get_collection()
+        profiles = ProviderProfile._get_collection()
+        batch_size = options['batch_size']
+        now = datetime.utcnow()
+
+        batch = []
+        copied = 0
+        cursor = profiles.find({'patients.0': {'$exists': True}}, {'user_id': 1, 'patients': 1})
+        for profile in cursor:
+            for patient_id in profile['patients']:
+                batch.append(UpdateOne(
+                    {'provider_id': profile['user_id'], 'patient_id': patient_id},
+                    {'$setOnInsert': {'created_at': now}},
+                    upsert=True,
+                ))
+                if len(batch) >= batch_size:
+                    copied += links.bulk_write(batch, ordered=False).upserted_count
+                    batch = []
+        if batch:
+            copied += links.bulk_write(batch, ordered=False).upserted_count
+
+        self.stdout.write(self.style.SUCCESS(f'Created {copied} provider-patient links'))
+
+        if options['drop_legacy']:
+            result = profiles.update_many({'patients': {'$exists': True}}, {'$unset': {'patients': ''}})
+            self.stdout.write(f'Removed legacy patients array from {result.modified_count} profiles')
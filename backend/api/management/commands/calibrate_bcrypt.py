@@ -0,0 +1,48 @@
+"""
+Pick a bcrypt work factor for this host
+"""
+import statistics
+import time
+import bcrypt
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Measure bcrypt cost factors and recommend BCRYPT_ROUNDS for a target time per hash'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=250.0,
+                            help='target milliseconds per hash (default 250)')
+        parser.add_argument('--min-rounds', type=int, default=10)
+        parser.add_argument('--max-rounds', type=int, default=16)
+        parser.add_argument('--samples', type=int, default=3)
+
+    def handle(self, *args, **options):
+        target = options['target_ms']
+        password = b'calibration-password'
+        chosen = options['min_rounds']
+
+        for rounds in range(options['min_rounds'], options['max_rounds'] + 1):
+            salt = bcrypt.gensalt(rounds=rounds)
+            timings = []
+            for _ in range(options['samples']):
+                started = time.perf_counter()
+                bcrypt.hashpw(password, salt)
+                timings.append((time.perf_counter() - started) * 1000)
+            median = statistics.median(timings)
+            self.stdout.write(f'  rounds={rounds:<3} {median:8.1f} ms/hash')
+
+            if median <= target:
+                chosen = rounds
+            else:
+                break
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Recommended BCRYPT_ROUNDS={chosen} for a {target:.0f} ms target '
+            f'(currently {settings.BCRYPT_ROUNDS})'
+        ))
+        if chosen != settings.BCRYPT_ROUNDS:
+            self.stdout.write(
+                'Set it in the environment; existing hashes are upgraded on next login.'
+            )
@@ -0,0 +1,109 @@
+"""
+Compare declared and actual MongoDB indexes, apply the difference, audit query plans
+"""
+import os
+from django.core.management.base import BaseCommand, CommandError
+from mongoengine.connection import get_db
+from pymongo.errors import OperationFailure
+from api.indexes import DUPLICATE_KEY, IndexPlan, document_classes
+
+
+class Command(BaseCommand):
+    help = (
+        'Diff the indexes declared in api/models.py against the database. '
+        '--apply builds missing indexes in the background and drops undeclared ones a '
+        'declared index covers (--drop-extra: every undeclared one); '
+        '--audit explains every route\'s queries against a throwaway seeded database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apply', action='store_true',
+                            help='create missing indexes and drop undeclared ones a declared index covers')
+        parser.add_argument('--drop-extra', action='store_true',
+                            help='with --apply, also drop undeclared indexes no declared index covers')
+        parser.add_argument('--audit', action='store_true',
+                            help='seed a throwaway database and explain every route\'s queries')
+        parser.add_argument('--max-ratio', type=float, default=10.0,
+                            help='audit: fail when a query examines more than this many '
+                                 'documents per document returned (default 10)')
+        parser.add_argument('--appointments', type=int, default=20000,
+                            help='audit: seeded appointments (default 20000)')
+        parser.add_argument('--keep', action='store_true',
+                            help='audit: keep the seeded database afterwards')
+
+    def handle(self, *args, **options):
+        if options['audit']:
+            return self.audit(options)
+
+        db = get_db()
+        changes = 0
+        for document in document_classes():
+            plan = IndexPlan(document).load(db)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{plan.collection}'))
+            missing = plan.missing
+            for spec in plan.declared:
+                ops = plan.ops(spec)
+                self.stdout.write(
+                    f'  {"missing" if spec in missing else "ok":8} {spec}'
+                    + (f'  ({ops} ops since restart)' if ops is not None else '')
+                )
+            superseded = plan.superseded
+            for spec in plan.extra:
+                self.stdout.write(self.style.WARNING(
+                    f'  extra    {spec}  '
+                    + ('(covered by a declared index; dropped by --apply)' if spec in superseded
+                       else '(not declared; dropped only by --apply --drop-extra)')
+                ))
+            for spec in plan.redundant:
+                self.stdout.write(self.style.WARNING(
+                    f'  redundant {spec}  (prefix of another declared index; remove it from meta)'
+                ))
+            changes += len(plan.missing) + len(plan.extra if options['drop_extra'] else superseded)
+            if options['apply']:
+                try:
+                    plan.apply(db, log=self.stdout.write, drop_extra=options['drop_extra'])
+                except OperationFailure as e:
+                    if e.code != DUPLICATE_KEY:
+                        raise
+                    raise CommandError(
+                        f'{plan.collection}: existing documents violate a unique index '
+                        f'({(e.details or {}).get("errmsg", str(e))}); for appointments run '
+                        f'`manage.py resolve_slot_conflicts --resolve` first'
+                    )
+
+        if not changes:
+            self.stdout.write(self.style.SUCCESS('Indexes match the declarations'))
+        elif not options['apply']:
+            self.stdout.write(f'{changes} change(s) pending; run with --apply')
+
+    def audit(self, options):
+        from django.test.utils import setup_test_environment, teardown_test_environment
+        from api.query_audit import QueryAudit
+
+        audit = QueryAudit(
+            f'healthcare_audit_{os.getpid()}',
+            appointments=options['appointments'],
+            max_ratio=options['max_ratio'],
+            log=self.stdout.write,
+        )
+        setup_test_environment()
+        audit.connect()
+        try:
+            audit.seed()
+            uncovered = audit.run()
+        finally:
+            if not options['keep']:
+                audit.drop()
+            teardown_test_environment()
+
+        if uncovered:
+            self.stdout.write(self.style.WARNING(f'Routes not exercised: {", ".join(uncovered)}'))
+        failures = audit.failures
+        if failures:
+            raise CommandError(
+                f'{len(failures)} of {len(audit.findings)} queries failed the plan audit: '
+                + '; '.join(f'{finding.route}: {finding.description}' for finding in failures)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(audit.findings)} queries across {len(audit.covered)} routes use indexes'
+        ))
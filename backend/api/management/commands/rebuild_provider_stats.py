@@ -0,0 +1,37 @@
+"""
+Rebuild provider daily rollups (provider_daily_stats) from the appointments
+"""
+from django.core.management.base import BaseCommand
+from api import rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute provider_daily_stats from appointments with an aggregation pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--provider', help='Only this provider (user id)')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Report rollups that disagree with the appointments without writing',
+        )
+        parser.add_argument('--show', type=int, default=20, help='Differences to list with --check')
+
+    def handle(self, *args, **options):
+        provider_id = options['provider']
+
+        if options['check']:
+            differences = rollups.drift(provider_id)
+            for provider, day, stored, actual in differences[:options['show']]:
+                self.stdout.write(f'{provider} {day.date().isoformat()}: stored {stored}, actual {actual}')
+            if differences:
+                self.stdout.write(self.style.WARNING(f'{len(differences)} day(s) out of date'))
+            else:
+                self.stdout.write(self.style.SUCCESS('Rollups match the appointments'))
+            return
+
+        deleted = rollups.rebuild(provider_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt provider stats{f" for {provider_id}" if provider_id else ""}; '
+            f'removed {deleted} stale day(s)'
+        ))
@@ -0,0 +1,49 @@
+"""
+Find and cancel duplicate active bookings so provider_active_slot_unique can be built
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api import slot_conflicts
+from api.indexes import IndexBuildError, ensure_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Report provider slots with more than one pending or confirmed appointment. '
+        '--resolve keeps the confirmed (else earliest booked) one, cancels the rest '
+        'and builds the unique slot index.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--provider', help='Only this provider (user id)')
+        parser.add_argument('--resolve', action='store_true',
+                            help='cancel all but one booking per slot, then build the indexes')
+        parser.add_argument('--show', type=int, default=20, help='Slots to list')
+
+    def handle(self, *args, **options):
+        conflicts = slot_conflicts.find(options['provider'])
+        for conflict in conflicts[:options['show']]:
+            kept, *cancelled = conflict['appointments']
+            cancel = ', '.join(f'{row["_id"]} ({row["status"]})' for row in cancelled)
+            self.stdout.write(
+                f'{conflict["provider_id"]} {conflict["appointment_date"].isoformat()}: '
+                f'keep {kept["_id"]} ({kept["status"]}), cancel {cancel}'
+            )
+        extra = sum(len(conflict['appointments']) - 1 for conflict in conflicts)
+
+        if not options['resolve']:
+            if conflicts:
+                self.stdout.write(self.style.WARNING(
+                    f'{len(conflicts)} slot(s) double booked, {extra} booking(s) to cancel; run with --resolve'
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS('No double-booked slots'))
+            return
+
+        cancelled = slot_conflicts.resolve(conflicts, timezone.now())
+        self.stdout.write(f'Cancelled {cancelled} of {extra} duplicate booking(s)')
+        try:
+            ensure_all()
+        except IndexBuildError as e:
+            raise CommandError(f'{e} (bookings changed while resolving; run again)')
+        self.stdout.write(self.style.SUCCESS('Indexes built'))
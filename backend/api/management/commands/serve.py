@@ -0,0 +1,85 @@
+"""
+Run the API under gunicorn with a preloaded, warmed-up application
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve the API with gunicorn: app preloaded in the master, workers sized '
+        'from the CPU count and warmed up before they accept connections. '
+        'ASYNC_API=True serves healthcare.asgi with uvicorn workers.'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default=settings.SERVE_BIND,
+                            help=f'address to listen on (default {settings.SERVE_BIND})')
+        parser.add_argument('--workers', type=int, default=settings.SERVE_WORKERS,
+                            help='worker processes (default: derived from CPU count)')
+        parser.add_argument('--threads', type=int, default=settings.SERVE_THREADS,
+                            help='threads per WSGI worker (default: derived from CPU count)')
+        parser.add_argument('--timeout', type=int, default=settings.SERVE_TIMEOUT)
+        parser.add_argument('--graceful-timeout', type=int, default=settings.SERVE_GRACEFUL_TIMEOUT,
+                            help='seconds in-flight requests get on shutdown or reload')
+        parser.add_argument('--max-requests', type=int, default=settings.SERVE_MAX_REQUESTS,
+                            help='recycle a worker after this many requests (0 = never)')
+        parser.add_argument('--pid', default=None, help='write the master pid to this file')
+
+    def handle(self, *args, **options):
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            raise CommandError('gunicorn is not installed (pip install -r requirements.txt)')
+
+        asgi = settings.ASYNC_API
+        cpus = warmup.cpu_count()
+        auto_workers, auto_threads = warmup.auto_size(cpus, asgi)
+        workers = options['workers'] or auto_workers
+        threads = 1 if asgi else options['threads'] or auto_threads
+        if settings.METRICS_ENABLED and workers > settings.METRICS_MAX_PROCESSES:
+            raise CommandError(
+                f'{workers} workers exceed METRICS_MAX_PROCESSES={settings.METRICS_MAX_PROCESSES}'
+            )
+
+        config = {
+            'bind': options['bind'],
+            'workers': workers,
+            'threads': threads,
+            'worker_class': 'uvicorn.workers.UvicornWorker' if asgi else 'gthread',
+            'preload_app': True,
+            'timeout': options['timeout'],
+            'graceful_timeout': options['graceful_timeout'],
+            'keepalive': 5,
+            'max_requests': options['max_requests'],
+            'max_requests_jitter': options['max_requests'] // 10,
+            'pidfile': options['pid'],
+            'accesslog': '-',
+            'errorlog': '-',
+            'post_fork': lambda server, worker: warmup.warm_worker(threads),
+            'worker_exit': lambda server, worker: warmup.close_worker(),
+        }
+
+        def load():
+            if asgi:
+                from healthcare.asgi import application
+            else:
+                from healthcare.wsgi import application
+            warmup.preload()
+            return application
+
+        class Server(BaseApplication):
+            def load_config(self):
+                for key, value in config.items():
+                    self.cfg.set(key, value)
+
+            def load(self):
+                return load()
+
+        self.stdout.write(
+            f'Serving {"ASGI" if asgi else "WSGI"} on {options["bind"]}: '
+            f'{workers} workers x {threads} threads ({cpus} CPUs)'
+        )
+        Server().run()
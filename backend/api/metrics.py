@@ -0,0 +1,216 @@
+"""
+Multi-process request metrics in a shared memory-mapped file
+
+Every worker process owns one slot in METRICS_DIR/metrics-<layout>.db and
+records per-route latency histograms, status-class counters and Mongo time
+(commands, command time, connection pool wait) into it. /api/metrics/ sums
+all slots and renders them in Prometheus text format, so any worker can
+answer for the whole server.
+
+Recording touches only preallocated offsets in the process's own slot under
+a process-local lock, so workers never contend with each other. Slots of
+exited workers are reused without being cleared, keeping counters monotonic.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from django.conf import settings
+
+# Latency histogram upper bounds in seconds (+Inf is implicit)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATUS_CLASSES = ('1xx', '2xx', '3xx', '4xx', '5xx')
+
+# Per-route value offsets: buckets (+Inf last), then scalar series
+_BUCKET_COUNT = len(BUCKETS) + 1
+_SUM = _BUCKET_COUNT
+_COUNT = _SUM + 1
+_STATUS = _COUNT + 1
+_DB_COMMANDS = _STATUS + len(STATUS_CLASSES)
+_DB_SECONDS = _DB_COMMANDS + 1
+_POOL_WAIT_SECONDS = _DB_SECONDS + 1
+_ROUTE_WIDTH = _POOL_WAIT_SECONDS + 1
+
+_MAGIC = b'HLMETRC1'
+_HEADER = 64
+_PID_WIDTH = 1
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+def _route_names(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from _route_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+class MetricsRegistry:
+    """Per-process view of the shared metrics file"""
+
+    def __init__(self, routes, directory, max_processes):
+        self.routes = tuple(sorted(set(routes) | {UNMATCHED_ROUTE}))
+        self._route_index = {name: i for i, name in enumerate(self.routes)}
+        self.max_processes = max_processes
+        self.slot_width = _PID_WIDTH + len(self.routes) * _ROUTE_WIDTH
+        layout = repr((self.routes, BUCKETS, STATUS_CLASSES, _ROUTE_WIDTH, max_processes))
+        self.layout_id = hashlib.sha1(layout.encode('utf-8')).hexdigest()[:12]
+        self.path = Path(directory) / f'metrics-{self.layout_id}.db'
+        self.size = _HEADER + max_processes * self.slot_width * 8
+        self._lock = threading.Lock()
+        self._pid = None
+        self._mmap = None
+        self._values = None
+        self._slot = None
+
+    def _locked(self, fn):
+        """Run fn(fd) holding an exclusive flock on a fresh descriptor"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                return fn(fd)
+            finally:
+                # mmap keeps a duplicate of fd, which would otherwise hold the lock
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _map(self, fd):
+        if os.fstat(fd).st_size != self.size:
+            os.ftruncate(fd, self.size)
+            os.pwrite(fd, _MAGIC, 0)
+        mm = mmap.mmap(fd, self.size)
+        return mm, memoryview(mm).cast('d')
+
+    def _claim_slot(self, fd):
+        """Own slot for this pid: a free one, else one whose process exited"""
+        values = self._values
+        pid = os.getpid()
+        reusable = None
+        for slot in range(self.max_processes):
+            start = _HEADER // 8 + slot * self.slot_width
+            owner = int(values[start])
+            if owner == pid or owner == 0:
+                reusable = start
+                break
+            if reusable is None and not _alive(owner):
+                reusable = start
+        if reusable is None:
+            raise RuntimeError(f'No free metrics slot (METRICS_MAX_PROCESSES={self.max_processes})')
+        values[reusable] = pid
+        return reusable + _PID_WIDTH
+
+    def _attach(self):
+        """Map the file once; claim a slot at start-up and again after fork"""
+        if self._mmap is None:
+            self._mmap, self._values = self._locked(self._map)
+        self._slot = self._locked(self._claim_slot)
+        self._pid = os.getpid()
+
+    def observe(self, route, status_code, seconds, db_commands=0, db_seconds=0.0, pool_wait_seconds=0.0):
+        """Record one finished request"""
+        index = self._route_index.get(route)
+        if index is None:
+            index = self._route_index[UNMATCHED_ROUTE]
+        with self._lock:
+            if self._pid != os.getpid():
+                self._attach()
+            values = self._values
+            base = self._slot + index * _ROUTE_WIDTH
+            values[base + bisect_left(BUCKETS, seconds)] += 1
+            values[base + _SUM] += seconds
+            values[base + _COUNT] += 1
+            status_class = status_code // 100 - 1
+            if 0 <= status_class < len(STATUS_CLASSES):
+                values[base + _STATUS + status_class] += 1
+            values[base + _DB_COMMANDS] += db_commands
+            values[base + _DB_SECONDS] += db_seconds
+            values[base + _POOL_WAIT_SECONDS] += pool_wait_seconds
+
+    def totals(self):
+        """Per-route values summed over every slot in the file"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._attach()
+            values = self._values
+            totals = [0.0] * (len(self.routes) * _ROUTE_WIDTH)
+            for slot in range(self.max_processes):
+                start = _HEADER // 8 + slot * self.slot_width
+                if not values[start]:
+                    continue
+                start += _PID_WIDTH
+                for i in range(len(totals)):
+                    totals[i] += values[start + i]
+        return {
+            route: totals[i * _ROUTE_WIDTH:(i + 1) * _ROUTE_WIDTH]
+            for i, route in enumerate(self.routes)
+        }
+
+    def render(self):
+        """Prometheus text exposition of totals()"""
+        lines = [
+            '# HELP healthlink_request_duration_seconds Request latency by route',
+            '# TYPE healthlink_request_duration_seconds histogram',
+        ]
+        routes = [(route, row) for route, row in self.totals().items() if row[_COUNT]]
+        for route, row in routes:
+            cumulative = 0
+            for i, bound in enumerate(BUCKETS + (float('inf'),)):
+                cumulative += row[i]
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'healthlink_request_duration_seconds_bucket{{route="{route}",le="{le}"}} {cumulative:.0f}')
+            lines.append(f'healthlink_request_duration_seconds_sum{{route="{route}"}} {row[_SUM]:.6f}')
+            lines.append(f'healthlink_request_duration_seconds_count{{route="{route}"}} {row[_COUNT]:.0f}')
+
+        for name, help_text, offset, fmt in (
+            ('healthlink_mongo_commands_total', 'Mongo commands issued', _DB_COMMANDS, '.0f'),
+            ('healthlink_mongo_command_seconds_total', 'Time spent in Mongo commands', _DB_SECONDS, '.6f'),
+            ('healthlink_mongo_pool_wait_seconds_total', 'Time waiting for a pooled Mongo connection', _POOL_WAIT_SECONDS, '.6f'),
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for route, row in routes:
+                lines.append(f'{name}{{route="{route}"}} {row[offset]:{fmt}}')
+
+        lines.append('# HELP healthlink_requests_total Requests by route and status class')
+        lines.append('# TYPE healthlink_requests_total counter')
+        for route, row in routes:
+            for i, status_class in enumerate(STATUS_CLASSES):
+                if row[_STATUS + i]:
+                    lines.append(f'healthlink_requests_total{{route="{route}",status="{status_class}"}} {row[_STATUS + i]:.0f}')
+        return '\n'.join(lines) + '\n'
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Process-wide registry over every named route in ROOT_URLCONF"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from django.urls import get_resolver
+                _registry = MetricsRegistry(
+                    _route_names(get_resolver().url_patterns),
+                    settings.METRICS_DIR,
+                    settings.METRICS_MAX_PROCESSES,
+                )
+    return _registry
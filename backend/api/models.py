@@ -3,7 +3,11 @@ MongoDB models using MongoEngine
 """
 from mongoengine import Document, StringField, BooleanField, DateTimeField, DictField, ListField, EmailField
 from datetime import datetime
-import bcrypt
+from api.hashing import hash_password, needs_rehash, verify_password
+from api.principal import user_state_cache
+
+# Appointment statuses that occupy a provider's time slot
+ACTIVE_APPOINTMENT_STATUSES = ['pending', 'confirmed']
 
 
 class User(Document):
@@ -21,19 +25,27 @@ class User(Document):
         'indexes': ['email', 'created_at']
     }
     
+    def save(self, *args, **kwargs):
+        """Save and drop this user's cached auth state in this process"""
+        result = super().save(*args, **kwargs)
+        user_state_cache.invalidate(self.id)
+        return result
+    
+    def delete(self, *args, **kwargs):
+        user_state_cache.invalidate(self.id)
+        return super().delete(*args, **kwargs)
+    
     def set_password(self, password: str):
-        """Hash and set password"""
-        self.password_hash = bcrypt.hashpw(
-            password.encode('utf-8'),
-            bcrypt.gensalt()
-        ).decode('utf-8')
+        """Hash and set password (runs on the bcrypt pool)"""
+        self.password_hash = hash_password(password)
     
     def check_password(self, password: str) -> bool:
-        """Verify password"""
-        return bcrypt.checkpw(
-            password.encode('utf-8'),
-            self.password_hash.encode('utf-8')
-        )
+        """Verify password (runs on the bcrypt pool)"""
+        return verify_password(password, self.password_hash)
+    
+    def password_needs_rehash(self) -> bool:
+        """True when the stored hash does not use the configured BCRYPT_ROUNDS"""
+        return needs_rehash(self.password_hash)
     
     def to_dict(self):
         return {
@@ -53,12 +65,14 @@ class PatientProfile(Document):
     medical_history = ListField(StringField(), default=[])
     allergies = ListField(StringField(), default=[])
     medications = ListField(StringField(), default=[])
+    # Newest reading per vitals metric; the history lives in api.vitals
+    latest_vitals = DictField(default={})
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
     
     meta = {
         'collection': 'patient_profiles',
-        'indexes': ['user_id', 'created_at']
+        'indexes': ['user_id', 'created_at', 'updated_at']
     }
     
     def to_dict(self):
@@ -70,6 +84,7 @@ class PatientProfile(Document):
             'medical_history': self.medical_history,
             'allergies': self.allergies,
             'medications': self.medications,
+            'latest_vitals': self.latest_vitals,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
         }
@@ -85,7 +100,7 @@ class ProviderProfile(Document):
     clinic_address = StringField(default='')
     phone = StringField(default='')
     available_hours = DictField(default={})
-    patients = ListField(StringField(), default=[])  # List of patient user_ids
+    patients = ListField(StringField(), default=[])  # Deprecated: see ProviderPatient
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
     
@@ -104,12 +119,47 @@ class ProviderProfile(Document):
             'clinic_address': self.clinic_address,
             'phone': self.phone,
             'available_hours': self.available_hours,
-            'patients': self.patients,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
         }
 
 
+class ProviderPatient(Document):
+    """
+    Provider <-> patient relationship, one document per pair.
+
+    Replaces the unbounded ProviderProfile.patients array so profile size
+    stays constant as a practice grows.
+    """
+    provider_id = StringField(required=True)  # User ID of provider/doctor
+    patient_id = StringField(required=True)  # User ID of patient
+    created_at = DateTimeField(default=datetime.utcnow)
+    
+    meta = {
+        'collection': 'provider_patients',
+        'indexes': [
+            {'fields': ['provider_id', 'patient_id'], 'unique': True},
+            ('provider_id', 'id'),
+            'patient_id',
+        ]
+    }
+    
+    @classmethod
+    def link(cls, provider_id: str, patient_id: str):
+        """Record the relationship with one atomic, idempotent upsert"""
+        cls.objects(provider_id=provider_id, patient_id=patient_id).update_one(
+            upsert=True,
+            set_on_insert__created_at=datetime.utcnow(),
+        )
+    
+    def to_dict(self):
+        return {
+            'provider_id': self.provider_id,
+            'patient_id': self.patient_id,
+            'created_at': self.created_at.isoformat(),
+        }
+
+
 class Appointment(Document):
     """Appointment booking document"""
     patient_id = StringField(required=True)  # User ID of patient
@@ -120,12 +170,34 @@ class Appointment(Document):
     notes = StringField(default='')  # Additional notes
     patient_email = StringField(default='')  # Email of patient (for reference)
     provider_email = StringField(default='')  # Email of provider (for reference)
+    series_id = StringField(default='')  # Shared by appointments booked as one recurring series
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
     
     meta = {
         'collection': 'appointments',
-        'indexes': ['patient_id', 'provider_id', 'appointment_date', 'status', 'created_at']
+        # Every query is scoped to a patient or provider, so indexes lead with
+        # the owner; single-field owner, date and status indexes only cost
+        # writes (`manage.py indexes --apply` drops the owner ones, which
+        # these cover; the rest need --drop-extra)
+        'indexes': [
+            # Keyset pagination: equality prefix, then (appointment_date, _id) sort key
+            ('patient_id', 'appointment_date', 'id'),
+            ('provider_id', 'appointment_date', 'id'),
+            ('provider_id', 'status', 'appointment_date', 'id'),
+            # Change feed keyset on (updated_at, _id); prefix also serves the
+            # index-only ETag validators (count and newest updated_at per owner)
+            ('patient_id', 'updated_at', 'id'),
+            ('provider_id', 'updated_at', 'id'),
+            # One active booking per provider slot; enforced by the server so
+            # concurrent bookings cannot both succeed ($in needs MongoDB 6.0+)
+            {
+                'fields': ['provider_id', 'appointment_date'],
+                'unique': True,
+                'partialFilterExpression': {'status': {'$in': ACTIVE_APPOINTMENT_STATUSES}},
+                'name': 'provider_active_slot_unique',
+            },
+        ]
     }
     
     def to_dict(self):
@@ -139,6 +211,52 @@ class Appointment(Document):
             'notes': self.notes,
             'patient_email': self.patient_email,
             'provider_email': self.provider_email,
+            'series_id': self.series_id,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
         }
+
+
+class ProviderDailyStats(Document):
+    """
+    Appointment counts by status for one provider and one UTC day of
+    appointment_date, kept current with $inc by api.rollups
+    """
+    provider_id = StringField(required=True)  # User ID of provider/doctor
+    day = DateTimeField(required=True)  # Midnight UTC
+    counts = DictField(default={})  # status -> number of appointments
+    updated_at = DateTimeField(default=datetime.utcnow)
+    
+    meta = {
+        'collection': 'provider_daily_stats',
+        'indexes': [
+            # Upsert key for $inc and the $merge key for rebuilds
+            {'fields': ['provider_id', 'day'], 'unique': True},
+        ]
+    }
+    
+    def to_dict(self):
+        return {
+            'provider_id': self.provider_id,
+            'day': self.day.date().isoformat(),
+            'counts': self.counts,
+            'updated_at': self.updated_at.isoformat(),
+        }
+
+
+class StreamTicket(Document):
+    """
+    Short-lived, single-use credential for opening the appointment event
+    stream, so the JWT never appears in a URL (see api.stream_tickets)
+    """
+    id = StringField(primary_key=True)  # SHA-256 of the ticket
+    user_id = StringField(required=True)
+    expires_at = DateTimeField(required=True)
+    
+    meta = {
+        'collection': 'stream_tickets',
+        'indexes': [
+            # Unredeemed tickets are removed by the server once expired
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0},
+        ]
+    }
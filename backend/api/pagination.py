@@ -0,0 +1,186 @@
+"""
+Keyset (cursor) pagination helpers for list endpoints
+"""
+import base64
+import json
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from mongoengine.queryset.visitor import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PaginationError(ValueError):
+    """Raised when pagination or filter query parameters are invalid"""
+
+
+def encode_cursor(appointment_date: datetime, object_id) -> str:
+    """Encode the sort key of the last returned row as an opaque token"""
+    raw = json.dumps([appointment_date.isoformat(), str(object_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def encode_id_cursor(object_id) -> str:
+    """Encode the _id of the last returned row as an opaque token"""
+    return base64.urlsafe_b64encode(ObjectId(str(object_id)).binary).decode('ascii').rstrip('=')
+
+
+def decode_id_cursor(cursor: str):
+    """Decode a token produced by encode_id_cursor into an ObjectId"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return ObjectId(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, InvalidId):
+        raise PaginationError('Invalid cursor')
+
+
+def decode_cursor(cursor: str):
+    """Decode a token produced by encode_cursor into (datetime, ObjectId)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_str, id_str = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        cursor_date = parse_datetime(date_str)
+        if cursor_date is None:
+            raise ValueError(date_str)
+        return cursor_date, ObjectId(id_str)
+    except (ValueError, TypeError, InvalidId, json.JSONDecodeError):
+        raise PaginationError('Invalid cursor')
+
+
+def parse_limit(value) -> int:
+    """Parse the page size query parameter, clamped to MAX_PAGE_SIZE"""
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_datetime_param(name: str, value, end_of_day: bool = False):
+    """Parse an ISO date or datetime query parameter into an aware datetime"""
+    if value in (None, ''):
+        return None
+    try:
+        day = parse_date(value)
+        parsed = parse_datetime(value) if day is None else None
+    except ValueError:
+        day = parsed = None
+    if day is not None:
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if parsed is None:
+        raise PaginationError(f'{name} must be an ISO 8601 date or datetime')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def parse_range(params, default_days, max_days):
+    """(start, end) from from/to query params; to defaults to now, from to default_days before it"""
+    end = parse_datetime_param('to', params.get('to'), end_of_day=True) or timezone.now()
+    start = parse_datetime_param('from', params.get('from')) or end - timedelta(days=default_days)
+    if start > end or end - start > timedelta(days=max_days):
+        raise PaginationError(f'from must precede to, at most {max_days} days apart')
+    return start, end
+
+
+def parse_status_param(value, choices):
+    """Parse a comma separated status filter, validating against choices"""
+    if value in (None, ''):
+        return None
+    statuses = [s.strip() for s in value.split(',') if s.strip()]
+    invalid = [s for s in statuses if s not in choices]
+    if invalid:
+        raise PaginationError(f'Invalid status: {", ".join(invalid)}')
+    return statuses
+
+
+def keyset_after(cursor, date_field='appointment_date'):
+    """Raw MongoDB filter selecting rows after a paginate_by_date cursor"""
+    cursor_date, cursor_id = decode_cursor(cursor)
+    return {'$or': [
+        {date_field: {'$gt': cursor_date}},
+        {date_field: cursor_date, '_id': {'$gt': cursor_id}},
+    ]}
+
+
+def paginate_by_date(queryset, cursor, limit, mapper, date_field='appointment_date'):
+    """
+    Apply keyset pagination ordered by (date_field, _id).
+
+    Rows are read as raw BSON and turned into response dicts by mapper
+    (see api.queries). Returns (records, next_cursor). Each page is a bounded
+    index range scan that starts after the cursor, so cost does not grow
+    with page depth.
+    """
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__gt': cursor_date})
+            | Q(**{date_field: cursor_date, 'id__gt': cursor_id})
+        )
+    rows = list(
+        queryset.order_by(f'+{date_field}', '+id')
+        .limit(limit + 1)
+        .only(*mapper.only())
+        .as_pymongo()
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[date_field], last['_id'])
+    return mapper.map_many(rows), next_cursor
+
+
+def paginate_by_id(queryset, cursor, limit, mapper):
+    """Apply keyset pagination ordered by _id; returns (records, next_cursor)"""
+    if cursor:
+        queryset = queryset.filter(id__gt=decode_id_cursor(cursor))
+    rows = list(
+        queryset.order_by('+id')
+        .limit(limit + 1)
+        .only(*mapper.only())
+        .as_pymongo()
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_id_cursor(rows[-1]['_id'])
+    return mapper.map_many(rows), next_cursor
+
+
+def changes_since(queryset, token, limit, mapper, settled_before, date_field='updated_at'):
+    """
+    Rows modified after a change token, ordered by (date_field, _id).
+
+    Only rows last modified before settled_before are returned, so a write
+    still in flight with a slightly older timestamp is not skipped by a
+    token that has already moved past it. Returns (records, next_token,
+    has_more); next_token is the input token when nothing changed.
+    """
+    queryset = queryset.filter(**{f'{date_field}__lte': settled_before})
+    if token:
+        token_date, token_id = decode_cursor(token)
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__gt': token_date})
+            | Q(**{date_field: token_date, 'id__gt': token_id})
+        )
+    rows = list(
+        queryset.order_by(f'+{date_field}', '+id')
+        .limit(limit + 1)
+        .only(*mapper.only())
+        .as_pymongo()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        token = encode_cursor(rows[-1][date_field], rows[-1]['_id'])
+    return mapper.map_many(rows), token, has_more
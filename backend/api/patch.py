@@ -0,0 +1,135 @@
+"""
+Field-level PATCH for profile documents
+
+A PATCH body lists operations by path:
+
+    {
+        "set":   {"health_data.blood_pressure": "120/80", "phone": "+1-555-0100"},
+        "unset": ["health_data.glucose"],
+        "push":  {"allergies": "penicillin"},
+        "pull":  {"medications": ["ibuprofen", "aspirin"]}
+    }
+
+build_update() validates this against the Document's fields and turns it
+into one MongoDB update ($set/$unset/$push/$pull). apply_update() sends it as
+a single find_one_and_update, without reading the document first. Only the
+touched fields come back, so neither the write nor the response grows with
+the rest of the profile.
+
+Dotted paths reach into DictFields (set and unset); push and pull work on
+ListFields and take a value or a list of values.
+"""
+from mongoengine import DictField, ListField
+from mongoengine.errors import ValidationError
+from pymongo import ReturnDocument
+from api.queries import RecordMapper
+
+OPERATIONS = ('set', 'unset', 'push', 'pull')
+
+
+class PatchError(ValueError):
+    """Raised when a PATCH body is malformed or targets a field it may not change"""
+
+
+def _field(document_cls, path, fields):
+    """(top-level field name, Field, nested path or None) for a dotted path"""
+    name, _, nested = path.partition('.')
+    if name not in fields:
+        raise PatchError(f'{name} cannot be changed')
+    field = document_cls._fields[name]
+    if nested:
+        if not isinstance(field, DictField):
+            raise PatchError(f'{name} has no sub-fields')
+        if any(not part or part.startswith('$') for part in nested.split('.')):
+            raise PatchError(f'Invalid path: {path}')
+    return name, field, nested or None
+
+
+def _validate(field, value, path):
+    try:
+        field.validate(value)
+    except ValidationError as e:
+        raise PatchError(f'{path}: {e.message}')
+
+
+def _values(value):
+    return value if isinstance(value, list) else [value]
+
+
+def build_update(document_cls, body, fields):
+    """
+    (update document, touched top-level field names) for a PATCH body;
+    `fields` are the names the caller may change. Raises PatchError.
+    """
+    if not isinstance(body, dict):
+        raise PatchError('Body must be an object of operations')
+    unknown = set(body) - set(OPERATIONS)
+    if unknown:
+        raise PatchError(f'Unknown operations: {", ".join(sorted(unknown))}')
+    if not any(body.get(op) for op in OPERATIONS):
+        raise PatchError(f'Provide at least one of {", ".join(OPERATIONS)}')
+    for op in ('set', 'push', 'pull'):
+        if not isinstance(body.get(op) or {}, dict):
+            raise PatchError(f'{op} must be an object of path: value')
+    if not isinstance(body.get('unset') or [], list):
+        raise PatchError('unset must be a list of paths')
+
+    update = {}
+    paths = []
+    touched = []
+
+    for path, value in (body.get('set') or {}).items():
+        name, field, nested = _field(document_cls, path, fields)
+        if nested is None:
+            _validate(field, value, path)
+        elif isinstance(value, dict):
+            # Keys of a nested object follow the same rules as the DictField's
+            _validate(DictField(), value, path)
+        update.setdefault('$set', {})[path] = value
+        paths.append(path)
+        touched.append(name)
+
+    for path in body.get('unset') or []:
+        name, _, nested = _field(document_cls, str(path), fields)
+        if nested is None:
+            raise PatchError(f'{name} cannot be removed; set it instead')
+        update.setdefault('$unset', {})[path] = ''
+        paths.append(path)
+        touched.append(name)
+
+    for op, operator in (('push', '$push'), ('pull', '$pull')):
+        for path, value in (body.get(op) or {}).items():
+            name, field, nested = _field(document_cls, path, fields)
+            if nested is not None or not isinstance(field, ListField):
+                raise PatchError(f'{op} needs a list field, not {path}')
+            values = _values(value)
+            for item in values:
+                _validate(field.field, item, path)
+            update.setdefault(operator, {})[path] = {'$each' if op == 'push' else '$in': values}
+            paths.append(path)
+            touched.append(name)
+
+    # MongoDB rejects one update touching a path and its parent (or the same
+    # path twice, e.g. push and pull on allergies)
+    for i, path in enumerate(paths):
+        for other in paths[i + 1:]:
+            if path == other or other.startswith(f'{path}.') or path.startswith(f'{other}.'):
+                raise PatchError(f'Conflicting paths: {path} and {other}')
+
+    return update, list(dict.fromkeys(touched))
+
+
+def apply_update(document_cls, query, update, touched, now):
+    """
+    Apply an update from build_update to the document matching query and
+    return its user_id, touched fields and updated_at; None when no match
+    """
+    update.setdefault('$set', {})['updated_at'] = now
+    mapper = RecordMapper(document_cls, ('user_id', *touched, 'updated_at'))
+    raw = document_cls._get_collection().find_one_and_update(
+        query,
+        update,
+        projection=dict(mapper.projection, _id=0),
+        return_document=ReturnDocument.AFTER,
+    )
+    return mapper(raw) if raw is not None else None
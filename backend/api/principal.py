@@ -0,0 +1,80 @@
+"""
+Authenticated principal and per-process cache of user account state
+"""
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+
+
+class Principal:
+    """
+    Lightweight authenticated user attached to request.user.
+
+    Built from JWT claims plus cached account state, so views can read
+    id, email and role without loading the User document.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    __slots__ = ('id', 'email', 'role', 'is_active')
+
+    def __init__(self, user_id, email, role, is_active=True):
+        self.id = user_id
+        self.email = email
+        self.role = role
+        self.is_active = is_active
+
+    def __repr__(self):
+        return f'<Principal {self.id} {self.role}>'
+
+
+class UserStateCache:
+    """
+    Thread-safe TTL + LRU cache of user state (email, role, is_active).
+
+    Entries expire after ttl seconds, which bounds how long a deactivated
+    or re-roled user keeps being accepted by other worker processes.
+    """
+
+    def __init__(self, ttl=30, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, state = entry
+            if expires_at <= now:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return state
+
+    def set(self, user_id, state):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, state)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_state_cache = UserStateCache(
+    ttl=getattr(settings, 'AUTH_USER_CACHE_TTL', 30),
+    max_size=getattr(settings, 'AUTH_USER_CACHE_SIZE', 10000),
+)
@@ -0,0 +1,91 @@
+"""
+Read-only query layer for list endpoints
+
+Fetches raw BSON (as_pymongo / pymongo with projections) and maps it straight
+into response dicts through a precompiled per-model field mapper, skipping
+MongoEngine Document construction, validation and change tracking.
+"""
+import copy
+from datetime import datetime
+from mongoengine import DateTimeField, ObjectIdField
+from api.models import Appointment, PatientProfile, ProviderPatient, ProviderProfile
+
+
+def _to_str(value):
+    return str(value) if value is not None else None
+
+
+def _to_isoformat(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class RecordMapper:
+    """
+    Precompiled BSON -> response dict mapper for a Document class.
+
+    Output keys, their db field names, value converters and defaults are
+    resolved once at import time, so mapping a row is a single pass over a
+    tuple with no per-row field lookups.
+    """
+
+    def __init__(self, document_cls, field_names):
+        plan = []
+        for name in field_names:
+            field = document_cls._fields[name]
+            if isinstance(field, ObjectIdField) or name == 'id':
+                convert = _to_str
+            elif isinstance(field, DateTimeField):
+                convert = _to_isoformat
+            else:
+                convert = None
+            plan.append((name, field.db_field, convert, field.default))
+        self.document_cls = document_cls
+        self.field_names = tuple(field_names)
+        self._plan = tuple(plan)
+        self.projection = {db_field: 1 for _, db_field, _, _ in plan}
+
+    def only(self):
+        """Field names to pass to QuerySet.only() for this mapper"""
+        return self.field_names
+
+    def __call__(self, raw):
+        record = {}
+        for name, db_field, convert, default in self._plan:
+            if db_field in raw:
+                value = raw[db_field]
+            elif callable(default):
+                value = default()
+            else:
+                value = copy.copy(default)
+            record[name] = convert(value) if convert is not None else value
+        return record
+
+    def map_many(self, rows):
+        return [self(raw) for raw in rows]
+
+
+# Field lists mirror the corresponding Document.to_dict() output
+APPOINTMENT_MAPPER = RecordMapper(Appointment, (
+    'id', 'patient_id', 'provider_id', 'appointment_date', 'reason', 'status',
+    'notes', 'patient_email', 'provider_email', 'series_id', 'created_at', 'updated_at',
+))
+
+PATIENT_PROFILE_MAPPER = RecordMapper(PatientProfile, (
+    'user_id', 'wellness_goals', 'appointments', 'health_data', 'medical_history',
+    'allergies', 'medications', 'latest_vitals', 'created_at', 'updated_at',
+))
+
+PROVIDER_PROFILE_MAPPER = RecordMapper(ProviderProfile, (
+    'user_id', 'specialty', 'license_number', 'qualifications', 'experience_years',
+    'clinic_address', 'phone', 'available_hours', 'created_at', 'updated_at',
+))
+
+PROVIDER_PATIENT_MAPPER = RecordMapper(ProviderPatient, (
+    'provider_id', 'patient_id', 'created_at',
+))
+
+
+def fetch_records(queryset, mapper):
+    """Run a MongoEngine queryset as raw BSON and map each row to a response dict"""
+    return mapper.map_many(queryset.only(*mapper.only()).as_pymongo())
+
@@ -0,0 +1,324 @@
+"""
+Query plan audit for `manage.py indexes --audit`
+
+Seeds a throwaway database with synthetic data (database/init_doctors.py),
+sends a request to every named route as a user allowed to call it, records
+the Mongo commands each request issues and re-runs them through explain.
+A command fails the audit when its winning plan contains a COLLSCAN, or when
+it examines more than max_ratio times the documents it returns. Routes that
+list a whole collection by design may scan it; they are marked below.
+
+Meant for CI or a developer's mongod: it needs a server it may create and
+drop a database on, never the production one.
+"""
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from bson import ObjectId
+from django.conf import settings
+from django.utils import timezone
+from pymongo import monitoring
+from api.indexes import document_classes
+from middleware.db_instrumentation import describe_command, event_listeners
+
+EXPLAINABLE = ('find', 'aggregate', 'count', 'distinct', 'update', 'delete', 'findAndModify')
+
+# Keys the driver adds to a command that explain does not accept
+_DRIVER_KEYS = (
+    '$db', 'lsid', '$clusterTime', 'txnNumber', '$readPreference',
+    'autocommit', 'startTransaction', 'readConcern', 'writeConcern',
+)
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Keeps explainable commands while recording is switched on"""
+
+    def __init__(self):
+        self.commands = None
+
+    def start(self):
+        self.commands = []
+
+    def stop(self):
+        commands, self.commands = self.commands or [], None
+        return commands
+
+    def started(self, event):
+        if self.commands is not None and event.command_name in EXPLAINABLE:
+            self.commands.append((event.command_name, dict(event.command)))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def explainable(command_name, command):
+    """The command as explain accepts it; writes become one per statement"""
+    command = {key: value for key, value in command.items() if key not in _DRIVER_KEYS}
+    statements = {'update': 'updates', 'delete': 'deletes'}.get(command_name)
+    if not statements:
+        return [command]
+    return [dict(command, **{statements: [statement]}) for statement in command[statements]]
+
+
+def _walk(node, key=None):
+    """Yield (key, dict) pairs for every dict in an explain document"""
+    if isinstance(node, dict):
+        yield key, node
+        for child_key, child in node.items():
+            if child_key != 'rejectedPlans':
+                yield from _walk(child, child_key)
+    elif isinstance(node, list):
+        for child in node:
+            yield from _walk(child, key)
+
+
+def summarize(explain):
+    """Stages, indexes used, documents examined and returned from an explain"""
+    stages, indexes = [], []
+    examined = returned = 0
+    for key, node in _walk(explain):
+        if 'stage' in node and key != 'executionStages':
+            stages.append(node['stage'])
+            if node.get('indexName'):
+                indexes.append(node['indexName'])
+        if key == 'executionStats':
+            examined += node.get('totalDocsExamined', 0)
+            returned += node.get('nReturned', 0)
+    return {
+        'stages': list(dict.fromkeys(stages)),
+        'indexes': list(dict.fromkeys(indexes)),
+        'examined': examined,
+        'returned': returned,
+    }
+
+
+class Finding:
+    """One explained command issued by one route"""
+
+    def __init__(self, route, command_name, command, summary, max_ratio, allow_collscan):
+        self.route = route
+        self.description = describe_command(command_name, command)
+        self.summary = summary
+        self.problems = []
+        if 'COLLSCAN' in summary['stages'] and not allow_collscan:
+            self.problems.append('COLLSCAN')
+        if summary['examined'] > max_ratio * max(summary['returned'], 1):
+            self.problems.append(
+                f'examined {summary["examined"]} for {summary["returned"]} returned (> {max_ratio:g}x)'
+            )
+
+    @property
+    def ok(self):
+        return not self.problems
+
+    def __str__(self):
+        plan = ' > '.join(self.summary['stages']) or '-'
+        indexes = ', '.join(self.summary['indexes'])
+        return (
+            f'{self.description}\n'
+            f'      {plan}{f" [{indexes}]" if indexes else ""} '
+            f'examined {self.summary["examined"]} returned {self.summary["returned"]}'
+        )
+
+
+def audit_uri(mongo_uri, database):
+    """MONGO_URI pointing at `database`, keeping the original auth database"""
+    parts = urlsplit(mongo_uri)
+    query = dict(parse_qsl(parts.query))
+    original = parts.path.lstrip('/')
+    if original and 'authSource' not in query:
+        query['authSource'] = original
+    return urlunsplit(parts._replace(path=f'/{database}', query=urlencode(query)))
+
+
+class QueryAudit:
+    """Seed, exercise every route, explain what they ran"""
+
+    # Whole-collection listings; a COLLSCAN is the cheapest plan for them
+    ALLOW_COLLSCAN = {'patient-list', 'provider-list'}
+
+    def __init__(self, database, providers=20, patients=400, appointments=20000,
+                 max_ratio=10.0, seed_value=7, log=print):
+        self.database = database
+        self.providers = providers
+        self.patients = patients
+        self.appointments = appointments
+        self.max_ratio = max_ratio
+        self.seed_value = seed_value
+        self.log = log
+        self.recorder = CommandRecorder()
+        self.findings = []
+        self.covered = set()
+
+    def connect(self):
+        import mongoengine as me
+        from mongoengine.connection import disconnect_all
+        from django.core.cache import caches
+        from api.principal import user_state_cache
+
+        disconnect_all()
+        for document in document_classes():
+            document._collection = None
+        me.connect(
+            host=audit_uri(settings.MONGO_URI, self.database),
+            serverSelectionTimeoutMS=5000,
+            tz_aware=True,
+            event_listeners=event_listeners + [self.recorder],
+        )
+        caches['directory'].clear()
+        user_state_cache.clear()
+
+    def seed(self):
+        from database.init_doctors import seed
+        seed(
+            self.providers, self.patients, self.appointments,
+            seed_value=self.seed_value, workers=1, password_pool=2,
+        )
+
+    def drop(self):
+        from mongoengine.connection import get_connection
+        get_connection().drop_database(self.database)
+
+    def call(self, route, method, path, principal=None, body=None):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        if principal is not None:
+            client.force_authenticate(principal)
+        self.recorder.start()
+        try:
+            response = getattr(client, method.lower())(path, body, format='json')
+        finally:
+            commands = self.recorder.stop()
+        self.covered.add(route)
+        self.log(f'{route:24} {method:6} {path} -> {response.status_code}')
+
+        db = self._db()
+        for command_name, command in commands:
+            for statement in explainable(command_name, command):
+                explain = db.command({'explain': statement, 'verbosity': 'executionStats'})
+                finding = Finding(
+                    route, command_name, statement, summarize(explain),
+                    self.max_ratio, route in self.ALLOW_COLLSCAN,
+                )
+                self.findings.append(finding)
+                self.log(f'  {"ok  " if finding.ok else "FAIL"} {finding}')
+                for problem in finding.problems:
+                    self.log(f'       ! {problem}')
+        return response
+
+    def _db(self):
+        from mongoengine.connection import get_db
+        return get_db()
+
+    def subjects(self):
+        """Busiest provider, one of their patients and a seeded login"""
+        from api.models import Appointment, User
+        from api.principal import Principal
+
+        collection = Appointment._get_collection()
+        busiest = next(collection.aggregate([
+            {'$group': {'_id': '$provider_id', 'n': {'$sum': 1}}},
+            {'$sort': {'n': -1}},
+            {'$limit': 1},
+        ]))
+        row = collection.find_one({'provider_id': busiest['_id']}, sort=[('appointment_date', -1)])
+
+        def principal(user_id):
+            doc = User._get_collection().find_one({'_id': ObjectId(user_id)})
+            return Principal(str(doc['_id']), doc['email'], doc['role'])
+
+        return principal(busiest['_id']), principal(row['patient_id'])
+
+    def run(self):
+        """Exercise every route; returns the routes that were not covered"""
+        from django.urls import get_resolver
+        from api.principal import Principal
+
+        provider, patient = self.subjects()
+        newcomer = Principal(str(ObjectId()), 'audit-provider@healthlink.test', 'provider')
+        today = timezone.now().date()
+        week = f'from={today.isoformat()}&to={(today + timedelta(days=7)).isoformat()}'
+
+        self.call('health', 'GET', '/api/health/')
+        self.call('metrics', 'GET', '/api/metrics/')
+        self.call('register', 'POST', '/api/auth/register/', body={
+            'email': 'audit-patient@healthlink.test', 'password': 'AuditPass1!', 'role': 'patient',
+        })
+        self.call('login', 'POST', '/api/auth/login/', body={
+            'email': f'seed{self.seed_value}-patient0@healthlink.test', 'password': 'SeedPass0!',
+        })
+        self.call('profile', 'GET', '/api/auth/profile/', patient)
+        self.call('logout', 'POST', '/api/auth/logout/', patient)
+
+        self.call('patient-list', 'GET', '/api/patients/', provider)
+        self.call('patient-detail', 'GET', f'/api/patients/{patient.id}/', patient)
+        self.call('patient-update', 'PUT', f'/api/patients/{patient.id}/update/', patient,
+                  {'allergies': ['penicillin']})
+
+        self.call('patient-update', 'PATCH', f'/api/patients/{patient.id}/update/', patient, {
+            'set': {'health_data.blood_pressure': '120/80'}, 'push': {'medications': 'metformin'},
+        })
+
+        self.call('patient-vitals', 'POST', f'/api/patients/{patient.id}/vitals/', patient, {
+            'samples': [
+                {'metric': 'heart_rate', 'value': 60 + i % 25,
+                 'recorded_at': (timezone.now() - timedelta(hours=i)).isoformat()}
+                for i in range(500)
+            ],
+        })
+        self.call('patient-vitals', 'GET', f'/api/patients/{patient.id}/vitals/?metric=heart_rate', provider)
+        self.call('patient-vitals', 'GET',
+                  f'/api/patients/{patient.id}/vitals/?metric=heart_rate&resolution=raw', patient)
+        self.call('patient-trends', 'GET', f'/api/patients/{patient.id}/trends/?metric=heart_rate', provider)
+
+        self.call('provider-list', 'GET', '/api/providers/', patient)
+        self.call('provider-detail', 'GET', f'/api/providers/{provider.id}/', patient)
+        self.call('provider-availability', 'GET', f'/api/providers/{provider.id}/availability/?{week}', patient)
+        self.call('provider-patients', 'GET', f'/api/providers/{provider.id}/patients/', provider)
+        self.call('provider-patients', 'GET',
+                  f'/api/providers/{provider.id}/patients/?patient_id={patient.id}', provider)
+        self.call('provider-update', 'PUT', f'/api/providers/{provider.id}/update/', provider,
+                  {'phone': '+1-555-0199'})
+        self.call('provider-update', 'PATCH', f'/api/providers/{provider.id}/update/', provider,
+                  {'set': {'available_hours.Saturday': '10:00-12:00'}})
+        self.call('provider-create', 'POST', '/api/providers/create/', newcomer, {
+            'user_id': newcomer.id, 'specialty': 'General Practice', 'license_number': f'AUDIT-{newcomer.id}',
+        })
+
+        self.call('appointment-list', 'GET', '/api/appointments/', patient)
+        self.call('appointment-list', 'GET', '/api/appointments/', provider)
+        self.call('appointment-list', 'GET', f'/api/appointments/?status=confirmed&{week}', provider)
+        self.call('appointment-changes', 'GET', '/api/appointments/changes/', provider)
+        self.call('doctor-appointments', 'GET', f'/api/appointments/doctor/{provider.id}/', patient)
+
+        # Far enough ahead to be free in the seeded calendar
+        slot = (timezone.now() + timedelta(days=800)).replace(hour=10, minute=0, second=0, microsecond=0)
+        response = self.call('appointment-create', 'POST', '/api/appointments/create/', patient, {
+            'provider_id': provider.id, 'appointment_date': slot.isoformat(), 'reason': 'Audit',
+        })
+        self.call('appointment-series', 'POST', '/api/appointments/series/', patient, {
+            'provider_id': provider.id, 'appointment_date': (slot + timedelta(days=1)).isoformat(),
+            'rule': 'FREQ=WEEKLY;COUNT=52', 'reason': 'Audit series',
+        })
+        if response.status_code == 201:
+            appointment_id = response.data['appointment']['id']
+            self.call('appointment-detail', 'GET', f'/api/appointments/{appointment_id}/', patient)
+            self.call('appointment-detail', 'PUT', f'/api/appointments/{appointment_id}/', provider,
+                      {'status': 'confirmed'})
+            self.call('appointment-bulk-status', 'POST', '/api/appointments/bulk/status/', provider,
+                      {'status': 'pending', 'ids': [appointment_id]})
+            self.call('appointment-detail', 'DELETE', f'/api/appointments/{appointment_id}/', patient)
+        self.call('appointment-bulk-status', 'POST', '/api/appointments/bulk/status/', provider, {
+            'status': 'confirmed', 'from': today.isoformat(), 'to': (today + timedelta(days=7)).isoformat(),
+        })
+        self.call('provider-stats', 'GET', f'/api/providers/{provider.id}/stats/?{week}', provider)
+
+        routes = {name for name in get_resolver().reverse_dict if isinstance(name, str)}
+        return sorted(routes - self.covered)
+
+    @property
+    def failures(self):
+        return [finding for finding in self.findings if not finding.ok]
@@ -0,0 +1,121 @@
+"""
+Recurrence rules for appointment series
+
+A subset of RFC 5545 RRULE: FREQ=DAILY or WEEKLY, INTERVAL, COUNT or UNTIL
+(one is required), and BYDAY=MO,TH,... for weekly rules. Occurrences keep
+the time of day of the series start, and none fall before it, e.g.
+
+    FREQ=WEEKLY;COUNT=52                  the start weekday, for a year
+    FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;UNTIL=20270630
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+
+class RecurrenceError(ValueError):
+    """Raised when a recurrence rule is invalid or expands to too many occurrences"""
+
+
+class Rule:
+    """Parsed recurrence rule; byday holds weekday numbers (Monday is 0)"""
+
+    __slots__ = ('freq', 'interval', 'count', 'until', 'byday')
+
+    def __init__(self, freq, interval=1, count=None, until=None, byday=None):
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.byday = byday
+
+
+def _parse_until(value):
+    # RFC 5545 basic format (20270630, 20270630T090000Z) or ISO 8601
+    compact = value.rstrip('Z')
+    for fmt in ('%Y%m%dT%H%M%S', '%Y%m%d'):
+        try:
+            parsed = datetime.strptime(compact, fmt)
+            break
+        except ValueError:
+            continue
+    else:
+        try:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.max) if day else parse_datetime(value)
+        except ValueError:
+            parsed = None
+    if parsed is None:
+        raise RecurrenceError(f'Invalid UNTIL: {value}')
+    if len(compact) == 8:
+        parsed = datetime.combine(parsed.date(), time.max)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=dt_timezone.utc)
+
+
+def parse_rule(text):
+    """Parse 'FREQ=WEEKLY;COUNT=10;...' into a Rule"""
+    parts = {}
+    for part in (text or '').strip().removeprefix('RRULE:').split(';'):
+        if not part.strip():
+            continue
+        key, sep, value = part.partition('=')
+        if not sep:
+            raise RecurrenceError(f'Invalid rule part: {part}')
+        parts[key.strip().upper()] = value.strip()
+
+    unknown = set(parts) - {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'BYDAY'}
+    if unknown:
+        raise RecurrenceError(f'Unsupported rule parts: {", ".join(sorted(unknown))}')
+    freq = parts.get('FREQ', '').upper()
+    if freq not in ('DAILY', 'WEEKLY'):
+        raise RecurrenceError('FREQ must be DAILY or WEEKLY')
+    if ('COUNT' in parts) == ('UNTIL' in parts):
+        raise RecurrenceError('Exactly one of COUNT or UNTIL is required')
+
+    try:
+        interval = int(parts.get('INTERVAL', '1'))
+        count = int(parts['COUNT']) if 'COUNT' in parts else None
+    except ValueError:
+        raise RecurrenceError('INTERVAL and COUNT must be integers')
+    if interval < 1 or (count is not None and count < 1):
+        raise RecurrenceError('INTERVAL and COUNT must be positive')
+
+    byday = None
+    if 'BYDAY' in parts:
+        if freq != 'WEEKLY':
+            raise RecurrenceError('BYDAY is only supported with FREQ=WEEKLY')
+        days = [day.strip().upper() for day in parts['BYDAY'].split(',') if day.strip()]
+        invalid = [day for day in days if day not in WEEKDAYS]
+        if invalid or not days:
+            raise RecurrenceError(f'Invalid BYDAY: {parts["BYDAY"]}')
+        byday = sorted({WEEKDAYS.index(day) for day in days})
+
+    until = _parse_until(parts['UNTIL']) if 'UNTIL' in parts else None
+    return Rule(freq, interval, count, until, byday)
+
+
+def expand(start, rule, limit):
+    """Occurrence datetimes of rule from start, in order; at most `limit` of them"""
+    if rule.freq == 'DAILY':
+        period, offsets = timedelta(days=rule.interval), [timedelta(0)]
+        anchor = start
+    else:
+        period = timedelta(weeks=rule.interval)
+        anchor = start - timedelta(days=start.weekday())
+        offsets = [timedelta(days=day) for day in (rule.byday or [start.weekday()])]
+
+    occurrences = []
+    while True:
+        for offset in offsets:
+            occurrence = anchor + offset
+            if occurrence < start:
+                continue
+            if rule.until is not None and occurrence > rule.until:
+                return occurrences
+            if len(occurrences) == limit:
+                raise RecurrenceError(f'Series is limited to {limit} appointments')
+            occurrences.append(occurrence)
+            if len(occurrences) == rule.count:
+                return occurrences
+        anchor += period
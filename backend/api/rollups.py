@@ -0,0 +1,206 @@
+"""
+Provider appointment statistics from daily rollups
+
+One provider_daily_stats document per (provider, UTC day of
+appointment_date) counts that day's appointments by status:
+
+    {'provider_id': str, 'day': datetime (midnight UTC),
+     'counts': {'pending': 3, 'confirmed': 5, 'completed': 12, 'cancelled': 2}}
+
+Every write that creates an appointment or changes its status calls record()
+with the transitions it made. record() turns them into one upserted $inc per
+day, so a dashboard reads at most one small document per day in range
+instead of every appointment. To make the transitions exact, status changes
+are conditional on the status they replace (see AppointmentDetailView and
+api.bulk). rebuild() recomputes the rollups from the appointments with one
+aggregation pipeline (`manage.py rebuild_provider_stats`), for data written
+around these paths, such as seed scripts or a failed rollup write.
+
+Utilisation compares booked slots (every status except cancelled, one
+APPOINTMENT_SLOT_MINUTES slot each) with the slots the provider's current
+available_hours offer that weekday. Past schedules are not kept, so past
+days are measured against today's hours.
+"""
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pymongo import UpdateOne
+from api.availability import parse_available_hours
+from api.models import Appointment, ProviderDailyStats
+
+logger = logging.getLogger(__name__)
+
+STATUSES = tuple(Appointment.status.choices)
+
+
+def day_of(when):
+    """Midnight UTC of the day `when` (aware, or naive UTC) falls on"""
+    if when.tzinfo is not None:
+        when = when.astimezone(dt_timezone.utc)
+    return datetime(when.year, when.month, when.day, tzinfo=dt_timezone.utc)
+
+
+def record(provider_id, changes, now=None):
+    """
+    Apply (appointment_date, old status, new status) transitions to the
+    provider's rollups; old is None for a new appointment. A failed write is
+    logged rather than raised: the appointment change has already happened,
+    and rebuild() repairs the drift.
+    """
+    deltas = defaultdict(Counter)
+    for appointment_date, old, new in changes:
+        if old == new:
+            continue
+        day = day_of(appointment_date)
+        if old:
+            deltas[day][old] -= 1
+        if new:
+            deltas[day][new] += 1
+
+    now = now or datetime.now(dt_timezone.utc)
+    requests = []
+    for day, counts in deltas.items():
+        inc = {f'counts.{status}': n for status, n in counts.items() if n}
+        if inc:
+            requests.append(UpdateOne(
+                {'provider_id': provider_id, 'day': day},
+                {'$inc': inc, '$set': {'updated_at': now}},
+                upsert=True,
+            ))
+    if not requests:
+        return
+    try:
+        ProviderDailyStats._get_collection().bulk_write(requests, ordered=False)
+    except Exception as e:
+        logger.error(f'Provider stats update failed for {provider_id}: {str(e)}')
+
+
+def slot_capacity(available_hours, slot_minutes):
+    """{weekday index: bookable slots that day} for an available_hours schedule"""
+    def minutes(clock):
+        return clock.hour * 60 + clock.minute
+
+    # Same slots as expand_slots: whole slots inside each interval
+    return {
+        weekday: sum((minutes(end) - minutes(start)) // slot_minutes for start, end in intervals)
+        for weekday, intervals in parse_available_hours(available_hours).items()
+    }
+
+
+def _ratio(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def _summary(counts, available):
+    total = sum(counts.values())
+    booked = total - counts['cancelled']
+    return {
+        'counts': {status: counts[status] for status in STATUSES},
+        'total': total,
+        'cancellation_rate': _ratio(counts['cancelled'], total),
+        'slots_booked': booked,
+        'slots_available': available,
+        'utilisation': _ratio(booked, available),
+    }
+
+
+def provider_stats(provider_id, start, end, available_hours, slot_minutes):
+    """
+    Per-day and total statistics for the UTC days from start to end
+    (inclusive), read from the rollups in one indexed query. Days without
+    appointments are included with zero counts.
+    """
+    first, last = day_of(start), day_of(end)
+    rows = ProviderDailyStats._get_collection().find(
+        {'provider_id': provider_id, 'day': {'$gte': first, '$lte': last}},
+        {'_id': 0, 'day': 1, 'counts': 1},
+    )
+    by_day = {day_of(row['day']): row.get('counts') or {} for row in rows}
+    capacity = slot_capacity(available_hours, slot_minutes)
+
+    days = []
+    totals = Counter()
+    total_available = 0
+    day = first
+    while day <= last:
+        counts = Counter({status: max(int(n), 0) for status, n in by_day.get(day, {}).items()})
+        available = capacity.get(day.weekday(), 0)
+        days.append({'date': day.date().isoformat(), **_summary(counts, available)})
+        totals.update(counts)
+        total_available += available
+        day += timedelta(days=1)
+
+    return {'days': days, 'totals': _summary(totals, total_available)}
+
+
+def rebuild_pipeline(provider_id=None, now=None):
+    """
+    Aggregation recomputing rollups from appointments (every provider, or
+    one), ending in a $merge into provider_daily_stats; without `now` it
+    stops before the $merge so the result can be compared instead
+    """
+    pipeline = [
+        {'$match': {'provider_id': provider_id} if provider_id else {}},
+        {'$group': {
+            '_id': {
+                'provider_id': '$provider_id',
+                'day': {'$dateTrunc': {'date': '$appointment_date', 'unit': 'day'}},
+                'status': '$status',
+            },
+            'n': {'$sum': 1},
+        }},
+        {'$group': {
+            '_id': {'provider_id': '$_id.provider_id', 'day': '$_id.day'},
+            'counts': {'$push': {'k': '$_id.status', 'v': '$n'}},
+        }},
+        {'$project': {
+            '_id': 0,
+            'provider_id': '$_id.provider_id',
+            'day': '$_id.day',
+            'counts': {'$arrayToObject': '$counts'},
+        }},
+    ]
+    if now is not None:
+        pipeline[-1]['$project']['updated_at'] = {'$literal': now}
+        pipeline.append({'$merge': {
+            'into': ProviderDailyStats._get_collection_name(),
+            'on': ['provider_id', 'day'],
+            'whenMatched': 'replace',
+            'whenNotMatched': 'insert',
+        }})
+    return pipeline
+
+
+def rebuild(provider_id=None):
+    """
+    Replace the rollups (every provider, or one) with counts recomputed from
+    the appointments and delete rollups for days that no longer have any.
+    Returns the number of stale rollups deleted. Writes made while it runs
+    can be lost; run it when appointments are quiet, or again afterwards.
+    """
+    ProviderDailyStats.ensure_indexes()
+    # Application time, like the updated_at record() sets: rollups not
+    # rewritten by the $merge or touched since are stale
+    now = datetime.now(dt_timezone.utc)
+    list(Appointment._get_collection().aggregate(rebuild_pipeline(provider_id, now), allowDiskUse=True))
+    stale = {'updated_at': {'$lt': now}}
+    if provider_id:
+        stale['provider_id'] = provider_id
+    return ProviderDailyStats._get_collection().delete_many(stale).deleted_count
+
+
+def drift(provider_id=None):
+    """[(provider_id, day, stored counts, recomputed counts)] where the rollups disagree with the appointments"""
+    query = {'provider_id': provider_id} if provider_id else {}
+    stored = {
+        (row['provider_id'], day_of(row['day'])): {s: n for s, n in (row.get('counts') or {}).items() if n}
+        for row in ProviderDailyStats._get_collection().find(query, {'_id': 0, 'provider_id': 1, 'day': 1, 'counts': 1})
+    }
+    differences = []
+    for row in Appointment._get_collection().aggregate(rebuild_pipeline(provider_id), allowDiskUse=True):
+        key = (row['provider_id'], day_of(row['day']))
+        actual = stored.pop(key, {})
+        if actual != row['counts']:
+            differences.append((*key, actual, row['counts']))
+    differences.extend((*key, counts, {}) for key, counts in stored.items() if counts)
+    return sorted(differences, key=lambda item: (item[0], item[1]))
@@ -1,7 +1,11 @@
 """
 Serializers for API requests/responses
 """
+from datetime import timezone as dt_timezone
+from django.conf import settings
 from rest_framework import serializers
+from api.recurrence import RecurrenceError, expand, parse_rule
+from api.vitals import METRICS
 
 
 class RegisterSerializer(serializers.Serializer):
@@ -77,7 +81,49 @@ class AppointmentCreateSerializer(serializers.Serializer):
     reason = serializers.CharField(allow_blank=True)
 
 
+class AppointmentSeriesSerializer(serializers.Serializer):
+    """
+    Serializer for recurring series bookings; appointment_date is the first
+    occurrence. Validated data gains `occurrences`, the expanded rule.
+    """
+    provider_id = serializers.CharField()
+    appointment_date = serializers.DateTimeField()
+    rule = serializers.CharField()
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        # UTC at the millisecond precision MongoDB stores
+        start = attrs['appointment_date'].astimezone(dt_timezone.utc)
+        start = start.replace(microsecond=start.microsecond // 1000 * 1000)
+        try:
+            occurrences = expand(start, parse_rule(attrs['rule']), settings.APPOINTMENT_SERIES_MAX)
+        except RecurrenceError as e:
+            raise serializers.ValidationError({'rule': [str(e)]})
+        if not occurrences:
+            # e.g. UNTIL before appointment_date
+            raise serializers.ValidationError({'rule': ['Rule produces no occurrences']})
+        return {**attrs, 'appointment_date': start, 'occurrences': occurrences}
+
+
 class AppointmentUpdateSerializer(serializers.Serializer):
     """Serializer for appointment status updates"""
     status = serializers.ChoiceField(choices=['pending', 'confirmed', 'completed', 'cancelled'])
     notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class AppointmentBulkStatusSerializer(serializers.Serializer):
+    """Serializer for provider bulk status changes; the from/to range is parsed by the view"""
+    status = serializers.ChoiceField(choices=['pending', 'confirmed', 'completed', 'cancelled'])
+    notes = serializers.CharField(required=False, allow_blank=True)
+    ids = serializers.ListField(child=serializers.CharField(), required=False, allow_empty=False)
+
+
+class VitalSampleSerializer(serializers.Serializer):
+    """One vitals measurement; recorded_at defaults to now"""
+    metric = serializers.ChoiceField(choices=list(METRICS))
+    value = serializers.FloatField()
+    recorded_at = serializers.DateTimeField(required=False)
+
+
+class VitalsRecordSerializer(serializers.Serializer):
+    samples = VitalSampleSerializer(many=True, allow_empty=False)
@@ -0,0 +1,86 @@
+"""
+Recurring appointment series (patients)
+
+A series is booked with a constant number of round trips, however many
+occurrences it has. One query finds the occurrences whose slot already has an
+active booking. One unordered bulk_write inserts the others, so a slot taken
+by a concurrent booking fails on its own and the rest still go in. Every
+appointment in the series gets the same series_id, and the provider's daily
+rollups get one $inc per day booked. Any other write error is raised after
+the appointments that were inserted are linked and counted.
+"""
+from bson import ObjectId
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+from api import rollups
+from api.bulk import DUPLICATE_KEY
+from api.models import ACTIVE_APPOINTMENT_STATUSES, Appointment, ProviderPatient
+
+
+def book_series(patient, provider_id, provider_email, occurrences, reason, now):
+    """
+    Book `patient` (the request user) with the provider at each occurrence
+    (UTC, millisecond precision). Returns (series_id, results), one
+    {'appointment_date', 'result', 'id'} per occurrence, where result is
+    'created' or 'conflict'.
+    """
+    collection = Appointment._get_collection()
+    series_id = str(ObjectId())
+
+    taken = {
+        doc['appointment_date'].replace(tzinfo=None)
+        for doc in collection.find(
+            {
+                'provider_id': provider_id,
+                'status': {'$in': ACTIVE_APPOINTMENT_STATUSES},
+                'appointment_date': {'$in': occurrences},
+            },
+            {'_id': 0, 'appointment_date': 1},
+        )
+    }
+
+    results = []
+    inserts = []
+    for occurrence in occurrences:
+        result = {'appointment_date': occurrence.isoformat(), 'result': 'conflict', 'id': None}
+        results.append(result)
+        if occurrence.replace(tzinfo=None) in taken:
+            continue
+        appointment = Appointment(
+            id=ObjectId(),
+            patient_id=str(patient.id),
+            provider_id=provider_id,
+            appointment_date=occurrence,
+            reason=reason,
+            status='pending',
+            patient_email=patient.email,
+            provider_email=provider_email,
+            series_id=series_id,
+            created_at=now,
+            updated_at=now,
+        )
+        appointment.validate()
+        result.update(result='created', id=str(appointment.id))
+        inserts.append((result, occurrence, InsertOne(appointment.to_mongo())))
+
+    error = None
+    if inserts:
+        try:
+            collection.bulk_write([request for _, _, request in inserts], ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details['writeErrors']:
+                inserts[write_error['index']][0].update(result='conflict', id=None)
+                if write_error['code'] != DUPLICATE_KEY:
+                    error = e
+            if e.details.get('writeConcernErrors'):
+                error = e
+        created = [occurrence for result, occurrence, _ in inserts if result['result'] == 'created']
+        if created:
+            ProviderPatient.link(provider_id, str(patient.id))
+            rollups.record(provider_id, [(occurrence, None, 'pending') for occurrence in created], now)
+    if error is not None:
+        # Raised only once the appointments that did go in are linked and
+        # counted, like api.bulk.set_status
+        raise error
+
+    return series_id, results
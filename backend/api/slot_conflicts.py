@@ -0,0 +1,92 @@
+"""
+Duplicate active bookings that block the provider_active_slot_unique index
+
+The unique partial index on Appointment (provider_id, appointment_date) for
+pending and confirmed appointments cannot be built while two active bookings
+share a slot, e.g. bookings made before the index existed. find() lists
+those slots with one aggregation. resolve() keeps one booking per slot and
+cancels the rest, after which the index builds. The kept booking is the
+confirmed one if any, then the earliest booked.
+Used by `manage.py resolve_slot_conflicts`.
+"""
+from collections import defaultdict
+from mongoengine.connection import get_db
+from pymongo import UpdateOne
+from api import rollups
+from api.models import ACTIVE_APPOINTMENT_STATUSES, Appointment
+
+# Confirmed bookings win over pending ones
+_PRIORITY = {'confirmed': 0, 'pending': 1}
+
+
+def _appointments():
+    # Not Appointment._get_collection(): its automatic index build is the
+    # one failing on these duplicates
+    return get_db()[Appointment._get_collection_name()]
+
+
+def find(provider_id=None):
+    """
+    [{'provider_id', 'appointment_date', 'appointments': [{'_id', 'status',
+    'patient_id', 'created_at'}, ...]}] for every slot with more than one
+    active booking, in the order resolve() keeps them (winner first)
+    """
+    match = {'status': {'$in': ACTIVE_APPOINTMENT_STATUSES}}
+    if provider_id:
+        match['provider_id'] = provider_id
+    groups = _appointments().aggregate([
+        {'$match': match},
+        {'$group': {
+            '_id': {'provider_id': '$provider_id', 'appointment_date': '$appointment_date'},
+            'appointments': {'$push': {
+                '_id': '$_id', 'status': '$status', 'patient_id': '$patient_id', 'created_at': '$created_at',
+            }},
+            'count': {'$sum': 1},
+        }},
+        {'$match': {'count': {'$gt': 1}}},
+        {'$sort': {'_id.provider_id': 1, '_id.appointment_date': 1}},
+    ], allowDiskUse=True)
+    return [
+        {
+            'provider_id': group['_id']['provider_id'],
+            'appointment_date': group['_id']['appointment_date'],
+            'appointments': sorted(
+                group['appointments'],
+                key=lambda row: (_PRIORITY.get(row['status'], 2), row.get('created_at') is None,
+                                 row.get('created_at') or 0, row['_id']),
+            ),
+        }
+        for group in groups
+    ]
+
+
+def resolve(conflicts, now):
+    """
+    Cancel every booking but the first of each slot from find(). Each update
+    is conditional on the status it was found with, and the provider's daily
+    rollups move with it. Returns the number of appointments cancelled.
+    """
+    requests = []
+    changes = []
+    for conflict in conflicts:
+        for row in conflict['appointments'][1:]:
+            requests.append(UpdateOne(
+                {'_id': row['_id'], 'status': row['status']},
+                {'$set': {'status': 'cancelled', 'updated_at': now}},
+            ))
+            changes.append((conflict['provider_id'], conflict['appointment_date'], row['status']))
+    if not requests:
+        return 0
+    modified = _appointments().bulk_write(requests, ordered=False).modified_count
+    if modified != len(requests):
+        # A concurrent change beat some updates; the rollups are rebuilt from
+        # the appointments rather than guessed
+        for provider_id in {provider_id for provider_id, _, _ in changes}:
+            rollups.rebuild(provider_id)
+        return modified
+    by_provider = defaultdict(list)
+    for provider_id, appointment_date, status in changes:
+        by_provider[provider_id].append((appointment_date, status, 'cancelled'))
+    for provider_id, transitions in by_provider.items():
+        rollups.record(provider_id, transitions, now)
+    return modified
@@ -0,0 +1,42 @@
+"""
+Single-use tickets for the appointment event stream
+
+EventSource cannot send an Authorization header, so the stream is opened
+with ?ticket= instead. Query strings end up in access logs, proxies and
+browser history, which a long-lived JWT must not. A ticket is issued to an
+already authenticated caller (POST /api/appointments/stream/ticket/), lives
+SSE_TICKET_TTL_SECONDS and is deleted when redeemed, so a logged ticket is
+useless. Only its SHA-256 is stored, so the collection holds nothing that
+can open a stream either. Tickets are kept in MongoDB so any worker can
+redeem one issued by another.
+"""
+import hashlib
+import secrets
+from datetime import timedelta
+from django.conf import settings
+from api.async_db import get_async_collection
+from api.models import StreamTicket
+
+
+def _digest(ticket):
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+
+def issue(user_id, now):
+    """(ticket, expires_at) for user_id"""
+    ticket = secrets.token_urlsafe(32)
+    expires_at = now + timedelta(seconds=settings.SSE_TICKET_TTL_SECONDS)
+    StreamTicket(id=_digest(ticket), user_id=str(user_id), expires_at=expires_at).save(force_insert=True)
+    return ticket, expires_at
+
+
+async def redeem_async(ticket, now):
+    """The user id a valid ticket was issued to, or None; the ticket is used up either way"""
+    doc = await get_async_collection(StreamTicket).find_one_and_delete(
+        {'_id': _digest(ticket)},
+        projection={'user_id': 1, 'expires_at': 1},
+    )
+    # The TTL monitor only runs once a minute, so expiry is checked here too
+    if not doc or doc['expires_at'] <= now:
+        return None
+    return doc['user_id']
@@ -0,0 +1,61 @@
+"""
+Base test case for tests that need MongoDB
+
+Tests connect MongoEngine to TEST_MONGO_URI (default a local mongod) and use
+a throwaway database, dropped afterwards. Without a reachable server they are
+skipped. TEST_MONGO_URI=mongomock:// runs them in-process on mongomock, if
+installed; tests that depend on a real server's behaviour (concurrent writes,
+partial indexes, change streams) set requires_server and skip there.
+"""
+import os
+import unittest
+import mongoengine as me
+from django.test import SimpleTestCase
+from pymongo.errors import PyMongoError
+from middleware.db_instrumentation import event_listeners
+
+TEST_MONGO_URI = os.getenv('TEST_MONGO_URI', 'mongodb://localhost:27017')
+USE_MONGOMOCK = TEST_MONGO_URI.startswith('mongomock://')
+
+
+class MongoTestCase(SimpleTestCase):
+    """Connects the default MongoEngine alias to a fresh test database"""
+
+    # Reason the test cannot run on mongomock, or None if it can
+    requires_server = None
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if USE_MONGOMOCK and cls.requires_server:
+            raise unittest.SkipTest(f'needs a MongoDB server: {cls.requires_server}')
+
+        cls.db_name = f'healthcare_test_{os.getpid()}'
+        me.disconnect()
+        if USE_MONGOMOCK:
+            try:
+                import mongomock
+            except ImportError:
+                raise unittest.SkipTest('TEST_MONGO_URI is mongomock:// but mongomock is not installed')
+            me.connect(db=cls.db_name, host='mongodb://localhost', mongo_client_class=mongomock.MongoClient,
+                       tz_aware=True)
+        else:
+            me.connect(db=cls.db_name, host=TEST_MONGO_URI, serverSelectionTimeoutMS=2000, tz_aware=True,
+                       event_listeners=event_listeners)
+            try:
+                me.get_db().client.admin.command('ping')
+            except PyMongoError as e:
+                me.disconnect()
+                raise unittest.SkipTest(f'no MongoDB at {TEST_MONGO_URI}: {str(e).split(",")[0]}')
+
+    @classmethod
+    def tearDownClass(cls):
+        me.get_db().client.drop_database(cls.db_name)
+        me.disconnect()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        db = me.get_db()
+        for name in db.list_collection_names():
+            db.drop_collection(name)
@@ -0,0 +1,57 @@
+"""
+Login under a saturated bcrypt pool
+"""
+import threading
+from unittest import mock
+import bcrypt
+from rest_framework.test import APIClient
+from api.hashing import BcryptPool
+from api.models import User
+from api.tests.base import MongoTestCase
+
+
+class LoginPoolTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        password_hash = bcrypt.hashpw(b'secret123', bcrypt.gensalt(rounds=4)).decode()
+        User(email='patient@example.com', password_hash=password_hash).save()
+        self.pool = BcryptPool(workers=1, queue_size=0)
+        patcher = mock.patch('api.hashing._pool', self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self):
+        return APIClient().post(
+            '/api/auth/login/',
+            {'email': 'patient@example.com', 'password': 'secret123'},
+            format='json',
+        )
+
+    def test_login_succeeds_with_a_free_pool(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.data)
+
+    def test_saturated_pool_returns_503_with_retry_after(self):
+        started, release = threading.Event(), threading.Event()
+
+        def hold_the_only_slot():
+            started.set()
+            release.wait(10)
+
+        holder = threading.Thread(target=self.pool.run, args=(hold_the_only_slot,))
+        holder.start()
+        try:
+            self.assertTrue(started.wait(10))
+            response = self.login()
+        finally:
+            release.set()
+            holder.join()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(response.data, {'error': 'Server busy, please retry'})
+
+        # The slot is free again once the held job finishes
+        self.assertEqual(self.login().status_code, 200)
@@ -0,0 +1,46 @@
+"""
+Concurrent bookings of one provider slot
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from rest_framework.test import APIClient
+from api.authentication import generate_token
+from api.indexes import ensure_all
+from api.models import Appointment, User
+from api.tests.base import MongoTestCase
+
+CLIENTS = 20
+
+
+class ConcurrentBookingTests(MongoTestCase):
+    requires_server = (
+        'mongomock serialises every operation, so bookings never race, and it '
+        'ignores the partial filter of provider_active_slot_unique'
+    )
+
+    def setUp(self):
+        super().setUp()
+        ensure_all()
+        self.provider = User(email='provider@example.com', password_hash='-', role='provider').save()
+        self.patients = [
+            User(email=f'patient{i}@example.com', password_hash='-', role='patient').save()
+            for i in range(CLIENTS)
+        ]
+
+    def test_one_booking_wins_a_contended_slot(self):
+        slot = (datetime.now(timezone.utc) + timedelta(days=30)).replace(minute=0, second=0, microsecond=0)
+        barrier = threading.Barrier(CLIENTS)
+
+        def book(patient):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION='Bearer ' + generate_token(str(patient.id), patient.email, 'patient'))
+            body = {'provider_id': str(self.provider.id), 'appointment_date': slot.isoformat(), 'reason': 'race'}
+            barrier.wait()
+            return client.post('/api/appointments/create/', body, format='json').status_code
+
+        with ThreadPoolExecutor(max_workers=CLIENTS) as pool:
+            statuses = sorted(pool.map(book, self.patients))
+
+        self.assertEqual(statuses, [201] + [409] * (CLIENTS - 1))
+        self.assertEqual(Appointment.objects(provider_id=str(self.provider.id), appointment_date=slot).count(), 1)
@@ -0,0 +1,126 @@
+"""
+Appointment event stream against a mocked change stream
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from django.test import override_settings
+from api.events import AppointmentEventHub
+from api.models import Appointment
+from api.pagination import encode_cursor
+from api.tests.base import MongoTestCase
+from api.views import streams
+from middleware.db_instrumentation import _current
+
+
+class FakeChangeStream:
+    """Stands in for Motor's collection.watch(); changes are fed by the test"""
+
+    def __init__(self):
+        self.changes = asyncio.Queue()
+        self.opened = asyncio.Event()
+        self.db_stats = None
+
+    def watch(self, pipeline, **kwargs):
+        return self
+
+    async def __aenter__(self):
+        self.db_stats = _current.get()
+        self.opened.set()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.changes.get()
+
+
+def parse(message):
+    """(id, event) of one SSE message"""
+    fields = dict(line.split(': ', 1) for line in message.strip().split('\n'))
+    return fields['id'], fields['event']
+
+
+class AppointmentStreamTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.hub = AppointmentEventHub()
+        self.stream = FakeChangeStream()
+        for patcher in (
+            mock.patch('api.events.get_async_collection', lambda model: self.stream),
+            mock.patch.object(streams, 'appointment_events', self.hub),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def book(self, updated_at, patient_id='patient-1'):
+        # Whole seconds, so event ids match what BSON dates round-trip to
+        updated_at = updated_at.replace(microsecond=0)
+        appointment = Appointment(
+            patient_id=patient_id,
+            provider_id='provider-1',
+            appointment_date=updated_at + timedelta(days=7),
+            created_at=updated_at,
+            updated_at=updated_at,
+        )
+        appointment.save()
+        return appointment
+
+    def change(self, appointment):
+        doc = Appointment._get_collection().find_one({'_id': appointment.id})
+        return {'operationType': 'insert', 'fullDocument': doc}
+
+    def event_id(self, appointment):
+        return encode_cursor(appointment.updated_at, appointment.id)
+
+    async def test_replays_from_last_event_id_then_streams_live(self):
+        start = datetime.now(timezone.utc) - timedelta(hours=1)
+        seen, missed_1, missed_2 = [self.book(start + timedelta(minutes=i)) for i in range(3)]
+
+        subscription = self.hub.subscribe('patient-1')
+        events = streams._event_stream(subscription, {'patient_id': 'patient-1'}, self.event_id(seen))
+        self.assertTrue((await anext(events)).startswith('retry: '))
+        replayed = [parse(await anext(events)) for _ in range(2)]
+        self.assertEqual(replayed, [(self.event_id(missed_1), 'created'), (self.event_id(missed_2), 'created')])
+
+        live = self.book(datetime.now(timezone.utc))
+        await self.stream.changes.put(self.change(live))
+        self.assertEqual(parse(await asyncio.wait_for(anext(events), 5)), (self.event_id(live), 'created'))
+
+        await events.aclose()
+        self.assertTrue(subscription.closed)
+        self.assertIsNone(self.hub._task)
+
+    @override_settings(SSE_QUEUE_SIZE=2)
+    async def test_slow_consumer_is_dropped(self):
+        subscription = self.hub.subscribe('patient-1')
+        events = streams._event_stream(subscription, {'patient_id': 'patient-1'}, None)
+        await asyncio.wait_for(self.stream.opened.wait(), 5)
+
+        start = datetime.now(timezone.utc) - timedelta(hours=1)
+        with self.assertLogs('api.events', 'WARNING') as logs:
+            for i in range(3):
+                await self.stream.changes.put(self.change(self.book(start + timedelta(minutes=i))))
+            while not subscription.closed:
+                await asyncio.sleep(0.01)
+        self.assertIn('Dropping slow event subscriber for patient-1', logs.output[0])
+
+        # The queued events are discarded and the stream ends; the client
+        # reconnects with Last-Event-ID and replays them
+        self.assertEqual([message async for message in events], [f'retry: {streams.settings.SSE_RETRY_MS}\n\n'])
+        self.assertIsNone(self.hub._task)
+
+    async def test_change_stream_runs_outside_the_subscribing_request(self):
+        token = _current.set(object())
+        try:
+            subscription = self.hub.subscribe('patient-1')
+        finally:
+            _current.reset(token)
+        await asyncio.wait_for(self.stream.opened.wait(), 5)
+        self.assertIsNone(self.stream.db_stats)
+        self.hub.unsubscribe(subscription)
@@ -1 +1,41 @@
-# URL routing init
+"""
+URL routing init
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def lazy_view(dotted_path, is_async=False):
+    """
+    View that imports `dotted_path` (an APIView subclass or a view function)
+    on its first request.
+
+    Loading the URLconf (system checks, reverse(), the metrics route list)
+    then does not import DRF and every view module. The wrapper is marked
+    csrf_exempt like the APIViews it stands for; async views must pass
+    is_async so Django still awaits them. With LEAN_STARTUP=False the view is
+    imported immediately.
+    """
+    view = None
+
+    def resolve():
+        nonlocal view
+        if view is None:
+            target = import_string(dotted_path)
+            view = target.as_view() if isinstance(target, type) else target
+        return view
+
+    if not settings.LEAN_STARTUP:
+        return resolve()
+
+    if is_async:
+        async def wrapper(request, *args, **kwargs):
+            return await resolve()(request, *args, **kwargs)
+    else:
+        def wrapper(request, *args, **kwargs):
+            return resolve()(request, *args, **kwargs)
+    wrapper.csrf_exempt = True
+    wrapper.resolve = resolve
+    wrapper.__name__ = wrapper.__qualname__ = dotted_path.rsplit('.', 1)[-1]
+    wrapper.__module__ = dotted_path.rsplit('.', 1)[0]
+    return wrapper
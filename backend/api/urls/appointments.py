@@ -1,17 +1,40 @@
 """
 Appointment URLs
 """
+from django.conf import settings
 from django.urls import path
-from api.views.appointments import (
-    AppointmentListView,
-    AppointmentCreateView,
-    AppointmentDetailView,
-    DoctorAppointmentsView,
-)
+from api.urls import lazy_view
+
+VIEWS = 'api.views.appointments'
+
+appointment_list = lazy_view(f'{VIEWS}.AppointmentListView')
+appointment_detail = lazy_view(f'{VIEWS}.AppointmentDetailView')
+
+if settings.ASYNC_API:
+    appointment_list = lazy_view('api.views.async_reads.appointment_list', is_async=True)
+    appointment_detail = lazy_view('api.views.async_reads.appointment_detail', is_async=True)
 
 urlpatterns = [
-    path('', AppointmentListView.as_view(), name='appointment-list'),
-    path('create/', AppointmentCreateView.as_view(), name='appointment-create'),
-    path('<str:appointment_id>/', AppointmentDetailView.as_view(), name='appointment-detail'),
-    path('doctor/<str:doctor_id>/', DoctorAppointmentsView.as_view(), name='doctor-appointments'),
+    path('', appointment_list, name='appointment-list'),
+    path('create/', lazy_view(f'{VIEWS}.AppointmentCreateView'), name='appointment-create'),
+    path('series/', lazy_view(f'{VIEWS}.AppointmentSeriesView'), name='appointment-series'),
+    path('changes/', lazy_view(f'{VIEWS}.AppointmentChangesView'), name='appointment-changes'),
+    path('bulk/status/', lazy_view(f'{VIEWS}.AppointmentBulkStatusView'), name='appointment-bulk-status'),
+    path('<str:appointment_id>/', appointment_detail, name='appointment-detail'),
+    path('doctor/<str:doctor_id>/', lazy_view(f'{VIEWS}.DoctorAppointmentsView'), name='doctor-appointments'),
 ]
+
+if settings.ASYNC_API:
+    # Long-lived streams need the ASGI server; must precede the detail route
+    urlpatterns[2:2] = [
+        path(
+            'stream/',
+            lazy_view('api.views.streams.appointment_stream', is_async=True),
+            name='appointment-stream'
+        ),
+        path(
+            'stream/ticket/',
+            lazy_view('api.views.streams.AppointmentStreamTicketView'),
+            name='appointment-stream-ticket'
+        ),
+    ]
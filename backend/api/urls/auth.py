@@ -2,13 +2,13 @@
 Authentication URLs
 """
 from django.urls import path
-from api.views.auth import (
-    RegisterView, LoginView, LogoutView, ProfileView
-)
+from api.urls import lazy_view
+
+VIEWS = 'api.views.auth'
 
 urlpatterns = [
-    path('register/', RegisterView.as_view(), name='register'),
-    path('login/', LoginView.as_view(), name='login'),
-    path('logout/', LogoutView.as_view(), name='logout'),
-    path('profile/', ProfileView.as_view(), name='profile'),
+    path('register/', lazy_view(f'{VIEWS}.RegisterView'), name='register'),
+    path('login/', lazy_view(f'{VIEWS}.LoginView'), name='login'),
+    path('logout/', lazy_view(f'{VIEWS}.LogoutView'), name='logout'),
+    path('profile/', lazy_view(f'{VIEWS}.ProfileView'), name='profile'),
 ]
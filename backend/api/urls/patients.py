@@ -2,12 +2,14 @@
 Patient URLs
 """
 from django.urls import path
-from api.views.patients import (
-    PatientListView, PatientDetailView, PatientUpdateView
-)
+from api.urls import lazy_view
+
+VIEWS = 'api.views.patients'
 
 urlpatterns = [
-    path('', PatientListView.as_view(), name='patient-list'),
-    path('<str:patient_id>/', PatientDetailView.as_view(), name='patient-detail'),
-    path('<str:patient_id>/update/', PatientUpdateView.as_view(), name='patient-update'),
+    path('', lazy_view(f'{VIEWS}.PatientListView'), name='patient-list'),
+    path('<str:patient_id>/', lazy_view(f'{VIEWS}.PatientDetailView'), name='patient-detail'),
+    path('<str:patient_id>/update/', lazy_view(f'{VIEWS}.PatientUpdateView'), name='patient-update'),
+    path('<str:patient_id>/vitals/', lazy_view('api.views.vitals.PatientVitalsView'), name='patient-vitals'),
+    path('<str:patient_id>/trends/', lazy_view('api.views.vitals.PatientTrendsView'), name='patient-trends'),
 ]
@@ -1,14 +1,25 @@
 """
 Provider URLs
 """
+from django.conf import settings
 from django.urls import path
-from api.views.providers import (
-    ProviderListView, ProviderDetailView, ProviderCreateView, ProviderUpdateView
-)
+from api.urls import lazy_view
+
+VIEWS = 'api.views.providers'
+
+provider_list = lazy_view(f'{VIEWS}.ProviderListView')
+provider_detail = lazy_view(f'{VIEWS}.ProviderDetailView')
+
+if settings.ASYNC_API:
+    provider_list = lazy_view('api.views.async_reads.provider_list', is_async=True)
+    provider_detail = lazy_view('api.views.async_reads.provider_detail', is_async=True)
 
 urlpatterns = [
-    path('', ProviderListView.as_view(), name='provider-list'),
-    path('create/', ProviderCreateView.as_view(), name='provider-create'),
-    path('<str:provider_id>/', ProviderDetailView.as_view(), name='provider-detail'),
-    path('<str:provider_id>/update/', ProviderUpdateView.as_view(), name='provider-update'),
+    path('', provider_list, name='provider-list'),
+    path('create/', lazy_view(f'{VIEWS}.ProviderCreateView'), name='provider-create'),
+    path('<str:provider_id>/', provider_detail, name='provider-detail'),
+    path('<str:provider_id>/update/', lazy_view(f'{VIEWS}.ProviderUpdateView'), name='provider-update'),
+    path('<str:provider_id>/availability/', lazy_view(f'{VIEWS}.ProviderAvailabilityView'), name='provider-availability'),
+    path('<str:provider_id>/patients/', lazy_view(f'{VIEWS}.ProviderPatientsView'), name='provider-patients'),
+    path('<str:provider_id>/stats/', lazy_view(f'{VIEWS}.ProviderStatsView'), name='provider-stats'),
 ]
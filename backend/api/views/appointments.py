@@ -6,51 +6,104 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 import logging
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
+from django.conf import settings
 from django.utils import timezone
-from api.models import Appointment, User, ProviderProfile, PatientProfile
-from api.serializers import AppointmentSerializer, AppointmentCreateSerializer, AppointmentUpdateSerializer
+from mongoengine.errors import NotUniqueError, SaveConditionError
+from api import bulk, rollups, series
+from api.authentication import get_user_state
+from api.conditional import collection_validator, etag_matches, make_etag, not_modified, with_etag
+from api.models import ACTIVE_APPOINTMENT_STATUSES, Appointment, User, ProviderProfile, ProviderPatient
+from api.serializers import (
+    AppointmentBulkStatusSerializer,
+    AppointmentCreateSerializer,
+    AppointmentSerializer,
+    AppointmentSeriesSerializer,
+    AppointmentUpdateSerializer,
+)
+from api.pagination import (
+    PaginationError,
+    changes_since,
+    paginate_by_date,
+    parse_datetime_param,
+    parse_limit,
+    parse_status_param,
+)
+from api.queries import APPOINTMENT_MAPPER, fetch_records
 
 logger = logging.getLogger(__name__)
 
 
 class AppointmentListView(APIView):
-    """Get appointments - patients see their appointments, doctors see their booked appointments"""
+    """
+    Get appointments - patients see their appointments, doctors see their booked appointments
+
+    Query params: from, to, status (comma separated), limit, cursor.
+    Results are ordered by appointment_date and paged with an opaque next_cursor.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
         try:
-            user = User.objects(id=request.user.id).first()
-            
-            if not user:
-                return Response(
-                    {'error': 'User not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+            user = request.user
             
             # Patients see their own appointments
             if user.role == 'patient':
                 appointments = Appointment.objects(patient_id=str(user.id))
-                appointments_data = [apt.to_dict() for apt in appointments]
-                return Response(
-                    {'appointments': appointments_data},
-                    status=status.HTTP_200_OK
-                )
             
             # Doctors/providers see appointments booked with them
             elif user.role == 'provider':
                 appointments = Appointment.objects(provider_id=str(user.id))
-                appointments_data = [apt.to_dict() for apt in appointments]
-                return Response(
-                    {'appointments': appointments_data},
-                    status=status.HTTP_200_OK
-                )
             
             else:
                 return Response(
                     {'error': 'Insufficient permissions'},
                     status=status.HTTP_403_FORBIDDEN
                 )
+            
+            # Any insert, update or cancellation changes the count or newest updated_at
+            count, latest = collection_validator(appointments)
+            etag = make_etag('appointments', user.id, request.get_full_path(), count, latest)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            
+            try:
+                limit = parse_limit(request.query_params.get('limit'))
+                date_from = parse_datetime_param('from', request.query_params.get('from'))
+                date_to = parse_datetime_param('to', request.query_params.get('to'), end_of_day=True)
+                statuses = parse_status_param(
+                    request.query_params.get('status'),
+                    Appointment.status.choices
+                )
+                
+                if date_from:
+                    appointments = appointments.filter(appointment_date__gte=date_from)
+                if date_to:
+                    appointments = appointments.filter(appointment_date__lte=date_to)
+                if statuses:
+                    appointments = appointments.filter(status__in=statuses)
+                
+                page, next_cursor = paginate_by_date(
+                    appointments,
+                    request.query_params.get('cursor'),
+                    limit,
+                    APPOINTMENT_MAPPER
+                )
+            except PaginationError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            response = Response(
+                {
+                    'appointments': page,
+                    'next_cursor': next_cursor,
+                },
+                status=status.HTTP_200_OK
+            )
+            return with_etag(response, etag)
         
         except Exception as e:
             logger.error(f'Error fetching appointments: {str(e)}')
@@ -60,15 +113,80 @@ class AppointmentListView(APIView):
             )
 
 
+class AppointmentChangesView(APIView):
+    """
+    Incremental sync - appointments created or updated since a change token
+
+    Query params: since (token from the previous response; omit for a full
+    sync), limit. Cancelled appointments are returned as tombstones. Keep
+    calling with next_token while has_more is true.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            user = request.user
+            
+            if user.role == 'patient':
+                appointments = Appointment.objects(patient_id=str(user.id))
+            elif user.role == 'provider':
+                appointments = Appointment.objects(provider_id=str(user.id))
+            else:
+                return Response(
+                    {'error': 'Insufficient permissions'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            settled_before = timezone.now() - timedelta(seconds=settings.APPOINTMENT_CHANGES_SETTLE_SECONDS)
+            try:
+                records, next_token, has_more = changes_since(
+                    appointments,
+                    request.query_params.get('since'),
+                    parse_limit(request.query_params.get('limit')),
+                    APPOINTMENT_MAPPER,
+                    settled_before
+                )
+            except PaginationError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            changed = []
+            cancelled = []
+            for record in records:
+                if record['status'] == 'cancelled':
+                    cancelled.append({'id': record['id'], 'updated_at': record['updated_at']})
+                else:
+                    changed.append(record)
+            
+            return Response(
+                {
+                    'appointments': changed,
+                    'cancelled': cancelled,
+                    'next_token': next_token,
+                    'has_more': has_more,
+                },
+                status=status.HTTP_200_OK
+            )
+        
+        except Exception as e:
+            logger.error(f'Error fetching appointment changes: {str(e)}')
+            return Response(
+                {'error': 'Failed to fetch appointment changes'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class AppointmentCreateView(APIView):
     """Create new appointment (patients only)"""
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
         try:
-            user = User.objects(id=request.user.id).first()
+            user = request.user
             
-            if not user or user.role != 'patient':
+            if user.role != 'patient':
                 return Response(
                     {'error': 'Only patients can book appointments'},
                     status=status.HTTP_403_FORBIDDEN
@@ -90,45 +208,41 @@ class AppointmentCreateView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Get provider
-            provider = User.objects(id=serializer.validated_data['provider_id']).first()
-            if not provider or provider.role != 'provider':
+            # Get provider (cached account state, no Document load)
+            provider_id = serializer.validated_data['provider_id']
+            provider = get_user_state(provider_id)
+            if not provider or provider['role'] != 'provider':
                 return Response(
                     {'error': 'Provider not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Check for duplicate appointments (same patient, doctor, time)
-            existing_apt = Appointment.objects(
-                patient_id=str(user.id),
-                provider_id=str(provider.id),
-                appointment_date=apt_date,
-                status__in=['pending', 'confirmed']
-            ).first()
-            
-            if existing_apt:
-                return Response(
-                    {'error': 'You already have an appointment at this time with this doctor'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Create appointment
+            # Create appointment. Double booking is rejected by the unique
+            # partial index on (provider_id, appointment_date) for active
+            # statuses, so no find-then-insert race is possible.
+            now = timezone.now()
             appointment = Appointment(
                 patient_id=str(user.id),
-                provider_id=str(provider.id),
+                provider_id=provider_id,
                 appointment_date=apt_date,
                 reason=serializer.validated_data.get('reason', ''),
                 status='pending',
                 patient_email=user.email,
-                provider_email=provider.email,
+                provider_email=provider['email'],
+                created_at=now,
+                updated_at=now,
             )
-            appointment.save()
+            try:
+                appointment.save(force_insert=True)
+            except NotUniqueError:
+                return Response(
+                    {'error': 'This time slot is already booked with this doctor'},
+                    status=status.HTTP_409_CONFLICT
+                )
             
-            # Add patient to provider's patient list if not already there
-            provider_profile = ProviderProfile.objects(user_id=str(provider.id)).first()
-            if provider_profile and str(user.id) not in provider_profile.patients:
-                provider_profile.patients.append(str(user.id))
-                provider_profile.save()
+            # Record the provider <-> patient relationship (idempotent upsert)
+            ProviderPatient.link(provider_id, str(user.id))
+            rollups.record(provider_id, [(apt_date, None, 'pending')], now)
             
             return Response(
                 {
@@ -146,13 +260,86 @@ class AppointmentCreateView(APIView):
             )
 
 
+class AppointmentSeriesView(APIView):
+    """
+    Book a recurring series of appointments (patients only)
+
+    Body: provider_id, appointment_date (first occurrence), rule (RRULE
+    subset, see api.recurrence) and reason. Free occurrences are booked and
+    taken ones reported as conflicts; 201 when at least one was booked,
+    409 when none could be.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        try:
+            user = request.user
+            
+            if user.role != 'patient':
+                return Response(
+                    {'error': 'Only patients can book appointments'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            serializer = AppointmentSeriesSerializer(data=request.data)
+            
+            if not serializer.is_valid():
+                return Response(
+                    {'error': serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            if serializer.validated_data['appointment_date'] < timezone.now():
+                return Response(
+                    {'error': 'Appointment date must be in the future'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            provider_id = serializer.validated_data['provider_id']
+            provider = get_user_state(provider_id)
+            if not provider or provider['role'] != 'provider':
+                return Response(
+                    {'error': 'Provider not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            series_id, results = series.book_series(
+                user,
+                provider_id,
+                provider['email'],
+                serializer.validated_data['occurrences'],
+                serializer.validated_data['reason'],
+                timezone.now()
+            )
+            created = sum(1 for result in results if result['result'] == 'created')
+            
+            return Response(
+                {
+                    'message': f'{created} of {len(results)} appointments booked',
+                    'series_id': series_id,
+                    'created': created,
+                    'conflicts': len(results) - created,
+                    'results': results,
+                },
+                status=status.HTTP_201_CREATED if created else status.HTTP_409_CONFLICT
+            )
+        
+        except Exception as e:
+            logger.error(f'Error booking appointment series: {str(e)}')
+            return Response(
+                {'error': 'Failed to book appointment series'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class AppointmentDetailView(APIView):
     """Get, update, or cancel appointment"""
     permission_classes = [IsAuthenticated]
     
     def get(self, request, appointment_id):
         try:
-            appointment = Appointment.objects(id=appointment_id).first()
+            rows = fetch_records(Appointment.objects(id=appointment_id).limit(1), APPOINTMENT_MAPPER)
+            appointment = rows[0] if rows else None
             
             if not appointment:
                 return Response(
@@ -160,24 +347,29 @@ class AppointmentDetailView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            user = User.objects(id=request.user.id).first()
+            user = request.user
             
             # Check if user is authorized to view this appointment
-            if user.role == 'patient' and appointment.patient_id != str(user.id):
+            if user.role == 'patient' and appointment['patient_id'] != str(user.id):
                 return Response(
                     {'error': 'Not authorized to view this appointment'},
                     status=status.HTTP_403_FORBIDDEN
                 )
-            elif user.role == 'provider' and appointment.provider_id != str(user.id):
+            elif user.role == 'provider' and appointment['provider_id'] != str(user.id):
                 return Response(
                     {'error': 'Not authorized to view this appointment'},
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            return Response(
-                {'appointment': appointment.to_dict()},
+            etag = make_etag('appointment', appointment['id'], appointment['updated_at'])
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            
+            response = Response(
+                {'appointment': appointment},
                 status=status.HTTP_200_OK
             )
+            return with_etag(response, etag)
         
         except Exception as e:
             logger.error(f'Error fetching appointment: {str(e)}')
@@ -197,7 +389,7 @@ class AppointmentDetailView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            user = User.objects(id=request.user.id).first()
+            user = request.user
             
             # Only provider can update appointment
             if user.role != 'provider' or appointment.provider_id != str(user.id):
@@ -214,11 +406,30 @@ class AppointmentDetailView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
+            previous = appointment.status
             appointment.status = serializer.validated_data['status']
             if 'notes' in serializer.validated_data:
                 appointment.notes = serializer.validated_data['notes']
             appointment.updated_at = timezone.now()
-            appointment.save()
+            try:
+                # Only over the status read above, so the daily rollups
+                # record the transition that actually happened
+                appointment.save(save_condition={'status': previous})
+            except NotUniqueError:
+                return Response(
+                    {'error': 'This time slot is already booked with this doctor'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            except SaveConditionError:
+                return Response(
+                    {'error': 'Appointment was changed by another request; reload and retry'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            rollups.record(
+                appointment.provider_id,
+                [(appointment.appointment_date, previous, appointment.status)],
+                appointment.updated_at
+            )
             
             return Response(
                 {
@@ -246,7 +457,7 @@ class AppointmentDetailView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            user = User.objects(id=request.user.id).first()
+            user = request.user
             
             # Check authorization
             if user.role == 'patient' and appointment.patient_id != str(user.id):
@@ -261,9 +472,21 @@ class AppointmentDetailView(APIView):
                 )
             
             # Cancel instead of delete
+            previous = appointment.status
             appointment.status = 'cancelled'
             appointment.updated_at = timezone.now()
-            appointment.save()
+            try:
+                appointment.save(save_condition={'status': previous})
+            except SaveConditionError:
+                return Response(
+                    {'error': 'Appointment was changed by another request; reload and retry'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            rollups.record(
+                appointment.provider_id,
+                [(appointment.appointment_date, previous, 'cancelled')],
+                appointment.updated_at
+            )
             
             return Response(
                 {'message': 'Appointment cancelled successfully'},
@@ -278,6 +501,95 @@ class AppointmentDetailView(APIView):
             )
 
 
+class AppointmentBulkStatusView(APIView):
+    """
+    Change the status of many appointments in one request (doctors only)
+
+    Body: status, optional notes, and either ids (appointment ids) or from and
+    to (ISO dates or datetimes; selects the doctor's pending and confirmed
+    appointments in the range). At most APPOINTMENT_BULK_MAX appointments per
+    request. Each one is reported as updated, unchanged, not_found or conflict
+    (its slot was booked again since it was cancelled).
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        try:
+            user = request.user
+            
+            if user.role != 'provider':
+                return Response(
+                    {'error': 'Only doctors can update appointments in bulk'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            serializer = AppointmentBulkStatusSerializer(data=request.data)
+            
+            if not serializer.is_valid():
+                return Response(
+                    {'error': serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            try:
+                date_from = parse_datetime_param('from', request.data.get('from'))
+                date_to = parse_datetime_param('to', request.data.get('to'), end_of_day=True)
+            except PaginationError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            ids = serializer.validated_data.get('ids')
+            has_range = date_from is not None or date_to is not None
+            if (ids is not None) == has_range or (has_range and not (date_from and date_to)):
+                return Response(
+                    {'error': 'Provide either ids or both from and to'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            new_status = serializer.validated_data['status']
+            limit = settings.APPOINTMENT_BULK_MAX
+            if ids is not None:
+                targets = bulk.parse_ids(ids)
+            else:
+                targets = bulk.select_range(str(user.id), new_status, date_from, date_to, limit + 1)
+            if len(targets) > limit:
+                return Response(
+                    {'error': f'At most {limit} appointments can be updated per request'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            results = bulk.set_status(
+                str(user.id),
+                targets,
+                new_status,
+                serializer.validated_data.get('notes'),
+                timezone.now()
+            )
+            counts = Counter(result['result'] for result in results)
+            
+            return Response(
+                {
+                    'message': f'{counts["updated"]} appointment(s) updated to {new_status}',
+                    'status': new_status,
+                    'counts': {
+                        outcome: counts[outcome]
+                        for outcome in ('updated', 'unchanged', 'not_found', 'conflict')
+                    },
+                    'results': results,
+                },
+                status=status.HTTP_200_OK
+            )
+        
+        except Exception as e:
+            logger.error(f'Error updating appointments in bulk: {str(e)}')
+            return Response(
+                {'error': 'Failed to update appointments'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class DoctorAppointmentsView(APIView):
     """Get all appointments for a specific doctor (public endpoint)"""
     permission_classes = [IsAuthenticated]
@@ -294,9 +606,12 @@ class DoctorAppointmentsView(APIView):
                 )
             
             # Get appointments with confirmed or pending status
-            appointments = Appointment.objects(
-                provider_id=str(doctor.id),
-                status__in=['pending', 'confirmed']
+            appointments_data = fetch_records(
+                Appointment.objects(
+                    provider_id=str(doctor.id),
+                    status__in=ACTIVE_APPOINTMENT_STATUSES
+                ),
+                APPOINTMENT_MAPPER
             )
             
             doctor_profile = ProviderProfile.objects(user_id=str(doctor.id)).first()
@@ -310,8 +625,8 @@ class DoctorAppointmentsView(APIView):
                         'clinic_address': doctor_profile.clinic_address if doctor_profile else '',
                         'available_hours': doctor_profile.available_hours if doctor_profile else {},
                     },
-                    'appointments': [apt.to_dict() for apt in appointments],
-                    'booked_count': appointments.count(),
+                    'appointments': appointments_data,
+                    'booked_count': len(appointments_data),
                 },
                 status=status.HTTP_200_OK
             )
@@ -0,0 +1,253 @@
+"""
+Native async read views for the ASGI entry point
+
+Serve the hot read endpoints (appointment list/detail on Motor, provider
+list/detail from the directory cache) without tying up a thread per in-flight
+request. Enabled by the
+ASYNC_API setting (off by default); other HTTP methods on the same URLs are
+delegated to the synchronous DRF views.
+"""
+import functools
+import logging
+from asgiref.sync import sync_to_async
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from api.authentication import authenticate_async
+from api.async_db import get_async_collection
+from api.conditional import collection_validator_async, etag_matches, make_etag, not_modified, with_etag
+from api.directory_cache import directory_version, provider_directory, provider_entry
+from api.models import Appointment
+from api.pagination import (
+    PaginationError,
+    encode_cursor,
+    keyset_after,
+    parse_datetime_param,
+    parse_limit,
+    parse_status_param,
+)
+from api.queries import APPOINTMENT_MAPPER
+from api.views.appointments import AppointmentDetailView
+
+logger = logging.getLogger(__name__)
+
+_appointment_detail_sync = sync_to_async(AppointmentDetailView.as_view())
+_directory_version = sync_to_async(directory_version, thread_sensitive=False)
+_provider_directory = sync_to_async(provider_directory, thread_sensitive=False)
+_provider_entry = sync_to_async(provider_entry, thread_sensitive=False)
+
+
+def async_api_view(view=None, *, ticket_param=None):
+    """
+    Authenticate with JWTAuthentication semantics and map errors to JSON.
+
+    The authenticated Principal is passed to the view as `user`. ticket_param
+    names a query parameter that may carry a single-use stream ticket
+    instead of the Authorization header.
+    """
+    if view is None:
+        return functools.partial(async_api_view, ticket_param=ticket_param)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return JsonResponse(
+                {'detail': f'Method "{request.method}" not allowed.'},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+        try:
+            user = await authenticate_async(request, ticket_param=ticket_param)
+        except AuthenticationFailed as e:
+            return JsonResponse({'detail': str(e.detail)}, status=status.HTTP_403_FORBIDDEN)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return await view(request, user, *args, **kwargs)
+
+    # django.views.decorators.csrf.csrf_exempt only wraps sync views in 4.2
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+@async_api_view
+async def appointment_list(request, user):
+    """Async AppointmentListView.get"""
+    try:
+        if user.role == 'patient':
+            query = {'patient_id': str(user.id)}
+        elif user.role == 'provider':
+            query = {'provider_id': str(user.id)}
+        else:
+            return JsonResponse(
+                {'error': 'Insufficient permissions'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        collection = get_async_collection(Appointment)
+        count, latest = await collection_validator_async(collection, query)
+        etag = make_etag('appointments', user.id, request.get_full_path(), count, latest)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        try:
+            limit = parse_limit(request.GET.get('limit'))
+            date_from = parse_datetime_param('from', request.GET.get('from'))
+            date_to = parse_datetime_param('to', request.GET.get('to'), end_of_day=True)
+            statuses = parse_status_param(request.GET.get('status'), Appointment.status.choices)
+
+            date_range = {}
+            if date_from:
+                date_range['$gte'] = date_from
+            if date_to:
+                date_range['$lte'] = date_to
+            if date_range:
+                query['appointment_date'] = date_range
+            if statuses:
+                query['status'] = {'$in': statuses}
+            if request.GET.get('cursor'):
+                query = {'$and': [query, keyset_after(request.GET['cursor'])]}
+        except PaginationError as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        cursor = (
+            collection
+            .find(query, APPOINTMENT_MAPPER.projection)
+            .sort([('appointment_date', 1), ('_id', 1)])
+            .limit(limit + 1)
+        )
+        rows = await cursor.to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['appointment_date'], rows[-1]['_id'])
+
+        response = JsonResponse(
+            {'appointments': APPOINTMENT_MAPPER.map_many(rows), 'next_cursor': next_cursor},
+            status=status.HTTP_200_OK
+        )
+        return with_etag(response, etag)
+
+    except Exception as e:
+        logger.error(f'Error fetching appointments: {str(e)}')
+        return JsonResponse(
+            {'error': 'Failed to fetch appointments'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+async def appointment_detail(request, appointment_id):
+    """Async AppointmentDetailView: GET served natively, PUT/DELETE delegated"""
+    if request.method != 'GET':
+        return await _appointment_detail_sync(request, appointment_id=appointment_id)
+    return await _appointment_detail_get(request, appointment_id=appointment_id)
+
+
+appointment_detail.csrf_exempt = True
+
+
+@async_api_view
+async def _appointment_detail_get(request, user, appointment_id):
+    try:
+        try:
+            object_id = ObjectId(appointment_id)
+        except (InvalidId, TypeError):
+            object_id = None
+
+        row = None
+        if object_id is not None:
+            row = await get_async_collection(Appointment).find_one(
+                {'_id': object_id},
+                APPOINTMENT_MAPPER.projection
+            )
+
+        if not row:
+            return JsonResponse(
+                {'error': 'Appointment not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if (
+            (user.role == 'patient' and row.get('patient_id') != str(user.id))
+            or (user.role == 'provider' and row.get('provider_id') != str(user.id))
+        ):
+            return JsonResponse(
+                {'error': 'Not authorized to view this appointment'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        appointment = APPOINTMENT_MAPPER(row)
+        etag = make_etag('appointment', appointment['id'], appointment['updated_at'])
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        response = JsonResponse(
+            {'appointment': appointment},
+            status=status.HTTP_200_OK
+        )
+        return with_etag(response, etag)
+
+    except Exception as e:
+        logger.error(f'Error fetching appointment: {str(e)}')
+        return JsonResponse(
+            {'error': 'Failed to fetch appointment'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_api_view
+async def provider_list(request, user):
+    """Async ProviderListView.get"""
+    try:
+        version = await _directory_version()
+        etag = make_etag('providers', version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        providers_data = await _provider_directory(version)
+
+        response = JsonResponse(
+            {'providers': providers_data, 'count': len(providers_data)},
+            status=status.HTTP_200_OK
+        )
+        return with_etag(response, etag)
+    except Exception as e:
+        logger.error(f'Provider list error: {str(e)}')
+        return JsonResponse(
+            {'error': 'Failed to fetch providers'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_api_view
+async def provider_detail(request, user, provider_id):
+    """Async ProviderDetailView.get"""
+    try:
+        version = await _directory_version()
+        etag = make_etag('provider', provider_id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        provider = await _provider_entry(provider_id, version)
+
+        if not provider:
+            return JsonResponse(
+                {'error': 'Provider not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        response = JsonResponse(
+            provider,
+            status=status.HTTP_200_OK
+        )
+        return with_etag(response, etag)
+    except Exception as e:
+        logger.error(f'Provider detail error: {str(e)}')
+        return JsonResponse(
+            {'error': 'Failed to fetch provider'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -9,11 +9,21 @@ import logging
 from api.models import User, PatientProfile, ProviderProfile
 from api.serializers import RegisterSerializer, LoginSerializer, TokenResponseSerializer
 from api.authentication import generate_token
+from api.hashing import PasswordHasherBusy
 from mongoengine.errors import NotUniqueError
 
 logger = logging.getLogger(__name__)
 
 
+def busy_response():
+    """503 for when the bcrypt pool is saturated; clients should retry shortly"""
+    return Response(
+        {'error': 'Server busy, please retry'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '1'}
+    )
+
+
 class RegisterView(APIView):
     """User registration endpoint - patients only"""
     permission_classes = [AllowAny]
@@ -68,6 +78,8 @@ class RegisterView(APIView):
                 {'error': 'Email already registered'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except PasswordHasherBusy:
+            return busy_response()
         except Exception as e:
             logger.error(f'Registration error: {str(e)}')
             return Response(
@@ -108,6 +120,15 @@ class LoginView(APIView):
                     status=status.HTTP_401_UNAUTHORIZED
                 )
             
+            # Upgrade hashes made with a different work factor while we
+            # still have the plaintext; a busy pool just defers it
+            if user.password_needs_rehash():
+                try:
+                    user.set_password(password)
+                    User.objects(id=user.id).update_one(set__password_hash=user.password_hash)
+                except PasswordHasherBusy:
+                    pass
+            
             # Generate token
             token = generate_token(str(user.id), user.email, user.role)
             
@@ -122,6 +143,8 @@ class LoginView(APIView):
                 status=status.HTTP_200_OK
             )
         
+        except PasswordHasherBusy:
+            return busy_response()
         except Exception as e:
             logger.error(f'Login error: {str(e)}')
             return Response(
@@ -0,0 +1,42 @@
+"""
+Prometheus metrics endpoint
+
+Route names, latencies and error rates describe the deployment, so the
+endpoint only answers the addresses in METRICS_ALLOWED_IPS or a scraper
+presenting METRICS_TOKEN.
+"""
+import functools
+import hmac
+import ipaddress
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from api.metrics import get_registry
+
+
+@functools.lru_cache(maxsize=1)
+def _allowed_networks(allowed_ips):
+    return tuple(ipaddress.ip_network(ip.strip(), strict=False) for ip in allowed_ips)
+
+
+def metrics_allowed(request):
+    """Whether the request may read the metrics"""
+    token = settings.METRICS_TOKEN
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+            return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in network for network in _allowed_networks(tuple(settings.METRICS_ALLOWED_IPS)))
+
+
+def metrics_view(request):
+    """Per-route metrics aggregated over every worker process"""
+    if not metrics_allowed(request):
+        return JsonResponse({'detail': 'Not allowed to read metrics.'}, status=403)
+    return HttpResponse(
+        get_registry().render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
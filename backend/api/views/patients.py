@@ -6,7 +6,11 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 import logging
-from api.models import PatientProfile, User
+from django.utils import timezone
+from api.conditional import collection_validator, etag_matches, make_etag, not_modified, with_etag
+from api.models import PatientProfile
+from api.patch import PatchError, apply_update, build_update
+from api.queries import PATIENT_PROFILE_MAPPER, fetch_records
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +21,7 @@ class PatientListView(APIView):
     
     def get(self, request):
         try:
-            user = User.objects(id=request.user.id).first()
+            user = request.user
             
             # Only providers and admins can view patients
             if user.role not in ['provider', 'admin']:
@@ -26,13 +30,18 @@ class PatientListView(APIView):
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            patients = PatientProfile.objects()
-            patients_data = [p.to_dict() for p in patients]
+            count, latest = collection_validator(PatientProfile.objects())
+            etag = make_etag('patients', count, latest)
+            if etag_matches(request, etag):
+                return not_modified(etag)
             
-            return Response(
+            patients_data = fetch_records(PatientProfile.objects(), PATIENT_PROFILE_MAPPER)
+            
+            response = Response(
                 {'patients': patients_data, 'count': len(patients_data)},
                 status=status.HTTP_200_OK
             )
+            return with_etag(response, etag)
         except Exception as e:
             logger.error(f'Patient list error: {str(e)}')
             return Response(
@@ -47,9 +56,10 @@ class PatientDetailView(APIView):
     
     def get(self, request, patient_id):
         try:
-            user = User.objects(id=request.user.id).first()
+            user = request.user
             
-            patient = PatientProfile.objects(user_id=patient_id).first()
+            rows = fetch_records(PatientProfile.objects(user_id=patient_id).limit(1), PATIENT_PROFILE_MAPPER)
+            patient = rows[0] if rows else None
             
             if not patient:
                 return Response(
@@ -64,10 +74,15 @@ class PatientDetailView(APIView):
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            return Response(
-                patient.to_dict(),
+            etag = make_etag('patient', patient_id, patient['updated_at'])
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            
+            response = Response(
+                patient,
                 status=status.HTTP_200_OK
             )
+            return with_etag(response, etag)
         except Exception as e:
             logger.error(f'Patient detail error: {str(e)}')
             return Response(
@@ -77,12 +92,13 @@ class PatientDetailView(APIView):
 
 
 class PatientUpdateView(APIView):
-    """Update patient profile"""
+    """Update patient profile (PUT replaces fields, PATCH changes paths; see api.patch)"""
     permission_classes = [IsAuthenticated]
+    patch_fields = ('wellness_goals', 'health_data', 'medical_history', 'allergies', 'medications')
     
     def put(self, request, patient_id):
         try:
-            user = User.objects(id=request.user.id).first()
+            user = request.user
             
             # Users can only update their own data unless they're admin
             if str(request.user.id) != patient_id and user.role != 'admin':
@@ -111,6 +127,7 @@ class PatientUpdateView(APIView):
             if 'medications' in request.data:
                 patient.medications = request.data['medications']
             
+            patient.updated_at = timezone.now()
             patient.save()
             
             return Response(
@@ -123,3 +140,41 @@ class PatientUpdateView(APIView):
                 {'error': 'Failed to update patient'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    def patch(self, request, patient_id):
+        try:
+            user = request.user
+            
+            # Users can only update their own data unless they're admin
+            if str(request.user.id) != patient_id and user.role != 'admin':
+                return Response(
+                    {'error': 'Permission denied'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            try:
+                update, touched = build_update(PatientProfile, request.data, self.patch_fields)
+            except PatchError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            patient = apply_update(PatientProfile, {'user_id': patient_id}, update, touched, timezone.now())
+            
+            if not patient:
+                return Response(
+                    {'error': 'Patient not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            return Response(
+                patient,
+                status=status.HTTP_200_OK
+            )
+        except Exception as e:
+            logger.error(f'Patient patch error: {str(e)}')
+            return Response(
+                {'error': 'Failed to update patient'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -6,7 +6,18 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 import logging
-from api.models import ProviderProfile, User
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from pymongo.errors import DuplicateKeyError
+from api.models import ProviderPatient, ProviderProfile
+from api.availability import provider_availability
+from api.conditional import etag_matches, make_etag, not_modified, with_etag
+from api.directory_cache import bump_directory_version, directory_version, provider_directory, provider_entry
+from api.pagination import PaginationError, paginate_by_id, parse_datetime_param, parse_limit, parse_range
+from api.patch import PatchError, apply_update, build_update
+from api.queries import PROVIDER_PATIENT_MAPPER
+from api.rollups import provider_stats
 
 logger = logging.getLogger(__name__)
 
@@ -17,13 +28,18 @@ class ProviderListView(APIView):
     
     def get(self, request):
         try:
-            providers = ProviderProfile.objects()
-            providers_data = [p.to_dict() for p in providers]
+            version = directory_version()
+            etag = make_etag('providers', version)
+            if etag_matches(request, etag):
+                return not_modified(etag)
             
-            return Response(
+            providers_data = provider_directory(version)
+            
+            response = Response(
                 {'providers': providers_data, 'count': len(providers_data)},
                 status=status.HTTP_200_OK
             )
+            return with_etag(response, etag)
         except Exception as e:
             logger.error(f'Provider list error: {str(e)}')
             return Response(
@@ -38,7 +54,12 @@ class ProviderDetailView(APIView):
     
     def get(self, request, provider_id):
         try:
-            provider = ProviderProfile.objects(user_id=provider_id).first()
+            version = directory_version()
+            etag = make_etag('provider', provider_id, version)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            
+            provider = provider_entry(provider_id, version)
             
             if not provider:
                 return Response(
@@ -46,10 +67,11 @@ class ProviderDetailView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            return Response(
-                provider.to_dict(),
+            response = Response(
+                provider,
                 status=status.HTTP_200_OK
             )
+            return with_etag(response, etag)
         except Exception as e:
             logger.error(f'Provider detail error: {str(e)}')
             return Response(
@@ -58,13 +80,189 @@ class ProviderDetailView(APIView):
             )
 
 
+class ProviderAvailabilityView(APIView):
+    """Get free appointment slots for a provider (?from=&to=)"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, provider_id):
+        try:
+            try:
+                now = timezone.now()
+                range_start = parse_datetime_param('from', request.query_params.get('from')) or now
+                range_end = parse_datetime_param('to', request.query_params.get('to'), end_of_day=True)
+            except PaginationError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            range_start = max(range_start, now)
+            if range_end is None:
+                range_end = range_start + timedelta(days=settings.AVAILABILITY_DEFAULT_DAYS)
+            
+            if range_end <= range_start:
+                return Response(
+                    {'error': 'to must be after from'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if range_end - range_start > timedelta(days=settings.AVAILABILITY_MAX_DAYS):
+                return Response(
+                    {'error': f'Range cannot exceed {settings.AVAILABILITY_MAX_DAYS} days'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            provider = ProviderProfile.objects(user_id=provider_id).only('available_hours').as_pymongo().first()
+            
+            if not provider:
+                return Response(
+                    {'error': 'Provider not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            slots = provider_availability(
+                provider_id,
+                provider.get('available_hours', {}),
+                range_start,
+                range_end
+            )
+            
+            return Response(
+                {
+                    'provider_id': provider_id,
+                    'slot_minutes': settings.APPOINTMENT_SLOT_MINUTES,
+                    'from': range_start.isoformat(),
+                    'to': range_end.isoformat(),
+                    'slots': [
+                        {'start': start.isoformat(), 'end': end.isoformat()}
+                        for start, end in slots
+                    ],
+                },
+                status=status.HTTP_200_OK
+            )
+        except Exception as e:
+            logger.error(f'Provider availability error: {str(e)}')
+            return Response(
+                {'error': 'Failed to fetch availability'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class ProviderPatientsView(APIView):
+    """List a provider's patients, cursor paginated (provider or admin only)"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, provider_id):
+        try:
+            user = request.user
+            
+            if str(user.id) != provider_id and user.role != 'admin':
+                return Response(
+                    {'error': 'Permission denied'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            patients = ProviderPatient.objects(provider_id=provider_id)
+            if request.query_params.get('patient_id'):
+                patients = patients.filter(patient_id=request.query_params['patient_id'])
+            
+            try:
+                page, next_cursor = paginate_by_id(
+                    patients,
+                    request.query_params.get('cursor'),
+                    parse_limit(request.query_params.get('limit')),
+                    PROVIDER_PATIENT_MAPPER
+                )
+            except PaginationError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            return Response(
+                {'patients': page, 'next_cursor': next_cursor},
+                status=status.HTTP_200_OK
+            )
+        except Exception as e:
+            logger.error(f'Provider patients error: {str(e)}')
+            return Response(
+                {'error': 'Failed to fetch provider patients'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class ProviderStatsView(APIView):
+    """
+    Appointment statistics per day from the daily rollups (provider or admin only)
+
+    Query params: from, to (default the last PROVIDER_STATS_DEFAULT_DAYS).
+    Each day and the totals give counts by status, cancellation_rate, and
+    slots booked against slots available_hours offers (utilisation).
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, provider_id):
+        try:
+            user = request.user
+            
+            if str(user.id) != provider_id and user.role != 'admin':
+                return Response(
+                    {'error': 'Permission denied'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            try:
+                start, end = parse_range(
+                    request.query_params,
+                    settings.PROVIDER_STATS_DEFAULT_DAYS,
+                    settings.PROVIDER_STATS_MAX_DAYS
+                )
+            except PaginationError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            provider = ProviderProfile.objects(user_id=provider_id).only('available_hours').as_pymongo().first()
+            
+            if not provider:
+                return Response(
+                    {'error': 'Provider not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            stats = provider_stats(
+                provider_id,
+                start,
+                end,
+                provider.get('available_hours', {}),
+                settings.APPOINTMENT_SLOT_MINUTES
+            )
+            
+            return Response(
+                {
+                    'provider_id': provider_id,
+                    'from': stats['days'][0]['date'],
+                    'to': stats['days'][-1]['date'],
+                    'slot_minutes': settings.APPOINTMENT_SLOT_MINUTES,
+                    **stats,
+                },
+                status=status.HTTP_200_OK
+            )
+        except Exception as e:
+            logger.error(f'Provider stats error: {str(e)}')
+            return Response(
+                {'error': 'Failed to fetch provider stats'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class ProviderCreateView(APIView):
     """Create provider profile"""
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
         try:
-            user = User.objects(id=request.user.id).first()
+            user = request.user
             
             # Only admins can create provider profiles for others
             if str(request.user.id) != request.data.get('user_id') and user.role != 'admin':
@@ -90,6 +288,7 @@ class ProviderCreateView(APIView):
                 phone=request.data.get('phone', ''),
             )
             provider.save()
+            bump_directory_version()
             
             return Response(
                 provider.to_dict(),
@@ -109,12 +308,16 @@ class ProviderCreateView(APIView):
 
 
 class ProviderUpdateView(APIView):
-    """Update provider profile"""
+    """Update provider profile (PUT replaces fields, PATCH changes paths; see api.patch)"""
     permission_classes = [IsAuthenticated]
+    patch_fields = (
+        'specialty', 'license_number', 'qualifications', 'experience_years',
+        'clinic_address', 'phone', 'available_hours',
+    )
     
     def put(self, request, provider_id):
         try:
-            user = User.objects(id=request.user.id).first()
+            user = request.user
             
             # Users can only update their own data unless they're admin
             if str(request.user.id) != provider_id and user.role != 'admin':
@@ -147,7 +350,9 @@ class ProviderUpdateView(APIView):
             if 'available_hours' in request.data:
                 provider.available_hours = request.data['available_hours']
             
+            provider.updated_at = timezone.now()
             provider.save()
+            bump_directory_version()
             
             return Response(
                 provider.to_dict(),
@@ -159,3 +364,49 @@ class ProviderUpdateView(APIView):
                 {'error': 'Failed to update provider'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    def patch(self, request, provider_id):
+        try:
+            user = request.user
+            
+            # Users can only update their own data unless they're admin
+            if str(request.user.id) != provider_id and user.role != 'admin':
+                return Response(
+                    {'error': 'Permission denied'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            try:
+                update, touched = build_update(ProviderProfile, request.data, self.patch_fields)
+            except PatchError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            try:
+                provider = apply_update(ProviderProfile, {'user_id': provider_id}, update, touched, timezone.now())
+            except DuplicateKeyError:
+                return Response(
+                    {'error': 'License number is already registered'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            
+            if not provider:
+                return Response(
+                    {'error': 'Provider not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            bump_directory_version()
+            
+            return Response(
+                provider,
+                status=status.HTTP_200_OK
+            )
+        except Exception as e:
+            logger.error(f'Provider patch error: {str(e)}')
+            return Response(
+                {'error': 'Failed to update provider'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
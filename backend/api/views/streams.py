@@ -0,0 +1,182 @@
+"""
+Server-Sent Events stream of appointment changes (ASGI only)
+
+GET /api/appointments/stream/ pushes created, updated and cancelled events
+for the caller's appointments as they happen, replacing dashboard polling.
+EventSource cannot send an Authorization header, so the stream may instead
+be opened with ?ticket=, a single-use ticket from
+POST /api/appointments/stream/ticket/ (see api.stream_tickets); the JWT
+never goes in the URL. Reconnects send Last-Event-ID and receive what they
+missed before live events resume.
+"""
+import asyncio
+import logging
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from api import stream_tickets
+from api.events import appointment_events, format_event, record_event
+from api.models import Appointment
+from api.pagination import MAX_PAGE_SIZE, PaginationError, changes_since, decode_cursor
+from api.queries import APPOINTMENT_MAPPER
+from api.views.async_reads import async_api_view
+
+logger = logging.getLogger(__name__)
+
+
+def _replay(owner_filter, token):
+    """Events after token, or None when more than SSE_REPLAY_LIMIT changed"""
+    messages = []
+    settled_before = timezone.now()
+    while True:
+        records, token, has_more = changes_since(
+            Appointment.objects(**owner_filter),
+            token,
+            MAX_PAGE_SIZE,
+            APPOINTMENT_MAPPER,
+            settled_before
+        )
+        messages.extend(
+            record_event(record, created=record['created_at'] == record['updated_at'])
+            for record in records
+        )
+        if len(messages) > settings.SSE_REPLAY_LIMIT:
+            return None
+        if not has_more:
+            return messages
+
+
+_replay_async = sync_to_async(_replay, thread_sensitive=False)
+
+
+async def _event_stream(subscription, owner_filter, last_event_id):
+    deadline = time.monotonic() + settings.SSE_MAX_STREAM_SECONDS
+    try:
+        yield f'retry: {settings.SSE_RETRY_MS}\n\n'
+
+        if last_event_id:
+            messages = await _replay_async(owner_filter, last_event_id)
+            if messages is None:
+                # Too far behind; the client should resync from /changes/
+                yield format_event(last_event_id, 'resync', {})
+                return
+            for message in messages:
+                yield message
+
+        while time.monotonic() < deadline:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    timeout=settings.SSE_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if message is None:
+                return
+            yield message
+        # Streams are recycled periodically so a client that vanished without
+        # closing the connection does not hold its subscription forever
+    finally:
+        appointment_events.unsubscribe(subscription)
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """
+    Streaming response that owns its subscription. The generator's finally
+    only runs once the body is iterated; close() also releases the
+    subscription when the server drops the response before that.
+    """
+
+    def __init__(self, subscription, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._subscription = subscription
+        # close() runs in a worker thread; the hub belongs to the event loop
+        self._loop = asyncio.get_running_loop()
+
+    def close(self):
+        try:
+            self._loop.call_soon_threadsafe(appointment_events.unsubscribe, self._subscription)
+        except RuntimeError:
+            # Loop already closed, and the subscriptions with it
+            pass
+        super().close()
+
+
+class AppointmentStreamTicketView(APIView):
+    """
+    Issue a single-use ticket for opening the appointment stream
+    POST /api/appointments/stream/ticket/
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.user.role not in ('patient', 'provider'):
+            return Response(
+                {'error': 'Insufficient permissions'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            ticket, expires_at = stream_tickets.issue(request.user.id, timezone.now())
+            return Response(
+                {'ticket': ticket, 'expires_at': expires_at.isoformat()},
+                status=status.HTTP_201_CREATED
+            )
+
+        except Exception as e:
+            logger.error(f'Stream ticket error: {str(e)}')
+            return Response(
+                {'error': 'Failed to issue stream ticket'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+@async_api_view(ticket_param='ticket')
+async def appointment_stream(request, user):
+    """Stream appointment changes for the authenticated patient or provider"""
+    try:
+        if user.role == 'patient':
+            owner_filter = {'patient_id': str(user.id)}
+        elif user.role == 'provider':
+            owner_filter = {'provider_id': str(user.id)}
+        else:
+            return JsonResponse(
+                {'error': 'Insufficient permissions'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        if last_event_id:
+            try:
+                decode_cursor(last_event_id)
+            except PaginationError:
+                return JsonResponse(
+                    {'error': 'Invalid Last-Event-ID'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        # Subscribe before replaying so nothing written in between is lost;
+        # the overlap may repeat an event, which clients apply idempotently
+        subscription = appointment_events.subscribe(str(user.id))
+        response = EventStreamResponse(
+            subscription,
+            _event_stream(subscription, owner_filter, last_event_id),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    except Exception as e:
+        logger.error(f'Appointment stream error: {str(e)}')
+        return JsonResponse(
+            {'error': 'Failed to open appointment stream'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
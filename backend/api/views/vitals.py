@@ -0,0 +1,189 @@
+"""
+Patient vitals views
+"""
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from api import analytics, vitals
+from api.pagination import PaginationError, parse_range
+from api.serializers import VitalsRecordSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class PatientVitalsView(APIView):
+    """
+    Record and read a patient's vitals (the patient, admins, and providers
+    the patient has booked with)
+
+    GET query params: metric, from, to (default the last VITALS_DEFAULT_DAYS),
+    resolution (raw, hour, day (default) or week).
+    POST body: {'samples': [{'metric', 'value', 'recorded_at'}, ...]}.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, patient_id):
+        try:
+            if not vitals.may_access(request.user, patient_id):
+                return Response(
+                    {'error': 'Permission denied'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            metric = request.query_params.get('metric')
+            if metric not in vitals.METRICS:
+                return Response(
+                    {'error': f'metric must be one of {", ".join(vitals.METRICS)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            resolution = request.query_params.get('resolution', 'day')
+            if resolution not in vitals.RESOLUTIONS:
+                return Response(
+                    {'error': f'resolution must be one of {", ".join(vitals.RESOLUTIONS)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            try:
+                start, end = parse_range(request.query_params, settings.VITALS_DEFAULT_DAYS, settings.VITALS_MAX_DAYS)
+            except PaginationError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            return Response(
+                {
+                    'metric': metric,
+                    'unit': vitals.METRICS[metric],
+                    'resolution': resolution,
+                    'from': start.isoformat(),
+                    'to': end.isoformat(),
+                    'points': vitals.series(patient_id, metric, start, end, resolution),
+                },
+                status=status.HTTP_200_OK
+            )
+        except Exception as e:
+            logger.error(f'Vitals read error: {str(e)}')
+            return Response(
+                {'error': 'Failed to fetch vitals'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def post(self, request, patient_id):
+        try:
+            if not vitals.may_access(request.user, patient_id):
+                return Response(
+                    {'error': 'Permission denied'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            serializer = VitalsRecordSerializer(data=request.data)
+            
+            if not serializer.is_valid():
+                return Response(
+                    {'error': serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            samples = serializer.validated_data['samples']
+            if len(samples) > settings.VITALS_MAX_SAMPLES:
+                return Response(
+                    {'error': f'At most {settings.VITALS_MAX_SAMPLES} samples per request'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            now = timezone.now()
+            for sample in samples:
+                sample.setdefault('recorded_at', now)
+                if sample['recorded_at'] > now + timedelta(minutes=5):
+                    return Response(
+                        {'error': 'recorded_at cannot be in the future'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            
+            if not vitals.record(patient_id, samples, now):
+                return Response(
+                    {'error': 'Patient not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            return Response(
+                {'message': f'{len(samples)} sample(s) recorded'},
+                status=status.HTTP_201_CREATED
+            )
+        except Exception as e:
+            logger.error(f'Vitals record error: {str(e)}')
+            return Response(
+                {'error': 'Failed to record vitals'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class PatientTrendsView(APIView):
+    """
+    Trend lines, rolling averages and anomaly flags for one vitals metric
+    (same access as PatientVitalsView)
+
+    Query params: metric, from, to (default the last TRENDS_DEFAULT_DAYS),
+    window (rolling days, default 7), z (anomaly threshold, default 3).
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, patient_id):
+        try:
+            if not vitals.may_access(request.user, patient_id):
+                return Response(
+                    {'error': 'Permission denied'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            metric = request.query_params.get('metric')
+            if metric not in vitals.METRICS:
+                return Response(
+                    {'error': f'metric must be one of {", ".join(vitals.METRICS)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            try:
+                start, end = parse_range(request.query_params, settings.TRENDS_DEFAULT_DAYS, settings.TRENDS_MAX_DAYS)
+                window = int(request.query_params.get('window', settings.TRENDS_WINDOW_DAYS))
+                z_threshold = float(request.query_params.get('z', settings.TRENDS_Z_THRESHOLD))
+            except PaginationError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            except ValueError:
+                return Response(
+                    {'error': 'window must be an integer and z a number'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if not 1 <= window <= 90 or not z_threshold > 0:
+                return Response(
+                    {'error': 'window must be 1-90 days and z positive'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            series = analytics.load([patient_id], metric, start, end)
+            trends = analytics.patient_trends(series, metric, window, z_threshold)
+            
+            return Response(
+                {
+                    'metric': metric,
+                    'unit': vitals.METRICS[metric],
+                    'from': start.isoformat(),
+                    'to': end.isoformat(),
+                    **trends,
+                },
+                status=status.HTTP_200_OK
+            )
+        except Exception as e:
+            logger.error(f'Trends error: {str(e)}')
+            return Response(
+                {'error': 'Failed to compute trends'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -0,0 +1,176 @@
+"""
+Patient vitals on a MongoDB time-series collection
+
+Each sample is one measurement:
+
+    {'recorded_at': datetime, 'meta': {'patient_id': str, 'metric': str}, 'value': float}
+
+The server buckets samples by meta (patient and metric) and time. Range reads
+are downsampled server side with $dateTrunc, returning one min/max/avg/count
+point per hour, day or week. A year of heart rate at daily resolution is at
+most 366 points however many samples were recorded. The patient profile keeps
+only the newest value of each metric (PatientProfile.latest_vitals).
+
+Time-series collections need MongoDB 5.0+. The collection is created on
+first use; MongoEngine would otherwise create an ordinary one on first insert.
+"""
+import logging
+from django.conf import settings
+from mongoengine.connection import get_db
+from pymongo.errors import CollectionInvalid
+from api.models import PatientProfile, ProviderPatient
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = 'vitals'
+
+# metric -> unit
+METRICS = {
+    'heart_rate': 'bpm',
+    'systolic_bp': 'mmHg',
+    'diastolic_bp': 'mmHg',
+    'respiratory_rate': 'breaths/min',
+    'spo2': '%',
+    'temperature': '°C',
+    'glucose': 'mg/dL',
+    'weight': 'kg',
+}
+
+RESOLUTIONS = ('raw', 'hour', 'day', 'week')
+
+_collection_ready = False
+
+
+def vitals_collection():
+    """The vitals collection, creating it as a time-series collection if missing"""
+    global _collection_ready
+    db = get_db()
+    if not _collection_ready:
+        if COLLECTION not in db.list_collection_names(filter={'name': COLLECTION}):
+            try:
+                db.create_collection(
+                    COLLECTION,
+                    timeseries={'timeField': 'recorded_at', 'metaField': 'meta', 'granularity': 'minutes'},
+                )
+                # Range reads for one patient's metric (MongoDB 6.3+ also
+                # indexes meta and time by default)
+                db[COLLECTION].create_index([
+                    ('meta.patient_id', 1), ('meta.metric', 1), ('recorded_at', 1),
+                ])
+            except CollectionInvalid:
+                # Created concurrently by another worker
+                pass
+        _collection_ready = True
+    return db[COLLECTION]
+
+
+def may_access(user, patient_id):
+    """The patient, an admin, or a provider the patient has booked with"""
+    if str(user.id) == patient_id or user.role == 'admin':
+        return True
+    return user.role == 'provider' and ProviderPatient.objects(
+        provider_id=str(user.id), patient_id=patient_id
+    ).only('id').first() is not None
+
+
+def record(patient_id, samples, now):
+    """
+    Insert samples ({'metric', 'value', 'recorded_at'}) and move the profile's
+    latest_vitals forward where a sample is newer, setting updated_at to now
+    so the profile's ETags change. The profile is only touched once the
+    samples are stored, so latest_vitals never points at a sample that was
+    not; a failed profile update is logged, not raised, as the samples are
+    the record. Three round trips for any number of samples. Returns False
+    when the patient has no profile.
+    """
+    profiles = PatientProfile._get_collection()
+    if not profiles.find_one({'user_id': patient_id}, {'_id': 1}):
+        return False
+
+    newest = {}
+    for sample in samples:
+        current = newest.get(sample['metric'])
+        if current is None or sample['recorded_at'] > current['recorded_at']:
+            newest[sample['metric']] = sample
+
+    # Only replace a metric's latest value when this one is newer
+    latest = {
+        f'latest_vitals.{metric}': {
+            '$cond': [
+                {'$gt': [sample['recorded_at'], {'$ifNull': [f'$latest_vitals.{metric}.recorded_at', None]}]},
+                {'$literal': {
+                    'value': float(sample['value']),
+                    'unit': METRICS[metric],
+                    'recorded_at': sample['recorded_at'],
+                }},
+                f'$latest_vitals.{metric}',
+            ]
+        }
+        for metric, sample in newest.items()
+    }
+    vitals_collection().insert_many(
+        [
+            {
+                'recorded_at': sample['recorded_at'],
+                'meta': {'patient_id': patient_id, 'metric': sample['metric']},
+                'value': float(sample['value']),
+            }
+            for sample in samples
+        ],
+        ordered=False,
+    )
+
+    try:
+        profiles.update_one(
+            {'user_id': patient_id},
+            [{'$set': {**latest, 'updated_at': now}}],
+        )
+    except Exception as e:
+        logger.error(f'Latest vitals update failed for {patient_id}: {str(e)}')
+    return True
+
+
+def series(patient_id, metric, start, end, resolution):
+    """
+    Samples of one metric in [start, end]: raw ({'t', 'value'}, newest
+    VITALS_RAW_LIMIT) or one {'t', 'min', 'max', 'avg', 'count'} point per
+    hour, day or week, oldest first
+    """
+    match = {
+        'meta.patient_id': patient_id,
+        'meta.metric': metric,
+        'recorded_at': {'$gte': start, '$lte': end},
+    }
+    collection = vitals_collection()
+    if resolution == 'raw':
+        rows = (
+            collection.find(match, {'_id': 0, 'recorded_at': 1, 'value': 1})
+            .sort('recorded_at', -1)
+            .limit(settings.VITALS_RAW_LIMIT)
+        )
+        return [{'t': row['recorded_at'].isoformat(), 'value': row['value']} for row in rows][::-1]
+
+    bucket = {'date': '$recorded_at', 'unit': resolution}
+    if resolution == 'week':
+        bucket['startOfWeek'] = 'monday'
+    rows = collection.aggregate([
+        {'$match': match},
+        {'$group': {
+            '_id': {'$dateTrunc': bucket},
+            'min': {'$min': '$value'},
+            'max': {'$max': '$value'},
+            'avg': {'$avg': '$value'},
+            'count': {'$sum': 1},
+        }},
+        {'$sort': {'_id': 1}},
+    ])
+    return [
+        {
+            't': row['_id'].isoformat(),
+            'min': row['min'],
+            'max': row['max'],
+            'avg': round(row['avg'], 2),
+            'count': row['count'],
+        }
+        for row in rows
+    ]
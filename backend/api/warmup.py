@@ -0,0 +1,138 @@
+"""
+Process start-up work for `manage.py serve`
+
+preload() runs once in the gunicorn master before workers are forked, so the
+URLconf, every view module and DRF's configured classes are imported once and
+shared copy-on-write. warm_worker() runs in each worker after the fork and
+before it accepts connections: it opens the Mongo connection pool, builds
+indexes and primes the provider directory cache, so its first requests do
+not have to.
+
+Nothing in preload() may touch Mongo: pymongo clients must not be used on
+both sides of a fork.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+POOL_WARM_TIMEOUT = 5.0
+
+
+def cpu_count():
+    """CPUs this process may use, honouring affinity and a cgroup v2 quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def auto_size(cpus, asgi=False):
+    """
+    Default (workers, threads) for a host with `cpus` CPUs.
+
+    ASGI workers run one event loop each, so one per CPU. WSGI workers are
+    gthread workers: one per CPU plus a spare to cover a worker busy in GC or
+    a CPU-bound request, with a few threads each to overlap Mongo round trips
+    (bcrypt runs on its own pool, see api.hashing).
+    """
+    if asgi:
+        return cpus, 1
+    return cpus + 1, 4
+
+
+def _callbacks(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from _callbacks(pattern.url_patterns)
+        else:
+            yield pattern.callback
+
+
+def preload():
+    """Import everything a request needs; runs in the master before forking"""
+    from django.urls import get_resolver
+    from rest_framework.settings import api_settings
+
+    started = time.perf_counter()
+    resolver = get_resolver()
+    for callback in _callbacks(resolver.url_patterns):
+        # Import the modules behind lazy views (api.urls.lazy_view)
+        if hasattr(callback, 'resolve'):
+            callback.resolve()
+    # Populate the resolver's reverse and namespace caches
+    resolver.reverse_dict
+    for name in (
+        'DEFAULT_AUTHENTICATION_CLASSES',
+        'DEFAULT_PERMISSION_CLASSES',
+        'DEFAULT_RENDERER_CLASSES',
+        'DEFAULT_PARSER_CLASSES',
+        'EXCEPTION_HANDLER',
+    ):
+        getattr(api_settings, name)
+    logger.info(f'Preloaded URLconf and views in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+
+def warm_mongo_pool(connections):
+    """Open up to `connections` pooled connections by overlapping pings"""
+    from mongoengine.connection import get_connection
+
+    client = get_connection()
+    client.admin.command('ping')
+    if connections <= 1:
+        return
+    barrier = threading.Barrier(connections)
+
+    def ping(_):
+        try:
+            barrier.wait(timeout=POOL_WARM_TIMEOUT)
+        except threading.BrokenBarrierError:
+            pass
+        client.admin.command('ping')
+
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        list(executor.map(ping, range(connections)))
+
+
+def warm_worker(connections):
+    """
+    Per-worker warm-up after fork. Failures are logged, not fatal, except a
+    unique index the data violates: the worker then fails to boot, which
+    stops gunicorn, rather than serving bookings without the index.
+    """
+    from api.directory_cache import provider_directory
+    from api.indexes import IndexBuildError, ensure_all
+
+    started = time.perf_counter()
+    try:
+        warm_mongo_pool(connections)
+        ensure_all()
+        provider_directory()
+    except IndexBuildError as e:
+        logger.critical(str(e))
+        raise
+    except Exception as e:
+        logger.warning(f'Worker {os.getpid()} warm-up incomplete: {str(e)}')
+        return
+    logger.info(
+        f'Worker {os.getpid()} warmed {connections} Mongo connections in '
+        f'{(time.perf_counter() - started) * 1000:.0f} ms'
+    )
+
+
+def close_worker():
+    """Close the worker's Mongo connections on graceful exit"""
+    from mongoengine.connection import disconnect_all
+    disconnect_all()
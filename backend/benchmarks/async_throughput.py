@@ -0,0 +1,126 @@
+"""
+Compare concurrent-request throughput of the WSGI and ASGI serving paths.
+
+Start both servers against the same local mongod first, e.g.:
+
+    gunicorn healthcare.wsgi:application -w 4 --threads 8 -b 127.0.0.1:8001
+    ASYNC_API=True uvicorn healthcare.asgi:application --workers 4 --port 8002
+
+then run:
+
+    python benchmarks/async_throughput.py \\
+        --wsgi-url http://127.0.0.1:8001 --asgi-url http://127.0.0.1:8002 \\
+        --email patient@example.com --password secret123
+
+Each level drives the hot read endpoints (appointment list/detail, provider
+list/detail) with that many concurrent keep-alive clients.
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from loadgen import HTTPClient, Stats, run_clients, timed
+
+
+async def login(base_url, email, password):
+    client = HTTPClient(base_url)
+    try:
+        status, _, body = await client.request(
+            'POST', '/api/auth/login/', {'email': email, 'password': password}
+        )
+    finally:
+        await client.close()
+    if status != 200:
+        raise SystemExit(f'Login failed against {base_url}: {status} {body[:200]!r}')
+    return json.loads(body)['token']
+
+
+async def discover(base_url, token):
+    """Fetch ids used to build detail URLs"""
+    client = HTTPClient(base_url, {'Authorization': f'Bearer {token}'})
+    try:
+        _, _, body = await client.request('GET', '/api/appointments/?limit=50')
+        appointment_ids = [a['id'] for a in json.loads(body).get('appointments', [])]
+        _, _, body = await client.request('GET', '/api/providers/')
+        provider_ids = [p['user_id'] for p in json.loads(body).get('providers', [])]
+    finally:
+        await client.close()
+    return appointment_ids, provider_ids
+
+
+async def run_level(base_url, token, concurrency, duration, appointment_ids, provider_ids):
+    stats = Stats()
+    rng = random.Random(concurrency)
+    paths = ['/api/appointments/', '/api/providers/']
+    paths += [f'/api/appointments/{i}/' for i in appointment_ids[:10]]
+    paths += [f'/api/providers/{i}/' for i in provider_ids[:10]]
+
+    async def session(client, deadline):
+        while time.perf_counter() < deadline:
+            await timed(stats, client.request('GET', rng.choice(paths)))
+
+    stats.started = time.perf_counter()
+    await run_clients(
+        concurrency,
+        duration,
+        lambda: HTTPClient(base_url, {'Authorization': f'Bearer {token}'}),
+        session,
+    )
+    stats.finished = time.perf_counter()
+    return stats.summary()
+
+
+async def main_async(args):
+    results = {}
+    targets = [('wsgi', args.wsgi_url), ('asgi', args.asgi_url)]
+    for name, base_url in targets:
+        if not base_url:
+            continue
+        token = args.token or await login(base_url, args.email, args.password)
+        appointment_ids, provider_ids = await discover(base_url, token)
+        results[name] = {}
+        for level in args.concurrency:
+            summary = await run_level(
+                base_url, token, level, args.duration, appointment_ids, provider_ids
+            )
+            results[name][level] = summary
+            print(f'{name} c={level:<5} {summary["throughput_rps"]:8.0f} req/s  '
+                  f'p50 {summary["p50_ms"]:7.1f} ms  p99 {summary["p99_ms"]:7.1f} ms  '
+                  f'errors {summary["error_rate"]:.2%}')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--wsgi-url')
+    parser.add_argument('--asgi-url')
+    parser.add_argument('--token', help='JWT to use instead of logging in')
+    parser.add_argument('--email')
+    parser.add_argument('--password')
+    parser.add_argument('--concurrency', type=lambda v: [int(x) for x in v.split(',')],
+                        default=[100, 500, 1000])
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per level')
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args()
+
+    if not args.token and not (args.email and args.password):
+        parser.error('pass --token or --email/--password')
+
+    # 1000 keep-alive clients need more than the default 1024 descriptors
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, 65536)), hard))
+
+    results = asyncio.run(main_async(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark the slot availability engine in api/availability.py.
+
+Computes free slots for many providers over a multi-month window with a
+realistic booking density, using in-memory booking indexes (the database
+side is a single projected index range scan per provider).
+
+Usage:
+    python benchmarks/availability.py
+    python benchmarks/availability.py --providers 1000 --days 90 --fill 0.6
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent directory to path so healthcare module can be imported
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthcare.settings')
+
+import django
+django.setup()
+
+from api.availability import expand_slots, free_slots, parse_available_hours
+
+AVAILABLE_HOURS = {
+    'Monday': '09:00-17:00',
+    'Tuesday': '09:00-17:00',
+    'Wednesday': '09:00-17:00',
+    'Thursday': '09:00-17:00',
+    'Friday': '09:00-17:00',
+    'Saturday': '10:00-14:00',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--providers', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--fill', type=float, default=0.6, help='fraction of slots booked')
+    parser.add_argument('--slot-minutes', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    end = start + timedelta(days=args.days)
+    schedule = parse_available_hours(AVAILABLE_HOURS)
+    all_slots = [s for s, _ in expand_slots(schedule, start, end, args.slot_minutes)]
+
+    bookings = [
+        sorted(s for s in all_slots if rng.random() < args.fill)
+        for _ in range(args.providers)
+    ]
+
+    timings = []
+    free_total = 0
+    for booked in bookings:
+        started = time.perf_counter()
+        free_total += len(free_slots(schedule, booked, start, end, args.slot_minutes))
+        timings.append(time.perf_counter() - started)
+
+    booked_total = sum(len(b) for b in bookings)
+    timings.sort()
+    print(f'{args.providers} providers x {args.days} days, {len(all_slots)} slots each, '
+          f'{booked_total} bookings, {free_total} free slots')
+    print(f'  total   {sum(timings) * 1000:8.1f} ms')
+    print(f'  p50     {statistics.median(timings) * 1000:8.2f} ms per provider')
+    print(f'  p99     {timings[int(len(timings) * 0.99) - 1] * 1000:8.2f} ms per provider')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Concurrency benchmark for appointment booking.
+
+Fires many parallel bookings for the same provider slot, for the previous
+find-then-insert check and for the insert-only path that relies on the
+unique partial index provider_active_slot_unique. Each path races on its own
+scratch collection: the find-then-insert run has only a plain
+(provider_id, appointment_date) index, as before the unique index existed,
+so it shows how many bookings slip through; the insert-only run has the
+unique partial index exactly as Appointment declares it and must let one
+booking win per slot. Reports winners per slot and attempted bookings per
+second for both. Requires a running mongod (MongoDB 6.0+).
+
+Usage:
+    python benchmarks/booking_race.py --clients 200 --rounds 10
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent directory to path so healthcare module can be imported
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthcare.settings')
+
+import django
+django.setup()
+
+from mongoengine.connection import get_db
+from pymongo.errors import DuplicateKeyError
+from api.models import ACTIVE_APPOINTMENT_STATUSES, Appointment
+
+BENCH_PROVIDER_ID = 'bench-race-provider'
+SLOT_INDEX = 'provider_active_slot_unique'
+
+
+def appointment(patient_id, slot):
+    """An appointment document as Appointment.save() would insert it"""
+    return Appointment(patient_id=patient_id, provider_id=BENCH_PROVIDER_ID, appointment_date=slot).to_mongo()
+
+
+def book_find_then_insert(collection, patient_id, slot):
+    """Previous behaviour: query for a clash, then insert"""
+    if collection.find_one({
+        'provider_id': BENCH_PROVIDER_ID,
+        'appointment_date': slot,
+        'status': {'$in': ACTIVE_APPOINTMENT_STATUSES},
+    }, {'_id': 1}):
+        return False
+    collection.insert_one(appointment(patient_id, slot))
+    return True
+
+
+def book_insert_only(collection, patient_id, slot):
+    """Current behaviour: single insert, conflicts rejected by the index"""
+    try:
+        collection.insert_one(appointment(patient_id, slot))
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+def race(book, collection, clients, slot):
+    """Release all clients at once against one slot; return (successes, seconds)"""
+    barrier = threading.Barrier(clients)
+
+    def attempt(i):
+        barrier.wait()
+        return book(collection, f'bench-patient-{i}', slot)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(attempt, range(clients)))
+    return sum(results), time.perf_counter() - started
+
+
+def slot_index_options():
+    """Options of provider_active_slot_unique as declared on Appointment"""
+    spec = next(spec for spec in Appointment._meta['index_specs'] if spec.get('name') == SLOT_INDEX)
+    return {key: value for key, value in spec.items() if key not in ('fields', 'cls')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    db = get_db()
+    keys = [('provider_id', 1), ('appointment_date', 1)]
+    runs = (
+        ('find-then-insert', book_find_then_insert, {}),
+        ('insert-only', book_insert_only, slot_index_options()),
+    )
+    base = datetime(2035, 1, 1, tzinfo=timezone.utc)
+    results = {}
+
+    for name, book, index_options in runs:
+        collection = db[f'bench_booking_race_{name.replace("-", "_")}']
+        collection.drop()
+        collection.create_index(keys, **index_options)
+        winners, elapsed = [], 0.0
+        try:
+            for r in range(args.rounds):
+                won, seconds = race(book, collection, args.clients, base + timedelta(hours=r))
+                winners.append(won)
+                elapsed += seconds
+        finally:
+            collection.drop()
+        attempts = args.clients * args.rounds
+        results[name] = winners
+        print(f'{name:18} winners per slot {sorted(set(winners))}  '
+              f'{attempts / elapsed:8.0f} bookings/s  ({attempts} attempts)')
+
+    double_booked = sum(1 for w in results['find-then-insert'] if w > 1)
+    print(f'find-then-insert double booked {double_booked} of {args.rounds} slot(s)')
+    assert all(w == 1 for w in results['insert-only']), 'more than one booking won a slot'
+
+
+if __name__ == '__main__':
+    main()
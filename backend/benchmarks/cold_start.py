@@ -0,0 +1,130 @@
+"""
+Compare first-requests latency after a server start with steady state.
+
+Starts the server, waits for /api/health/, then immediately drives the read
+endpoints for a short "cold" window, pauses, and repeats the same load as the
+"warm" window. Needs a local mongod with data (see database/generate_data.py).
+
+    python benchmarks/cold_start.py --email patient@example.com --password secret123
+    python benchmarks/cold_start.py --server runserver     # the old start-up path
+
+--server serve runs `manage.py serve` (preloaded, warmed workers); runserver
+runs the development server for comparison.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from loadgen import HTTPClient, Stats, run_clients, timed
+
+BACKEND = Path(__file__).parent.parent
+
+
+def start_server(kind, port):
+    if kind == 'serve':
+        command = [sys.executable, 'manage.py', 'serve', '--bind', f'127.0.0.1:{port}']
+    else:
+        command = [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{port}']
+    return subprocess.Popen(
+        command, cwd=BACKEND, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+async def wait_ready(base_url, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        client = HTTPClient(base_url)
+        try:
+            status, _, _ = await client.request('GET', '/api/health/')
+            if status == 200:
+                return
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            await client.close()
+        await asyncio.sleep(0.05)
+    raise SystemExit(f'Server did not become ready within {timeout:.0f}s')
+
+
+async def login(base_url, email, password):
+    client = HTTPClient(base_url)
+    try:
+        status, _, body = await client.request(
+            'POST', '/api/auth/login/', {'email': email, 'password': password}
+        )
+    finally:
+        await client.close()
+    if status != 200:
+        raise SystemExit(f'Login failed: {status} {body[:200]!r}')
+    return json.loads(body)['token']
+
+
+async def run_window(base_url, headers, paths, concurrency, duration):
+    stats = Stats()
+
+    async def session(client, deadline):
+        i = 0
+        while time.perf_counter() < deadline:
+            await timed(stats, client.request('GET', paths[i % len(paths)]))
+            i += 1
+
+    stats.started = time.perf_counter()
+    await run_clients(concurrency, duration, lambda: HTTPClient(base_url, headers), session)
+    stats.finished = time.perf_counter()
+    return stats.summary()
+
+
+async def measure(args, base_url):
+    await wait_ready(base_url, args.ready_timeout)
+    # Everything from here to the end of the cold window counts as cold start;
+    # the login itself is not timed
+    headers = {}
+    paths = ['/api/providers/']
+    if args.email:
+        token = await login(base_url, args.email, args.password)
+        headers['Authorization'] = f'Bearer {token}'
+        paths.append('/api/appointments/')
+    cold = await run_window(base_url, headers, paths, args.concurrency, args.window)
+    await asyncio.sleep(args.pause)
+    warm = await run_window(base_url, headers, paths, args.concurrency, args.window)
+    return cold, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--server', choices=('serve', 'runserver'), default='serve')
+    parser.add_argument('--port', type=int, default=8077)
+    parser.add_argument('--email')
+    parser.add_argument('--password')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--window', type=float, default=3.0, help='seconds per window')
+    parser.add_argument('--pause', type=float, default=5.0)
+    parser.add_argument('--ready-timeout', type=float, default=60.0)
+    args = parser.parse_args()
+
+    base_url = f'http://127.0.0.1:{args.port}'
+    server = start_server(args.server, args.port)
+    try:
+        cold, warm = asyncio.run(measure(args, base_url))
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=60)
+
+    print(f'{args.server}: {args.concurrency} clients, {args.window:.0f}s windows')
+    print(f'{"window":8} {"requests":>9} {"errors":>7} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+    for name, summary in (('cold', cold), ('warm', warm)):
+        print(f'{name:8} {summary["requests"]:9d} {summary["errors"]:7d} '
+              f'{summary["p50_ms"]:8.1f} {summary["p95_ms"]:8.1f} {summary["p99_ms"]:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
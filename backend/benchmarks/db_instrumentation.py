@@ -0,0 +1,151 @@
+"""
+Measure the overhead of the per-request Mongo instrumentation.
+
+Offline (default) it times the two pieces that run on every request:
+
+- the command listener's started/succeeded pair, fed real pymongo
+  CommandStartedEvent / CommandSucceededEvent objects
+- DBInstrumentationMiddleware around a trivial view, against the bare view
+- MetricsRegistry.observe(), which the middleware calls once per request
+
+With --live it also runs find_one round trips against a local mongod with
+and without the listener attached, inside an instrumented request context.
+
+Usage:
+    python benchmarks/db_instrumentation.py
+    python benchmarks/db_instrumentation.py --live --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+# Add parent directory to path so healthcare module can be imported
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthcare.settings')
+
+import django
+django.setup()
+
+from bson import ObjectId
+from django.http import HttpResponse
+from django.test import RequestFactory
+from pymongo import monitoring
+from api.metrics import get_registry
+from middleware import db_instrumentation
+from middleware.db_instrumentation import DBInstrumentationMiddleware, RequestDBStats, command_listener
+
+FIND = {
+    'find': 'appointments',
+    'filter': {'provider_id': '65a000000000000000000001', 'status': {'$in': ['pending', 'confirmed']}},
+    'sort': {'appointment_date': 1, '_id': 1},
+    'limit': 51,
+    '$db': 'healthcare',
+}
+
+
+def best_of(repeat, fn):
+    """Median seconds of repeat runs of fn()"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def bench_listener(commands, repeat):
+    address = ('localhost', 27017)
+    events = [
+        (
+            monitoring.CommandStartedEvent(FIND, 'healthcare', i, address, i),
+            monitoring.CommandSucceededEvent(timedelta(microseconds=800), {'ok': 1}, 'find', i, address, i),
+        )
+        for i in range(commands)
+    ]
+
+    def run():
+        for started, succeeded in events:
+            command_listener.started(started)
+            command_listener.succeeded(succeeded)
+
+    idle = best_of(repeat, run)
+    token = db_instrumentation._current.set(RequestDBStats())
+    try:
+        active = best_of(repeat, run)
+    finally:
+        db_instrumentation._current.reset(token)
+    return idle / commands, active / commands
+
+
+def bench_middleware(requests, repeat):
+    factory = RequestFactory()
+    request = factory.get('/api/appointments/')
+
+    def view(_):
+        return HttpResponse(b'{}', content_type='application/json')
+
+    middleware = DBInstrumentationMiddleware(view)
+    bare = best_of(repeat, lambda: [view(request) for _ in range(requests)])
+    wrapped = best_of(repeat, lambda: [middleware(request) for _ in range(requests)])
+    return bare / requests, wrapped / requests
+
+
+def bench_metrics(requests, repeat):
+    registry = get_registry()
+    observe = registry.observe
+    return best_of(repeat, lambda: [observe('appointment-list', 200, 0.012, 3, 0.002, 0.0) for _ in range(requests)]) / requests
+
+
+def bench_live(mongo_uri, queries, repeat):
+    from pymongo import MongoClient
+    results = {}
+    for name, listeners in (('without listener', []), ('with listener', [command_listener])):
+        client = MongoClient(mongo_uri, event_listeners=listeners)
+        collection = client['healthcare_bench']['instrumentation']
+        collection.insert_one({'_id': ObjectId(), 'n': 1})
+        token = db_instrumentation._current.set(RequestDBStats())
+        try:
+            results[name] = best_of(repeat, lambda: [collection.find_one({'n': 1}) for _ in range(queries)]) / queries
+        finally:
+            db_instrumentation._current.reset(token)
+        client.drop_database('healthcare_bench')
+        client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--commands', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--live', action='store_true')
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017')
+    parser.add_argument('--queries', type=int, default=5000)
+    args = parser.parse_args()
+
+    idle, active = bench_listener(args.commands, args.repeat)
+    print(f'listener per command (no request):  {idle * 1e6:6.2f} us')
+    print(f'listener per command (in request):  {active * 1e6:6.2f} us')
+
+    bare, wrapped = bench_middleware(args.requests, args.repeat)
+    print(f'bare view per request:              {bare * 1e6:6.2f} us')
+    print(f'with middleware per request:        {wrapped * 1e6:6.2f} us  '
+          f'(+{(wrapped - bare) * 1e6:.2f} us)')
+    print(f'metrics observe per request:        {bench_metrics(args.requests, args.repeat) * 1e6:6.2f} us')
+
+    if args.live:
+        live = bench_live(args.mongo_uri, args.queries, args.repeat)
+        base = live['without listener']
+        for name, seconds in live.items():
+            print(f'find_one round trip {name:17} {seconds * 1e6:8.1f} us  '
+                  f'({(seconds / base - 1) * 100:+.1f}%)')
+
+
+if __name__ == '__main__':
+    main()
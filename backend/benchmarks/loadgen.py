@@ -0,0 +1,168 @@
+"""
+Minimal asyncio HTTP/1.1 load generator (stdlib only, keep-alive connections).
+
+Shared by the benchmark scripts so they run fully offline without extra
+packages. Each virtual client owns one persistent connection.
+"""
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+class HTTPClient:
+    """One keep-alive HTTP/1.1 connection to a single host"""
+
+    def __init__(self, base_url, headers=None):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.headers = dict(headers or {})
+        self._reader = None
+        self._writer = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self._writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        """Send a request; returns (status, headers dict, body bytes)"""
+        payload = b''
+        all_headers = {'Host': f'{self.host}:{self.port}', 'Connection': 'keep-alive'}
+        all_headers.update(self.headers)
+        all_headers.update(headers or {})
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            all_headers['Content-Type'] = 'application/json'
+        all_headers['Content-Length'] = str(len(payload))
+
+        head = f'{method} {self.prefix}{path} HTTP/1.1\r\n'
+        head += ''.join(f'{k}: {v}\r\n' for k, v in all_headers.items())
+        raw = head.encode('latin-1') + b'\r\n' + payload
+
+        for attempt in (0, 1):
+            if self._writer is None:
+                await self._connect()
+            try:
+                self._writer.write(raw)
+                await self._writer.drain()
+                return await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Server closed an idle keep-alive connection; reconnect once
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _read_response(self):
+        status_line = await self._reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                size = int((await self._reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                body += chunk[:-2]
+            body = bytes(body)
+        elif 'content-length' in headers:
+            body = await self._reader.readexactly(int(headers['content-length']))
+        elif status in (204, 304) or 100 <= status < 200:
+            body = b''
+        else:
+            body = await self._reader.read()
+            await self.close()
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, headers, body
+
+
+class Stats:
+    """Latency samples and outcome counters for one scenario or route"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.started = None
+        self.finished = None
+
+    def record(self, seconds, ok):
+        self.latencies.append(seconds)
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, pct):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+        return ordered[index]
+
+    def summary(self):
+        count = len(self.latencies)
+        elapsed = (self.finished or time.perf_counter()) - (self.started or 0)
+        return {
+            'requests': count,
+            'errors': self.errors,
+            'error_rate': self.errors / count if count else 0.0,
+            'throughput_rps': count / elapsed if elapsed > 0 else 0.0,
+            'p50_ms': self.percentile(50) * 1000,
+            'p95_ms': self.percentile(95) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'mean_ms': statistics.fmean(self.latencies) * 1000 if count else 0.0,
+        }
+
+
+async def run_clients(concurrency, duration, client_factory, session):
+    """
+    Run `concurrency` virtual clients for `duration` seconds.
+
+    client_factory() returns an HTTPClient; session(client, deadline) is a
+    coroutine that issues requests until the deadline.
+    """
+    deadline = time.perf_counter() + duration
+    clients = [client_factory() for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*(session(client, deadline) for client in clients))
+    finally:
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+
+async def timed(stats, coro, ok_statuses=()):
+    """
+    Await a request coroutine, recording latency and success into stats.
+
+    stats may be a single Stats or a list of them. Statuses below 400, plus
+    any in ok_statuses (e.g. an expected 409), count as successes.
+    """
+    targets = stats if isinstance(stats, (list, tuple)) else (stats,)
+    started = time.perf_counter()
+    try:
+        status, headers, body = await coro
+    except (ConnectionError, OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+        for target in targets:
+            target.record(time.perf_counter() - started, False)
+        return None, {}, b''
+    ok = status < 400 or status in ok_statuses
+    for target in targets:
+        target.record(time.perf_counter() - started, ok)
+    return status, headers, body
@@ -0,0 +1,360 @@
+"""
+End-to-end load test for every API route.
+
+Runs a weighted mix of user journeys against a running server backed by a
+local mongod, then reports p50/p95/p99 latency, throughput and error rate per
+route and per scenario, plus Mongo operations per request (from the server's
+opcounters). Results are written as JSON so runs can be diffed.
+
+Seed accounts first (python database/init_doctors.py --providers ... --seed 42),
+then e.g.:
+
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 \\
+        --concurrency 200 --duration 60 --mix login=1,booking=3,dashboard=6 \\
+        --output results/$(git rev-parse --short HEAD).json
+
+    python benchmarks/loadtest.py --compare results/old.json results/new.json
+
+Scenarios:
+    login      login storm: repeated logins with seeded credentials
+    booking    patient flow: providers -> detail -> availability -> book ->
+               my appointments -> appointment detail -> cancel
+    dashboard  provider polling: appointments, doctor view, own patients
+    coverage   walks every remaining route (register, logout, profile,
+               patient list/detail/update, provider create/update)
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from loadgen import HTTPClient, Stats, run_clients, timed
+
+class Recorder:
+    """Per-route and per-scenario Stats, keyed by URL name from api/urls"""
+
+    def __init__(self):
+        self.routes = {}
+        self.scenarios = {}
+        self.total = Stats()
+
+    def _get(self, table, key):
+        if key not in table:
+            table[key] = Stats()
+        return table[key]
+
+    async def call(self, client, scenario, route, method, path, body=None, ok_statuses=()):
+        status, _, raw = await timed(
+            [self._get(self.routes, route), self._get(self.scenarios, scenario), self.total],
+            client.request(method, path, body),
+            ok_statuses,
+        )
+        try:
+            data = json.loads(raw) if raw else {}
+        except ValueError:
+            data = {}
+        return status, data
+
+    def start(self):
+        self.total.started = time.perf_counter()
+        for stats in list(self.routes.values()) + list(self.scenarios.values()):
+            stats.started = self.total.started
+
+    def finish(self):
+        self.total.finished = time.perf_counter()
+        for stats in list(self.routes.values()) + list(self.scenarios.values()):
+            stats.started = self.total.started
+            stats.finished = self.total.finished
+
+
+class Accounts:
+    """Seeded credentials from database/init_doctors.py"""
+
+    def __init__(self, seed, patients, providers, password_pool, rng):
+        self.seed = seed
+        self.patients = patients
+        self.providers = providers
+        self.password_pool = password_pool
+        self.rng = rng
+
+    def _pick(self, role, count):
+        n = self.rng.randrange(count)
+        return {
+            'email': f'seed{self.seed}-{role}{n}@healthlink.test',
+            'password': f'SeedPass{n % self.password_pool}!',
+        }
+
+    def patient(self):
+        return self._pick('patient', self.patients)
+
+    def provider(self):
+        return self._pick('provider', self.providers)
+
+
+async def login(recorder, client, scenario, credentials):
+    status, data = await recorder.call(client, scenario, 'login', 'POST', '/api/auth/login/', credentials)
+    if status != 200:
+        return None
+    client.headers['Authorization'] = f'Bearer {data["token"]}'
+    user_id = None
+    status, profile = await recorder.call(client, scenario, 'profile', 'GET', '/api/auth/profile/')
+    if status == 200:
+        user_id = profile.get('id')
+    return user_id
+
+
+async def login_scenario(recorder, client, accounts, rng):
+    client.headers.pop('Authorization', None)
+    await recorder.call(client, 'login', 'login', 'POST', '/api/auth/login/', accounts.patient())
+
+
+async def booking_scenario(recorder, client, accounts, rng):
+    if not await login(recorder, client, 'booking', accounts.patient()):
+        return
+    status, data = await recorder.call(client, 'booking', 'provider-list', 'GET', '/api/providers/')
+    providers = data.get('providers') or []
+    if not providers:
+        return
+    provider_id = rng.choice(providers)['user_id']
+    await recorder.call(client, 'booking', 'provider-detail', 'GET', f'/api/providers/{provider_id}/')
+
+    start = datetime.now(timezone.utc) + timedelta(days=1)
+    status, data = await recorder.call(
+        client, 'booking', 'provider-availability', 'GET',
+        f'/api/providers/{provider_id}/availability/'
+        f'?from={start.date().isoformat()}&to={(start + timedelta(days=7)).date().isoformat()}',
+    )
+    await recorder.call(client, 'booking', 'doctor-appointments', 'GET', f'/api/appointments/doctor/{provider_id}/')
+
+    slots = data.get('slots') or []
+    if not slots:
+        return
+    status, data = await recorder.call(
+        client, 'booking', 'appointment-create', 'POST', '/api/appointments/create/',
+        {'provider_id': provider_id, 'appointment_date': rng.choice(slots)['start'], 'reason': 'Load test'},
+        ok_statuses=(409,),
+    )
+    await recorder.call(client, 'booking', 'appointment-list', 'GET', '/api/appointments/')
+    if status == 201:
+        appointment_id = data['appointment']['id']
+        await recorder.call(client, 'booking', 'appointment-detail', 'GET', f'/api/appointments/{appointment_id}/')
+        await recorder.call(client, 'booking', 'appointment-cancel', 'DELETE', f'/api/appointments/{appointment_id}/')
+
+
+async def dashboard_scenario(recorder, client, accounts, rng, polls=5):
+    user_id = await login(recorder, client, 'dashboard', accounts.provider())
+    if not user_id:
+        return
+    for _ in range(polls):
+        status, data = await recorder.call(client, 'dashboard', 'appointment-list', 'GET', '/api/appointments/')
+        await recorder.call(client, 'dashboard', 'doctor-appointments', 'GET', f'/api/appointments/doctor/{user_id}/')
+        await recorder.call(client, 'dashboard', 'provider-patients', 'GET', f'/api/providers/{user_id}/patients/')
+        pending = [a for a in data.get('appointments') or [] if a.get('status') == 'pending']
+        if pending and rng.random() < 0.3:
+            await recorder.call(
+                client, 'dashboard', 'appointment-update', 'PUT',
+                f'/api/appointments/{rng.choice(pending)["id"]}/',
+                {'status': 'confirmed', 'notes': 'Confirmed by load test'},
+            )
+
+
+async def coverage_scenario(recorder, client, accounts, rng):
+    client.headers.pop('Authorization', None)
+    await recorder.call(client, 'coverage', 'health', 'GET', '/api/health/')
+    email = f'loadtest-{uuid.uuid4().hex[:12]}@healthlink.test'
+    await recorder.call(
+        client, 'coverage', 'register', 'POST', '/api/auth/register/',
+        {'email': email, 'password': 'LoadTest123!', 'consent_given': True},
+    )
+    patient_id = await login(recorder, client, 'coverage', {'email': email, 'password': 'LoadTest123!'})
+    if patient_id:
+        await recorder.call(client, 'coverage', 'patient-detail', 'GET', f'/api/patients/{patient_id}/')
+        await recorder.call(
+            client, 'coverage', 'patient-update', 'PUT', f'/api/patients/{patient_id}/update/',
+            {'allergies': ['pollen'], 'wellness_goals': {'steps': 8000}},
+        )
+        # Someone else's user_id, so this exercises the permission check (403)
+        # without adding profiles to the provider directory
+        await recorder.call(
+            client, 'coverage', 'provider-create', 'POST', '/api/providers/create/',
+            {'user_id': uuid.uuid4().hex[:24], 'specialty': 'Load Testing', 'license_number': 'LT-0'},
+            ok_statuses=(403,),
+        )
+        await recorder.call(client, 'coverage', 'logout', 'POST', '/api/auth/logout/')
+
+    provider_id = await login(recorder, client, 'coverage', accounts.provider())
+    if provider_id:
+        await recorder.call(client, 'coverage', 'patient-list', 'GET', '/api/patients/')
+        await recorder.call(
+            client, 'coverage', 'provider-update', 'PUT', f'/api/providers/{provider_id}/update/',
+            {'phone': f'+1-555-{rng.randint(0, 9999):04d}'},
+        )
+
+
+SCENARIOS = {
+    'login': login_scenario,
+    'booking': booking_scenario,
+    'dashboard': dashboard_scenario,
+    'coverage': coverage_scenario,
+}
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'unknown scenario {name!r}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def mongo_opcounters(mongo_uri):
+    """Server-wide opcounters, or None when mongod cannot be reached"""
+    if not mongo_uri:
+        return None
+    try:
+        from pymongo import MongoClient
+        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=2000)
+        counters = client.admin.command('serverStatus')['opcounters']
+        client.close()
+        return {k: int(v) for k, v in counters.items()}
+    except Exception as e:
+        print(f'Mongo opcounters unavailable: {e}')
+        return None
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=Path(__file__).parent, stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main_async(args):
+    rng = random.Random(args.seed)
+    accounts = Accounts(args.seed, args.patients, args.providers, args.password_pool, rng)
+    recorder = Recorder()
+    names = list(args.mix)
+    weights = [args.mix[n] for n in names]
+
+    async def session(client, deadline):
+        # Every client covers all routes once before settling into the mix
+        if args.coverage_first:
+            await coverage_scenario(recorder, client, accounts, rng)
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(names, weights)[0]
+            await SCENARIOS[scenario](recorder, client, accounts, rng)
+
+    before = mongo_opcounters(args.mongo_uri)
+    recorder.start()
+    await run_clients(args.concurrency, args.duration, lambda: HTTPClient(args.url), session)
+    recorder.finish()
+    after = mongo_opcounters(args.mongo_uri)
+
+    total = recorder.total.summary()
+    mongo = None
+    if before and after:
+        ops = {k: after[k] - before.get(k, 0) for k in after}
+        ops_total = sum(ops.values())
+        mongo = {
+            'opcounters': ops,
+            'ops_per_request': ops_total / total['requests'] if total['requests'] else 0.0,
+        }
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'url': args.url,
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'mix': args.mix,
+            'seed': args.seed,
+            'host': platform.node(),
+            'cpus': os.cpu_count(),
+        },
+        'total': total,
+        'mongo': mongo,
+        'scenarios': {name: stats.summary() for name, stats in sorted(recorder.scenarios.items())},
+        'routes': {name: stats.summary() for name, stats in sorted(recorder.routes.items())},
+    }
+
+
+def print_report(results):
+    total = results['total']
+    print(f'{total["requests"]} requests  {total["throughput_rps"]:.0f} req/s  '
+          f'errors {total["error_rate"]:.2%}  p50 {total["p50_ms"]:.1f}  '
+          f'p95 {total["p95_ms"]:.1f}  p99 {total["p99_ms"]:.1f} ms')
+    if results.get('mongo'):
+        print(f'mongo ops/request: {results["mongo"]["ops_per_request"]:.2f}')
+    for section in ('scenarios', 'routes'):
+        print(f'\n{section}:')
+        print(f'  {"name":24} {"reqs":>8} {"rps":>8} {"err%":>7} {"p50":>8} {"p95":>8} {"p99":>8}')
+        for name, s in results[section].items():
+            print(f'  {name:24} {s["requests"]:8d} {s["throughput_rps"]:8.1f} '
+                  f'{s["error_rate"] * 100:6.2f}% {s["p50_ms"]:8.1f} {s["p95_ms"]:8.1f} {s["p99_ms"]:8.1f}')
+
+
+def compare(old_path, new_path):
+    """Print per-route deltas between two result files"""
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    print(f'{old["meta"].get("git_revision")} -> {new["meta"].get("git_revision")}')
+    print(f'  {"route":24} {"p50":>16} {"p99":>16} {"rps":>16} {"err%":>12}')
+    for name in sorted(set(old['routes']) | set(new['routes'])):
+        a, b = old['routes'].get(name), new['routes'].get(name)
+        if not a or not b:
+            print(f'  {name:24} {"only in " + ("new" if b else "old"):>16}')
+            continue
+        print(f'  {name:24} {a["p50_ms"]:7.1f}->{b["p50_ms"]:<7.1f} {a["p99_ms"]:7.1f}->{b["p99_ms"]:<7.1f} '
+              f'{a["throughput_rps"]:7.1f}->{b["throughput_rps"]:<7.1f} '
+              f'{a["error_rate"] * 100:5.2f}->{b["error_rate"] * 100:<5.2f}')
+    if old.get('mongo') and new.get('mongo'):
+        print(f'  mongo ops/request {old["mongo"]["ops_per_request"]:.2f} -> {new["mongo"]["ops_per_request"]:.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('login=1,booking=3,dashboard=6'))
+    parser.add_argument('--no-coverage', dest='coverage_first', action='store_false',
+                        help='skip the per-client pass over every route')
+    parser.add_argument('--seed', type=int, default=42, help='seed used by init_doctors.py')
+    parser.add_argument('--patients', type=int, default=1000, help='seeded patients to log in as')
+    parser.add_argument('--providers', type=int, default=50, help='seeded providers to log in as')
+    parser.add_argument('--password-pool', type=int, default=32, help='--password-pool used by init_doctors.py')
+    parser.add_argument('--mongo-uri', default=os.getenv('LOADTEST_MONGO_URI', 'mongodb://localhost:27017'),
+                        help='mongod to read opcounters from ("" to disable)')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='diff two result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = asyncio.run(main_async(args))
+    print_report(results)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
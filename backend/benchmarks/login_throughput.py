@@ -0,0 +1,143 @@
+"""
+Login storm benchmark.
+
+Fires concurrent logins at a running server while a probe client keeps
+hitting /api/health/, showing login throughput, how many requests were
+shed with 503, and whether other endpoints stay responsive.
+
+--offline drives the bcrypt pool in-process instead, at the worker and queue
+sizes the server would use: each login verifies one password on
+api.hashing.BcryptPool, a shed login waits Retry-After before trying again,
+and a probe thread times a trivial task to show it still gets the CPU. No
+server or mongod needed.
+
+Usage:
+    python benchmarks/login_throughput.py --url http://127.0.0.1:8000 \\
+        --email patient@example.com --password secret123 --concurrency 50
+    python benchmarks/login_throughput.py --offline --workers 1 --queue-size 16 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loadgen import HTTPClient, Stats, run_clients, timed
+
+
+def report(args, logins, probe, shed, attempts):
+    summary = {'login': logins.summary(), 'health_probe': probe.summary(), 'shed_503': shed, 'attempts': attempts}
+    login = summary['login']
+    print(f'login  c={args.concurrency}: {login["throughput_rps"]:7.1f} req/s  '
+          f'p50 {login["p50_ms"]:7.1f} ms  p99 {login["p99_ms"]:7.1f} ms  '
+          f'503s {shed}/{attempts}')
+    print(f'health probe: p50 {summary["health_probe"]["p50_ms"]:6.1f} ms  '
+          f'p99 {summary["health_probe"]["p99_ms"]:6.1f} ms')
+    return summary
+
+
+async def main_async(args):
+    logins = Stats()
+    probe = Stats()
+    shed = 0
+    credentials = {'email': args.email, 'password': args.password}
+
+    async def login_session(client, deadline):
+        nonlocal shed
+        while time.perf_counter() < deadline:
+            status, _, _ = await timed(logins, client.request('POST', '/api/auth/login/', credentials))
+            if status == 503:
+                shed += 1
+
+    async def probe_session(client, deadline):
+        while time.perf_counter() < deadline:
+            await timed(probe, client.request('GET', '/api/health/'))
+            await asyncio.sleep(0.05)
+
+    logins.started = probe.started = time.perf_counter()
+    await asyncio.gather(
+        run_clients(args.concurrency, args.duration, lambda: HTTPClient(args.url), login_session),
+        run_clients(1, args.duration, lambda: HTTPClient(args.url), probe_session),
+    )
+    logins.finished = probe.finished = time.perf_counter()
+    return report(args, logins, probe, shed, len(logins.latencies))
+
+
+def run_offline(args):
+    """Login storm against BcryptPool alone; latency is for accepted logins only"""
+    import bcrypt
+    from api.hashing import BcryptPool, PasswordHasherBusy
+
+    pool = BcryptPool(args.workers, args.queue_size)
+    password = args.password.encode()
+    stored = bcrypt.hashpw(password, bcrypt.gensalt(rounds=args.rounds))
+    logins = Stats()
+    probe = Stats()
+    shed = []
+
+    def login_client(deadline):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                pool.run(bcrypt.checkpw, password, stored)
+            except PasswordHasherBusy:
+                shed.append(1)
+                time.sleep(args.retry_after)
+                continue
+            logins.record(time.perf_counter() - started, True)
+
+    def probe_client(deadline):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            json.dumps({'status': 'healthy'})
+            probe.record(time.perf_counter() - started, True)
+            time.sleep(0.05)
+
+    logins.started = probe.started = time.perf_counter()
+    deadline = logins.started + args.duration
+    threads = [threading.Thread(target=login_client, args=(deadline,)) for _ in range(args.concurrency)]
+    threads.append(threading.Thread(target=probe_client, args=(deadline,)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logins.finished = probe.finished = time.perf_counter()
+    print(f'offline: {args.workers} worker(s), queue {args.queue_size}, BCRYPT_ROUNDS {args.rounds}')
+    return report(args, logins, probe, len(shed), len(logins.latencies) + len(shed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--email')
+    parser.add_argument('--password', default='secret123')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--offline', action='store_true', help='drive the bcrypt pool in-process')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='offline: BCRYPT_POOL_WORKERS (default: CPU count, as the server)')
+    parser.add_argument('--queue-size', type=int, default=16, help='offline: BCRYPT_POOL_QUEUE_SIZE')
+    parser.add_argument('--rounds', type=int, default=12, help='offline: BCRYPT_ROUNDS')
+    parser.add_argument('--retry-after', type=float, default=1.0,
+                        help='offline: seconds a shed client waits, as the 503 Retry-After header says')
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args()
+
+    if args.offline:
+        summary = run_offline(args)
+    elif not args.email:
+        parser.error('--email is required unless --offline is given')
+    else:
+        summary = asyncio.run(main_async(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
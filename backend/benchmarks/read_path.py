@@ -0,0 +1,130 @@
+"""
+Benchmark the appointment list read path: MongoEngine Documents + to_dict()
+versus the raw as_pymongo fast path in api/queries.py.
+
+Usage:
+    python benchmarks/read_path.py              # against MONGO_URI (scratch rows)
+    python benchmarks/read_path.py --offline    # decode-only, no mongod needed
+    python benchmarks/read_path.py --count 10000 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import bson
+from bson.codec_options import CodecOptions
+
+# Add parent directory to path so healthcare module can be imported
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthcare.settings')
+
+import django
+django.setup()
+
+from api.models import Appointment
+from api.queries import APPOINTMENT_MAPPER, fetch_records
+
+BENCH_PROVIDER_ID = 'bench-provider'
+
+
+def make_raw_appointments(count):
+    """Build raw appointment documents shaped like Appointment.to_mongo()"""
+    start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            '_id': bson.ObjectId(),
+            'patient_id': f'patient-{i % 500}',
+            'provider_id': BENCH_PROVIDER_ID,
+            'appointment_date': start + timedelta(minutes=30 * i),
+            'reason': 'Routine follow-up visit',
+            'status': ('pending', 'confirmed', 'completed', 'cancelled')[i % 4],
+            'notes': '',
+            'patient_email': f'patient{i % 500}@example.com',
+            'provider_email': 'bench@hospital.com',
+            'created_at': now,
+            'updated_at': now,
+        }
+        for i in range(count)
+    ]
+
+
+def measure(fn, repeat):
+    """Return (median seconds over repeat runs, peak traced bytes of one run)"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    # Traced separately: tracemalloc slows allocation-heavy code several fold
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+def run_offline(count, repeat):
+    """Compare decoding cost only, from pre-encoded BSON buffers"""
+    options = CodecOptions(tz_aware=True)
+    buffers = [bson.encode(doc) for doc in make_raw_appointments(count)]
+
+    def documents():
+        # QuerySet iteration keeps every Document in its result cache until
+        # the response is built, so hold them all here too
+        docs = [Appointment._from_son(bson.decode(buf, codec_options=options)) for buf in buffers]
+        return [doc.to_dict() for doc in docs]
+
+    def fast_path():
+        return APPOINTMENT_MAPPER.map_many(
+            bson.decode(buf, codec_options=options) for buf in buffers
+        )
+
+    assert documents() == fast_path()
+    return measure(documents, repeat), measure(fast_path, repeat)
+
+
+def run_live(count, repeat):
+    """Compare full request read path against a scratch collection"""
+    collection = Appointment._get_collection()
+    collection.delete_many({'provider_id': BENCH_PROVIDER_ID})
+    collection.insert_many(make_raw_appointments(count))
+    try:
+        def documents():
+            return [apt.to_dict() for apt in Appointment.objects(provider_id=BENCH_PROVIDER_ID)]
+
+        def fast_path():
+            return fetch_records(Appointment.objects(provider_id=BENCH_PROVIDER_ID), APPOINTMENT_MAPPER)
+
+        return measure(documents, repeat), measure(fast_path, repeat)
+    finally:
+        collection.delete_many({'provider_id': BENCH_PROVIDER_ID})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--offline', action='store_true', help='decode-only, no database')
+    args = parser.parse_args()
+
+    runner = run_offline if args.offline else run_live
+    (before_s, before_mem), (after_s, after_mem) = runner(args.count, args.repeat)
+
+    print(f'{args.count} appointments, median of {args.repeat} runs'
+          f' ({"offline decode" if args.offline else "live mongod"})')
+    print(f'  Documents + to_dict(): {before_s * 1000:8.1f} ms  peak {before_mem / 2**20:6.1f} MiB')
+    print(f'  as_pymongo + mapper:   {after_s * 1000:8.1f} ms  peak {after_mem / 2**20:6.1f} MiB')
+    print(f'  speedup {before_s / after_s:.1f}x, memory {before_mem / after_mem:.1f}x lower')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Track process start-up cost across releases with `python -X importtime`.
+
+Each scenario runs in a fresh interpreter; wall time is the median of
+--repeat runs and the import breakdown comes from -X importtime:
+
+    settings   import healthcare.settings (what every script pays first)
+    setup      django.setup() (management commands, init_doctors.py)
+    check      manage.py check (system checks load the URLconf)
+    worker     load the WSGI app and preload every view, as `manage.py serve`
+               does before forking workers
+
+    python benchmarks/startup.py --output results/startup-$(git rev-parse --short HEAD).json
+    LEAN_STARTUP=False python benchmarks/startup.py     # the full app stack
+    python benchmarks/startup.py --compare results/startup-old.json results/startup-new.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent
+
+SCENARIOS = {
+    'settings': ['-c', 'import healthcare.settings'],
+    'setup': ['-c', 'import django; django.setup()'],
+    'check': ['manage.py', 'check'],
+    'worker': [
+        '-c',
+        'from healthcare.wsgi import application; from api import warmup; warmup.preload()',
+    ],
+}
+
+
+def run(args, importtime=False):
+    """(wall seconds, stderr) for one fresh interpreter"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='healthcare.settings', PYTHONPATH=str(BACKEND))
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + args
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=BACKEND, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode:
+        raise SystemExit(f'{" ".join(args)} failed:\n{result.stderr[-2000:]}')
+    return elapsed, result.stderr
+
+
+def parse_importtime(stderr):
+    """Per-module (self us, cumulative us) from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure(name, args, repeat, top):
+    wall = statistics.median(run(args)[0] for _ in range(repeat))
+    modules = parse_importtime(run(args, importtime=True)[1])
+    packages = defaultdict(int)
+    for module, (self_us, _) in modules.items():
+        packages[module.split('.')[0]] += self_us
+    return {
+        'wall_ms': wall * 1000,
+        'import_ms': sum(self_us for self_us, _ in modules.values()) / 1000,
+        'modules': len(modules),
+        'packages_ms': {
+            package: us / 1000
+            for package, us in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        },
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=BACKEND, stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results):
+    print(f'{"scenario":10} {"wall ms":>9} {"import ms":>10} {"modules":>8}  heaviest packages (self ms)')
+    for name, s in results['scenarios'].items():
+        heaviest = ', '.join(f'{p} {ms:.0f}' for p, ms in list(s['packages_ms'].items())[:5])
+        print(f'{name:10} {s["wall_ms"]:9.0f} {s["import_ms"]:10.0f} {s["modules"]:8d}  {heaviest}')
+
+
+def compare(old_path, new_path):
+    """Print per-scenario deltas between two result files"""
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    print(f'{old["meta"].get("git_revision")} -> {new["meta"].get("git_revision")}')
+    print(f'  {"scenario":10} {"wall ms":>16} {"import ms":>16} {"modules":>14}')
+    for name in sorted(set(old['scenarios']) | set(new['scenarios'])):
+        a, b = old['scenarios'].get(name), new['scenarios'].get(name)
+        if not a or not b:
+            print(f'  {name:10} {"only in " + ("new" if b else "old"):>16}')
+            continue
+        print(f'  {name:10} {a["wall_ms"]:7.0f}->{b["wall_ms"]:<7.0f} {a["import_ms"]:7.0f}->{b["import_ms"]:<7.0f} '
+              f'{a["modules"]:6d}->{b["modules"]:<6d}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f'comma-separated subset of {", ".join(SCENARIOS)}')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='packages kept in the breakdown')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='diff two result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'lean_startup': os.getenv('LEAN_STARTUP', 'True'),
+            'repeat': args.repeat,
+            'host': platform.node(),
+        },
+        'scenarios': {name: measure(name, SCENARIOS[name], args.repeat, args.top) for name in names},
+    }
+    print_report(results)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Time the vitals analytics in api/analytics.py for a patient cohort.
+
+Offline (default) it builds a synthetic cohort in memory and times each
+stage: Series construction from samples in (patient, time) order as load()
+fetches them, and from shuffled samples (the full sort), the full
+cohort_summary(), and patient_trends() for one patient. The same
+statistics computed with per-patient Python loops are timed for comparison
+(--no-baseline skips them).
+
+With --live it also inserts the cohort under scratch patient ids into the
+vitals collection on MONGO_URI, times analytics.load() plus the summary end
+to end, then deletes the samples.
+
+Usage:
+    python benchmarks/trends.py --patients 1000 --days 30 --per-day 24
+    python benchmarks/trends.py --live --patients 1000 --days 30 --per-day 24
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent directory to path so healthcare module can be imported
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthcare.settings')
+
+import django
+django.setup()
+
+import numpy as np
+from api import analytics
+
+METRIC = 'heart_rate'
+WINDOW = 7
+Z = 3.0
+
+
+def best_of(repeat, fn):
+    """(median seconds, last result) of repeat runs of fn()"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+
+def synthetic(patients, days, per_day, seed):
+    """Per-sample (ids, epoch seconds, values) with a drift and rare spikes per patient"""
+    rng = np.random.default_rng(seed)
+    n = patients * days * per_day
+    patient = np.repeat(np.arange(patients), days * per_day)
+    step = np.tile(np.arange(days * per_day), patients)
+    end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0).timestamp()
+    times = end - (days * per_day - step) * (analytics.DAY / per_day)
+    baseline = rng.normal(72, 8, patients)[patient]
+    drift = rng.normal(0, 0.2, patients)[patient] * step / per_day
+    values = baseline + drift + rng.normal(0, 4, n)
+    spikes = rng.random(n) < 0.001
+    values[spikes] += rng.choice([-35, 45], spikes.sum())
+    ids = np.array([f'bench-{i:06d}' for i in range(patients)])[patient]
+    return ids, times, values
+
+
+def python_baseline(ids, times, values):
+    """The cohort summary with per-patient Python loops"""
+    by_patient = defaultdict(list)
+    for patient_id, t, v in zip(ids.tolist(), times.tolist(), values.tolist()):
+        by_patient[patient_id].append((t, v))
+    low, high = analytics.NORMAL_RANGES[METRIC]
+    summary = {}
+    for patient_id, samples in by_patient.items():
+        samples.sort()
+        vs = [v for _, v in samples]
+        n = len(vs)
+        mean = sum(vs) / n
+        std = math.sqrt(sum((v - mean) ** 2 for v in vs) / n)
+        t0 = samples[0][0]
+        xs = [(t - t0) / analytics.DAY for t, _ in samples]
+        sx, sy = sum(xs), sum(vs)
+        sxx = sum(x * x for x in xs)
+        sxy = sum(x * v for x, v in zip(xs, vs))
+        slope = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+        days = defaultdict(list)
+        for t, v in samples:
+            days[int(t // analytics.DAY)].append(v)
+        last = max(days)
+        window = [v for d, day_values in days.items() if last - WINDOW < d <= last for v in day_values]
+        summary[patient_id] = {
+            'mean': mean,
+            'slope': slope,
+            'rolling': sum(window) / len(window),
+            'anomalies': sum(1 for v in vs if std and abs(v - mean) / std > Z),
+            'breaches': sum(1 for v in vs if v < low or v > high),
+        }
+    return summary
+
+
+def run_live(ids, times, values, repeat):
+    from api.vitals import vitals_collection
+
+    collection = vitals_collection()
+    docs = [
+        {
+            'recorded_at': datetime.fromtimestamp(t, timezone.utc),
+            'meta': {'patient_id': patient_id, 'metric': METRIC},
+            'value': float(v),
+        }
+        for patient_id, t, v in zip(ids.tolist(), times.tolist(), values.tolist())
+    ]
+    patient_ids = sorted(set(ids.tolist()))
+    started = time.perf_counter()
+    for offset in range(0, len(docs), 50000):
+        collection.insert_many(docs[offset:offset + 50000], ordered=False)
+    print(f'inserted {len(docs):,} samples in {time.perf_counter() - started:.1f} s')
+
+    start = datetime.fromtimestamp(times.min(), timezone.utc) - timedelta(seconds=1)
+    end = datetime.fromtimestamp(times.max(), timezone.utc) + timedelta(seconds=1)
+    try:
+        load_s, series = best_of(repeat, lambda: analytics.load(patient_ids, METRIC, start, end))
+        one_s, _ = best_of(repeat, lambda: analytics.patient_trends(
+            analytics.load(patient_ids[:1], METRIC, start, end), METRIC, WINDOW, Z
+        ))
+        summary_s, _ = best_of(repeat, lambda: analytics.cohort_summary(series, METRIC, WINDOW, Z))
+    finally:
+        collection.delete_many({'meta.patient_id': {'$in': patient_ids}})
+    print(f'{"live load (cohort)":34} {load_s * 1000:9.1f} ms  ({len(series):,} samples)')
+    print(f'{"live load + summary (cohort)":34} {(load_s + summary_s) * 1000:9.1f} ms')
+    print(f'{"live load + trends (one patient)":34} {one_s * 1000:9.1f} ms')
+    return load_s + summary_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--patients', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--per-day', type=int, default=24, help='samples per patient per day')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=250.0,
+                        help='interactive latency budget for the cohort summary')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--no-baseline', action='store_true', help='skip the Python loop baseline')
+    parser.add_argument('--live', action='store_true', help='also time load() against MONGO_URI')
+    args = parser.parse_args()
+
+    ids, times, values = synthetic(args.patients, args.days, args.per_day, args.seed)
+    print(f'{args.patients:,} patients x {args.days} days x {args.per_day}/day = {len(values):,} samples')
+
+    build_s, series = best_of(args.repeat, lambda: analytics.Series(ids, times, values))
+    shuffled = np.random.default_rng(args.seed).permutation(len(values))
+    unsorted_s, _ = best_of(args.repeat, lambda: analytics.Series(
+        ids[shuffled], times[shuffled], values[shuffled]
+    ))
+    summary_s, summary = best_of(args.repeat, lambda: analytics.cohort_summary(series, METRIC, WINDOW, Z))
+    first = ids[0]
+    mask = ids == first
+    one = analytics.Series(ids[mask], times[mask], values[mask])
+    one_s, _ = best_of(args.repeat, lambda: analytics.patient_trends(one, METRIC, WINDOW, Z))
+
+    print(f'{"Series build (sorted fetch)":34} {build_s * 1000:9.1f} ms')
+    print(f'{"Series build (unsorted)":34} {unsorted_s * 1000:9.1f} ms')
+    print(f'{"cohort_summary":34} {summary_s * 1000:9.1f} ms')
+    print(f'{"patient_trends (one patient)":34} {one_s * 1000:9.1f} ms')
+
+    if not args.no_baseline:
+        baseline_s, baseline = best_of(1, lambda: python_baseline(ids, times, values))
+        print(f'{"Python loops (cohort)":34} {baseline_s * 1000:9.1f} ms  '
+              f'({baseline_s / (build_s + summary_s):.0f}x slower)')
+        index = {patient_id: i for i, patient_id in enumerate(summary['patient_ids'])}
+        worst = max(
+            abs(expected['rolling'] - summary['rolling'][index[patient_id]])
+            + abs(expected['slope'] - summary['slope_per_day'][index[patient_id]])
+            for patient_id, expected in baseline.items()
+        )
+        print(f'{"max difference vs baseline":34} {worst:9.2e}')
+
+    total = build_s + summary_s
+    if args.live:
+        total = run_live(ids, times, values, args.repeat)
+    verdict = 'within' if total * 1000 <= args.budget_ms else 'OVER'
+    print(f'cohort total {total * 1000:.1f} ms: {verdict} the {args.budget_ms:.0f} ms budget')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,31 @@
 """
 Initialize MongoDB with sample doctor data
 Run this script to populate doctors in the database
+
+With volume flags it also acts as a synthetic data seeder for capacity
+testing, e.g. a 1M-appointment dataset:
+
+    python database/init_doctors.py --providers 500 --patients 100000 \
+        --appointments 1000000 --seed 42
+
+Seeded documents get ids derived from --seed, and dates are laid out around
+an anchor day (--now, default today in UTC). A rerun with the same seed
+reuses the anchor the first run stored in the seeded profiles, so it
+generates the same documents: existing ones are skipped, missing ones are
+inserted.
 """
+import argparse
+import hashlib
 import os
+import random
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import bcrypt
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
 
 # Add parent directory to path so healthcare module can be imported
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -17,7 +36,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthcare.settings')
 import django
 django.setup()
 
-from api.models import User, ProviderProfile
+from django.conf import settings
+from api.models import User, PatientProfile, ProviderPatient, ProviderProfile, Appointment
 
 # Sample doctors data
 DOCTORS_DATA = [
@@ -74,11 +94,11 @@ DOCTORS_DATA = [
 ]
 
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: int = None) -> str:
     """Hash password using bcrypt"""
     return bcrypt.hashpw(
         password.encode('utf-8'),
-        bcrypt.gensalt()
+        bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
     ).decode('utf-8')
 
 
@@ -123,7 +143,6 @@ def init_doctors():
                     'Friday': '09:00-17:00',
                     'Saturday': '10:00-14:00',
                 },
-                patients=[],
             )
             provider.save()
             
@@ -133,10 +152,308 @@ def init_doctors():
             print(f'✗ Failed to create doctor {email}: {str(e)}')
 
 
+# Synthetic data seeding
+
+SPECIALTIES = [
+    ('General Practice', 30), ('Pediatrics', 12), ('Cardiology', 8), ('Dermatology', 8),
+    ('Orthopedics', 8), ('Obstetrics', 7), ('Psychiatry', 7), ('Neurology', 5),
+    ('Ophthalmology', 5), ('Physiotherapy', 5), ('Nephrology', 3), ('Oncology', 2),
+]
+REASONS = [
+    'Routine check-up', 'Follow-up visit', 'Prescription renewal', 'Lab results review',
+    'Persistent headache', 'Back pain', 'Skin rash', 'Chest discomfort', 'Vaccination',
+    'Physiotherapy session', 'Blood pressure review', 'Annual physical',
+]
+WEEKDAY_HOURS = (9, 17)
+SATURDAY_HOURS = (10, 14)
+SLOT_MINUTES = 30
+PAST_STATUSES = (['completed', 'cancelled'], [85, 15])
+FUTURE_STATUSES = (['pending', 'confirmed', 'cancelled'], [40, 50, 10])
+
+
+def seeded_id(seed: int, kind: str, index: int) -> ObjectId:
+    """Deterministic ObjectId so reruns with the same seed hit the same documents"""
+    return ObjectId(hashlib.sha1(f'{seed}:{kind}:{index}'.encode('utf-8')).digest()[:12])
+
+
+def seeded_password(index: int, password_pool: int) -> str:
+    """Plaintext password for seeded user `index` (for load-test logins)"""
+    return f'SeedPass{index % password_pool}!'
+
+
+def zipf_weights(count: int, exponent: float, rng: random.Random):
+    """Cumulative Zipf-like weights in shuffled order"""
+    weights = [1.0 / (rank + 1) ** exponent for rank in range(count)]
+    rng.shuffle(weights)
+    total = 0.0
+    cumulative = []
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
+
+
+def slot_calendar(start: datetime, days: int):
+    """Every bookable slot start between start and start + days"""
+    slots = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        weekday = day.weekday()
+        if weekday == 6:
+            continue
+        first, last = SATURDAY_HOURS if weekday == 5 else WEEKDAY_HOURS
+        minute = first * 60
+        while minute < last * 60:
+            slots.append(day + timedelta(minutes=minute))
+            minute += SLOT_MINUTES
+    return slots
+
+
+def insert_batches(document_cls, documents, batch_size: int):
+    """
+    insert_many in unordered batches. Returns (inserted, existing, rejected):
+    documents whose _id is already present are skipped as existing; ones
+    another unique index refuses (e.g. a slot booked outside the seeder)
+    are counted as rejected.
+    """
+    collection = document_cls._get_collection()
+    inserted = existing = rejected = 0
+    batch = []
+
+    def flush():
+        nonlocal inserted, existing, rejected
+        try:
+            inserted += len(collection.insert_many(batch, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get('writeErrors', [])
+            fatal = [err for err in errors if err.get('code') != 11000]
+            if fatal:
+                raise
+            inserted += e.details.get('nInserted', 0)
+            duplicates = [batch[err['index']]['_id'] for err in errors]
+            present = collection.count_documents({'_id': {'$in': duplicates}})
+            existing += present
+            rejected += len(duplicates) - present
+        batch.clear()
+
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return inserted, existing, rejected
+
+
+def seeded_anchor(seed_value: int):
+    """The anchor day an earlier run with this seed stored, or None"""
+    for document_cls, kind in ((ProviderProfile, 'provider_profile'), (PatientProfile, 'patient_profile')):
+        doc = document_cls._get_collection().find_one({'_id': seeded_id(seed_value, kind, 0)}, {'created_at': 1})
+        if doc and doc.get('created_at'):
+            created = doc['created_at']
+            return created if created.tzinfo else created.replace(tzinfo=timezone.utc)
+    return None
+
+
+def seed(providers: int, patients: int, appointments: int, seed_value: int = 42,
+         batch_size: int = 5000, workers: int = None, password_pool: int = 32,
+         days: int = 365, now: datetime = None):
+    """
+    Generate providers, patients and appointments with realistic distributions.
+
+    Provider popularity and patient visit frequency follow Zipf-like curves,
+    specialties are weighted towards general practice, appointments fall on
+    each provider's working slots (never two active bookings in one slot),
+    and statuses depend on whether the slot is in the past or future.
+
+    Past and future are relative to `now`, the anchor day. Without it the
+    anchor of an earlier run with this seed is reused, else today (UTC), so
+    reruns generate the same dataset.
+    """
+    rng = random.Random(seed_value)
+    stored = seeded_anchor(seed_value)
+    if now is None:
+        now = stored or datetime.now(timezone.utc)
+    now = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if stored and stored != now:
+        print(f'! Seed {seed_value} was anchored at {stored.date().isoformat()}; documents already '
+              f'present keep those dates and new ones use {now.date().isoformat()}')
+    print(f'Anchored at {now.date().isoformat()}')
+    started = time.perf_counter()
+
+    # bcrypt dominates user creation; hash a small pool of passwords in
+    # parallel processes and share the hashes across seeded users
+    print(f'Hashing {password_pool} passwords with {workers or os.cpu_count()} processes...')
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        hashes = list(pool.map(hash_password, [seeded_password(i, password_pool) for i in range(password_pool)]))
+
+    provider_ids = [str(seeded_id(seed_value, 'provider', i)) for i in range(providers)]
+    patient_ids = [str(seeded_id(seed_value, 'patient', i)) for i in range(patients)]
+    specialties, specialty_weights = zip(*SPECIALTIES)
+
+    def users():
+        for role, ids in (('provider', provider_ids), ('patient', patient_ids)):
+            for i, user_id in enumerate(ids):
+                created = now - timedelta(days=rng.randint(days, days * 2))
+                yield {
+                    '_id': ObjectId(user_id),
+                    'email': f'seed{seed_value}-{role}{i}@healthlink.test',
+                    'password_hash': hashes[i % password_pool],
+                    'role': role,
+                    'consent_given': True,
+                    'created_at': created,
+                    'updated_at': created,
+                    'is_active': True,
+                }
+
+    def provider_profiles():
+        for i, user_id in enumerate(provider_ids):
+            yield {
+                '_id': seeded_id(seed_value, 'provider_profile', i),
+                'user_id': user_id,
+                'specialty': rng.choices(specialties, specialty_weights)[0],
+                'license_number': f'SEED{seed_value}-{i:07d}',
+                'qualifications': ['MD', 'Board Certified'],
+                'experience_years': str(rng.randint(1, 35)),
+                'clinic_address': f'{rng.randint(1, 999)} Seed Street, Suite {rng.randint(1, 50)}',
+                'phone': f'+1-555-{rng.randint(0, 9999):04d}',
+                'available_hours': {
+                    'Monday': '09:00-17:00',
+                    'Tuesday': '09:00-17:00',
+                    'Wednesday': '09:00-17:00',
+                    'Thursday': '09:00-17:00',
+                    'Friday': '09:00-17:00',
+                    'Saturday': '10:00-14:00',
+                },
+                'created_at': now,
+                'updated_at': now,
+            }
+
+    def patient_profiles():
+        for i, user_id in enumerate(patient_ids):
+            yield {
+                '_id': seeded_id(seed_value, 'patient_profile', i),
+                'user_id': user_id,
+                'wellness_goals': {},
+                'appointments': [],
+                'health_data': {},
+                'medical_history': [],
+                'allergies': [],
+                'medications': [],
+                'created_at': now,
+                'updated_at': now,
+            }
+
+    # Split appointments across providers by popularity, then give each
+    # provider distinct slots so the active-slot unique index holds
+    per_provider = [0] * providers
+    if providers:
+        provider_cum = zipf_weights(providers, 0.8, rng)
+        for index in rng.choices(range(providers), cum_weights=provider_cum, k=appointments):
+            per_provider[index] += 1
+    slots_per_day = len(slot_calendar(now, 7)) / 7
+    window_days = max(days, int(max(per_provider, default=0) / slots_per_day) + 7)
+    window_start = now - timedelta(days=int(window_days * 0.75))
+    calendar = slot_calendar(window_start, window_days)
+    patient_cum = zipf_weights(patients, 0.5, rng) if patients else []
+    links = set()
+
+    def appointment_docs():
+        index = 0
+        for provider_index, count in enumerate(per_provider):
+            provider_id = provider_ids[provider_index]
+            slot_dates = rng.sample(calendar, min(count, len(calendar)))
+            chosen = rng.choices(range(patients), cum_weights=patient_cum, k=len(slot_dates))
+            for appointment_date, patient_index in zip(slot_dates, chosen):
+                past = appointment_date < now
+                statuses, weights = PAST_STATUSES if past else FUTURE_STATUSES
+                created = min(now, appointment_date - timedelta(days=rng.randint(1, 30)))
+                updated = min(now, appointment_date) if past else created
+                links.add((provider_id, patient_ids[patient_index]))
+                yield {
+                    '_id': seeded_id(seed_value, 'appointment', index),
+                    'patient_id': patient_ids[patient_index],
+                    'provider_id': provider_id,
+                    'appointment_date': appointment_date,
+                    'reason': rng.choice(REASONS),
+                    'status': rng.choices(statuses, weights)[0],
+                    'notes': '',
+                    'patient_email': f'seed{seed_value}-patient{patient_index}@healthlink.test',
+                    'provider_email': f'seed{seed_value}-provider{provider_index}@healthlink.test',
+                    'created_at': created,
+                    'updated_at': updated,
+                }
+                index += 1
+
+    def link_docs():
+        for provider_id, patient_id in sorted(links):
+            yield {
+                '_id': seeded_id(seed_value, f'link:{provider_id}', patient_id),
+                'provider_id': provider_id,
+                'patient_id': patient_id,
+                'created_at': now,
+            }
+
+    steps = [
+        ('users', User, users),
+        ('provider profiles', ProviderProfile, provider_profiles),
+        ('patient profiles', PatientProfile, patient_profiles),
+        ('appointments', Appointment, appointment_docs),
+        ('provider-patient links', ProviderPatient, link_docs),
+    ]
+    for label, document_cls, documents in steps:
+        step_started = time.perf_counter()
+        inserted, existing, rejected = insert_batches(document_cls, documents(), batch_size)
+        print(f'✓ {label}: {inserted} inserted, {existing} already present'
+              + (f', {rejected} rejected by a unique index' if rejected else '')
+              + f' ({time.perf_counter() - step_started:.1f}s)')
+
+    print(f'Seeded in {time.perf_counter() - started:.1f}s '
+          f'(logins: seed{seed_value}-<role><n>@healthlink.test / SeedPass<n % {password_pool}>!)')
+
+
+def parse_anchor(value: str) -> datetime:
+    try:
+        anchor = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid date: {value}')
+    return anchor if anchor.tzinfo else anchor.replace(tzinfo=timezone.utc)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Initialize sample doctors and optionally seed synthetic data')
+    parser.add_argument('--providers', type=int, default=0)
+    parser.add_argument('--patients', type=int, default=0)
+    parser.add_argument('--appointments', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=42, help='random seed; same seed = same dataset')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=None, help='password hashing processes')
+    parser.add_argument('--password-pool', type=int, default=32, help='distinct seeded passwords')
+    parser.add_argument('--days', type=int, default=365, help='minimum calendar window for appointments')
+    parser.add_argument('--now', type=parse_anchor, default=None,
+                        help='anchor day (YYYY-MM-DD) appointments are past or future of; '
+                             'default: the earlier run\'s for this seed, else today')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
+    args = parse_args()
     try:
         init_doctors()
         print('\n✓ Doctor initialization completed!')
+        if args.providers or args.patients or args.appointments:
+            if args.appointments and not (args.providers and args.patients):
+                raise ValueError('--appointments needs --providers and --patients')
+            seed(
+                args.providers, args.patients, args.appointments,
+                seed_value=args.seed,
+                batch_size=args.batch_size,
+                workers=args.workers,
+                password_pool=args.password_pool,
+                days=args.days,
+                now=args.now,
+            )
+            print('\n✓ Synthetic data seeding completed!')
     except Exception as e:
         print(f'\n✗ Error during initialization: {str(e)}')
         sys.exit(1)
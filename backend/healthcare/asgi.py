@@ -1,5 +1,10 @@
 """
 ASGI config for healthcare project.
+
+With ASYNC_API=True, serves the hot read endpoints from native async views
+(see api/views/async_reads.py) and the appointment event stream. Run with e.g.:
+
+    ASYNC_API=True uvicorn healthcare.asgi:application --workers 4
 """
 
 import os
@@ -21,22 +21,34 @@ DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
 
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
 
+# Lean start-up (default): the JWT JSON API needs neither django.contrib.auth
+# (and its models) nor the CSRF and clickjacking middleware, and URL modules
+# import views on first request. LEAN_STARTUP=False restores the full stack.
+LEAN_STARTUP = os.getenv('LEAN_STARTUP', 'True').lower() == 'true'
+
 # Application definition
 INSTALLED_APPS = [
-    'django.contrib.contenttypes',
-    'django.contrib.auth',
     'rest_framework',
     'corsheaders',
     'api',
 ]
+if not LEAN_STARTUP:
+    INSTALLED_APPS[:0] = [
+        'django.contrib.contenttypes',
+        'django.contrib.auth',
+    ]
 
 MIDDLEWARE = [
+    'middleware.db_instrumentation.DBInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+if not LEAN_STARTUP:
+    MIDDLEWARE += [
+        'django.middleware.csrf.CsrfViewMiddleware',
+        'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    ]
 
 ROOT_URLCONF = 'healthcare.urls'
 
@@ -68,19 +80,43 @@ DATABASES = {
 MONGO_URI = os.getenv('MONGO_URI', 'mongodb://mongodb:27017/healthcare')
 DATABASE_NAME = 'healthcare'
 
-# MongoEngine Configuration
-import mongoengine as me
-try:
-    me.connect(
-        db=DATABASE_NAME,
-        host=MONGO_URI,
-        connect=False,  # Lazy connection
-        serverSelectionTimeoutMS=5000,
-        tz_aware=True,
-    )
-except Exception as e:
-    print(f'MongoDB connection warning: {str(e)}')
-    # Continue anyway, connection will be attempted on first use
+# The MongoEngine connection is registered in ApiConfig.ready() (api/apps.py),
+# so importing settings stays cheap
+
+# Per-request Mongo instrumentation (Server-Timing header). Requests slower
+# than REQUEST_SLOW_MS, with a command slower than DB_SLOW_COMMAND_MS, or
+# issuing more than REQUEST_SLOW_DB_COMMANDS commands are logged.
+REQUEST_SLOW_MS = float(os.getenv('REQUEST_SLOW_MS', '500'))
+DB_SLOW_COMMAND_MS = float(os.getenv('DB_SLOW_COMMAND_MS', '100'))
+REQUEST_SLOW_DB_COMMANDS = int(os.getenv('REQUEST_SLOW_DB_COMMANDS', '20'))
+
+# Per-route request metrics shared by all worker processes through a
+# memory-mapped file in METRICS_DIR, served at /api/metrics/
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_DIR = os.getenv('METRICS_DIR', '/tmp/healthlink-metrics')
+METRICS_MAX_PROCESSES = int(os.getenv('METRICS_MAX_PROCESSES', '64'))
+# Who may read /api/metrics/: clients whose address is in METRICS_ALLOWED_IPS
+# (comma-separated addresses or CIDR ranges; the socket peer, so behind a
+# proxy list the proxy) or that send `Authorization: Bearer <METRICS_TOKEN>`.
+# Empty values disable that way in.
+METRICS_ALLOWED_IPS = [ip for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip]
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Serve hot read endpoints from native async views on Motor, and the
+# appointment event stream, under healthcare/asgi.py. Off by default: the gain
+# over the synchronous DRF views has not been measured yet
+# (benchmarks/async_throughput.py).
+ASYNC_API = os.getenv('ASYNC_API', 'False').lower() == 'true'
+ASYNC_MONGO_MAX_POOL_SIZE = int(os.getenv('ASYNC_MONGO_MAX_POOL_SIZE', '100'))
+
+# `manage.py serve` (gunicorn). 0 workers/threads = derive from the CPU count;
+# the graceful timeout is how long in-flight requests get on shutdown/reload.
+SERVE_BIND = os.getenv('SERVE_BIND', '0.0.0.0:8000')
+SERVE_WORKERS = int(os.getenv('SERVE_WORKERS', '0'))
+SERVE_THREADS = int(os.getenv('SERVE_THREADS', '0'))
+SERVE_TIMEOUT = int(os.getenv('SERVE_TIMEOUT', '30'))
+SERVE_GRACEFUL_TIMEOUT = int(os.getenv('SERVE_GRACEFUL_TIMEOUT', '30'))
+SERVE_MAX_REQUESTS = int(os.getenv('SERVE_MAX_REQUESTS', '0'))
 
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
@@ -95,6 +131,9 @@ REST_FRAMEWORK = {
     ),
     'EXCEPTION_HANDLER': 'api.exceptions.custom_exception_handler',
 }
+if LEAN_STARTUP:
+    # AnonymousUser lives in django.contrib.auth; anonymous requests get None
+    REST_FRAMEWORK['UNAUTHENTICATED_USER'] = None
 
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
@@ -138,6 +177,82 @@ JWT_SECRET = os.getenv('JWT_SECRET', 'your-super-secret-jwt-key-change-this')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 24
 
+# bcrypt work factor; pick one for this host with `manage.py calibrate_bcrypt`.
+# Hashes with a different cost are upgraded on the next successful login.
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+# Dedicated hashing pool per process (0 = one thread per CPU) and how many
+# extra jobs may wait before requests are rejected with 503
+BCRYPT_POOL_WORKERS = int(os.getenv('BCRYPT_POOL_WORKERS', '0'))
+BCRYPT_POOL_QUEUE_SIZE = int(os.getenv('BCRYPT_POOL_QUEUE_SIZE', '16'))
+
+# Authenticated user state cache (per process). Bounds how long a deactivated
+# or re-roled user is still accepted by workers that did not perform the update.
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '30'))
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '10000'))
+
+# Caches. Local memory per process by default; set DIRECTORY_CACHE_LOCATION to
+# a redis:// URL (needs the redis package) to share the provider directory
+# cache and its version counter between worker processes.
+DIRECTORY_CACHE_LOCATION = os.getenv('DIRECTORY_CACHE_LOCATION', '')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'directory': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': DIRECTORY_CACHE_LOCATION,
+        'KEY_PREFIX': 'healthlink',
+    } if DIRECTORY_CACHE_LOCATION else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'provider-directory',
+    },
+}
+# Upper bound on how stale a cached directory entry (and its ETag) can be
+# when the write happened in another process that does not share the cache
+# backend; per-process version counters expire after it too
+PROVIDER_DIRECTORY_CACHE_TTL = int(os.getenv('PROVIDER_DIRECTORY_CACHE_TTL', '60'))
+
+# Server-Sent Events (/api/appointments/stream/, ASGI only). Per-stream queue
+# size before a slow client is dropped, keepalive interval, how long a stream
+# lives before the client is asked to reconnect, how many missed events a
+# reconnect may replay, the reconnect delay suggested to EventSource, and how
+# long a stream ticket (POST /api/appointments/stream/ticket/) stays valid.
+SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', '100'))
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_MAX_STREAM_SECONDS = float(os.getenv('SSE_MAX_STREAM_SECONDS', '300'))
+SSE_REPLAY_LIMIT = int(os.getenv('SSE_REPLAY_LIMIT', '1000'))
+SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', '3000'))
+SSE_TICKET_TTL_SECONDS = int(os.getenv('SSE_TICKET_TTL_SECONDS', '30'))
+
+# Appointment scheduling
+APPOINTMENT_SLOT_MINUTES = int(os.getenv('APPOINTMENT_SLOT_MINUTES', '30'))
+AVAILABILITY_DEFAULT_DAYS = 14
+AVAILABILITY_MAX_DAYS = 92
+# /api/appointments/changes/ only returns writes at least this old, so a
+# write still in flight is not skipped by a token that already moved past it
+APPOINTMENT_CHANGES_SETTLE_SECONDS = float(os.getenv('APPOINTMENT_CHANGES_SETTLE_SECONDS', '2'))
+# Most appointments one bulk status request may change
+APPOINTMENT_BULK_MAX = int(os.getenv('APPOINTMENT_BULK_MAX', '1000'))
+# Most occurrences a recurring series booking may expand to
+APPOINTMENT_SERIES_MAX = int(os.getenv('APPOINTMENT_SERIES_MAX', '104'))
+# /api/providers/<id>/stats/: default and maximum range in days (api/rollups.py)
+PROVIDER_STATS_DEFAULT_DAYS = 30
+PROVIDER_STATS_MAX_DAYS = int(os.getenv('PROVIDER_STATS_MAX_DAYS', '366'))
+
+# Patient vitals (api/vitals.py). Range reads default to the last
+# VITALS_DEFAULT_DAYS and span at most VITALS_MAX_DAYS; raw reads return the
+# newest VITALS_RAW_LIMIT samples. One POST takes up to VITALS_MAX_SAMPLES.
+VITALS_DEFAULT_DAYS = 30
+VITALS_MAX_DAYS = int(os.getenv('VITALS_MAX_DAYS', '731'))
+VITALS_RAW_LIMIT = int(os.getenv('VITALS_RAW_LIMIT', '1000'))
+VITALS_MAX_SAMPLES = int(os.getenv('VITALS_MAX_SAMPLES', '1000'))
+# /api/patients/<id>/trends/: default and maximum range, rolling window and
+# z-score threshold defaults
+TRENDS_DEFAULT_DAYS = 90
+TRENDS_MAX_DAYS = int(os.getenv('TRENDS_MAX_DAYS', '366'))
+TRENDS_WINDOW_DAYS = 7
+TRENDS_Z_THRESHOLD = 3.0
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
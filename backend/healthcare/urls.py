@@ -3,6 +3,7 @@ URL Configuration for healthcare project.
 """
 from django.urls import path, include
 from django.http import JsonResponse
+from api.views.metrics import metrics_view
 
 def health_check(request):
     return JsonResponse({
@@ -13,6 +14,7 @@ def health_check(request):
 
 urlpatterns = [
     path('api/health/', health_check, name='health'),
+    path('api/metrics/', metrics_view, name='metrics'),
     path('api/auth/', include('api.urls.auth')),
     path('api/patients/', include('api.urls.patients')),
     path('api/providers/', include('api.urls.providers')),
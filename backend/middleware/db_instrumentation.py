@@ -0,0 +1,226 @@
+"""
+Per-request MongoDB instrumentation
+
+pymongo command and connection pool listeners attribute every command, and
+any wait for a pooled connection, to the request being served (through a
+context variable, which Motor copies into its executor threads).
+DBInstrumentationMiddleware reports the totals in a Server-Timing header,
+records them in the per-route metrics (api.metrics) and logs requests over
+the configured thresholds with their slowest command and its filter shape.
+
+The listeners are passed to the MongoEngine and Motor clients as event
+listeners, so this module must be importable before Django settings finish
+loading.
+"""
+import contextvars
+import logging
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from pymongo import monitoring
+
+logger = logging.getLogger('api.db')
+
+# Commands whose filter lives under a key other than 'filter'
+_FILTER_KEYS = {
+    'find': 'filter',
+    'count': 'query',
+    'distinct': 'query',
+    'findAndModify': 'query',
+    'delete': 'deletes',
+    'update': 'updates',
+    'aggregate': 'pipeline',
+}
+
+
+class RequestDBStats:
+    """Mongo command totals for one request"""
+
+    __slots__ = ('count', 'total_us', 'slowest_us', 'slowest', 'pending', 'pool_wait')
+
+    def __init__(self):
+        self.count = 0
+        self.total_us = 0
+        self.slowest_us = 0
+        self.slowest = None
+        self.pending = {}
+        self.pool_wait = 0.0
+
+
+_current = contextvars.ContextVar('request_db_stats', default=None)
+
+
+class CommandListener(monitoring.CommandListener):
+    """Feeds command durations into the current request's RequestDBStats"""
+
+    def started(self, event):
+        stats = _current.get()
+        if stats is not None:
+            stats.pending[event.request_id] = event.command
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        stats = _current.get()
+        if stats is None:
+            return
+        command = stats.pending.pop(event.request_id, None)
+        duration = event.duration_micros
+        stats.count += 1
+        stats.total_us += duration
+        if duration > stats.slowest_us:
+            stats.slowest_us = duration
+            stats.slowest = (event.command_name, command)
+
+
+command_listener = CommandListener()
+
+
+class PoolWaitListener(monitoring.ConnectionPoolListener):
+    """Adds time spent waiting for a pooled connection to the current request"""
+
+    def __init__(self):
+        # Check-out starts and completes on the calling thread
+        self._started = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._started.at = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        stats = _current.get()
+        if stats is not None:
+            stats.pool_wait += time.perf_counter() - getattr(self._started, 'at', time.perf_counter())
+
+    def connection_check_out_failed(self, event):
+        self.connection_checked_out(event)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+pool_wait_listener = PoolWaitListener()
+
+# Passed as event_listeners to every MongoClient
+event_listeners = [command_listener, pool_wait_listener]
+
+
+def shape(value):
+    """Replace literal values with '?' so filters can be logged and grouped"""
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shaped = [shape(item) for item in value]
+        return shaped if any(isinstance(item, (dict, list)) for item in shaped) else '?'
+    return '?'
+
+
+def describe_command(command_name, command):
+    """'<name> <collection> <filter shape>' for a logged command"""
+    if not command:
+        return command_name
+    collection = command.get(command_name, '')
+    key = _FILTER_KEYS.get(command_name, 'filter')
+    filter_doc = command.get(key)
+    if command_name in ('update', 'delete') and filter_doc:
+        filter_doc = filter_doc[0].get('q')
+    return f'{command_name} {collection} {shape(filter_doc) if filter_doc is not None else ""}'.rstrip()
+
+
+class DBInstrumentationMiddleware:
+    """
+    Add Server-Timing (db, app) to every response and log slow requests.
+
+    Thresholds: REQUEST_SLOW_MS for the whole request, DB_SLOW_COMMAND_MS for
+    any single command and REQUEST_SLOW_DB_COMMANDS for the command count.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from django.conf import settings
+        from api.metrics import get_registry
+        self.get_response = get_response
+        self.metrics = get_registry() if settings.METRICS_ENABLED else None
+        self.slow_request_us = settings.REQUEST_SLOW_MS * 1000
+        self.slow_command_us = settings.DB_SLOW_COMMAND_MS * 1000
+        self.max_commands = settings.REQUEST_SLOW_DB_COMMANDS
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestDBStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats = RequestDBStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, started)
+
+    def _finish(self, request, response, stats, started):
+        elapsed = time.perf_counter() - started
+        elapsed_us = int(elapsed * 1_000_000)
+        if self.metrics is not None:
+            match = request.resolver_match
+            self.metrics.observe(
+                match.url_name if match is not None else None,
+                response.status_code,
+                elapsed,
+                stats.count,
+                stats.total_us / 1_000_000,
+                stats.pool_wait,
+            )
+        response['Server-Timing'] = (
+            f'db;dur={stats.total_us / 1000:.2f};desc="{stats.count} cmds", '
+            f'app;dur={elapsed_us / 1000:.2f}'
+        )
+        if (
+            elapsed_us > self.slow_request_us
+            or stats.slowest_us > self.slow_command_us
+            or stats.count > self.max_commands
+        ):
+            slowest = describe_command(*stats.slowest) if stats.slowest else '-'
+            logger.warning(
+                f'Slow request {request.method} {request.path} {response.status_code}: '
+                f'{elapsed_us / 1000:.1f} ms, {stats.count} db commands in {stats.total_us / 1000:.1f} ms, '
+                f'slowest {stats.slowest_us / 1000:.1f} ms: {slowest}'
+            )
+        return response
@@ -35,6 +35,7 @@ echo "🗄️  Running database setup..."
 echo "👨‍⚕️  Initializing sample doctors..."
 python database/init_doctors.py
 
-# Start Django development server
-echo "✅ Starting Django development server on 0.0.0.0:8000..."
-python manage.py runserver 0.0.0.0:8000
+# Start gunicorn (preloaded app, workers warmed up before taking traffic).
+# exec so SIGTERM reaches gunicorn and in-flight requests finish gracefully.
+echo "✅ Starting Django backend on 0.0.0.0:8000..."
+exec python manage.py serve --bind 0.0.0.0:8000
@@ -0,0 +1,20 @@
+// src/api/appointments.js
+import axios from 'axios';
+
+// Largest page /api/appointments/ serves (MAX_PAGE_SIZE in api/pagination.py)
+const PAGE_SIZE = 200;
+
+// Fetch every appointment of the logged-in user by following next_cursor
+// until the last page (the list is paged, oldest first)
+export const fetchAllAppointments = async () => {
+  const appointments = [];
+  let cursor = null;
+  do {
+    const response = await axios.get('/api/appointments/', {
+      params: cursor ? { limit: PAGE_SIZE, cursor } : { limit: PAGE_SIZE },
+    });
+    appointments.push(...(response.data.appointments || []));
+    cursor = response.data.next_cursor;
+  } while (cursor);
+  return appointments;
+};
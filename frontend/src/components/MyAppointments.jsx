@@ -2,6 +2,7 @@
 import { useState, useEffect } from 'react';
 import axios from 'axios';
 import { useAuth } from '../context/AuthContext';
+import { fetchAllAppointments } from '../api/appointments';
 import './MyAppointments.css';
 
 function MyAppointments({ onBackToDashboard }) {
@@ -17,8 +18,7 @@ function MyAppointments({ onBackToDashboard }) {
   const fetchAppointments = async () => {
     try {
       setLoading(true);
-      const response = await axios.get('/api/appointments/');
-      setAppointments(response.data.appointments || []);
+      setAppointments(await fetchAllAppointments());
       setError('');
     } catch (err) {
       setError('Failed to fetch appointments. Please try again.');